@@ -0,0 +1,48 @@
+// src/api/uploads.js
+// Resumable chunked upload (server: app/uploads/resumable.py).
+// Returns a token to send as the `upload` form field instead of the file.
+import axios from "axios";
+
+const MAX_CHUNK_RETRIES = 3;
+
+export async function uploadResumable(apiBase, file, onProgress) {
+  const { data: session } = await axios.post(
+    `${apiBase}/uploads/sessions`,
+    { filename: file.name, size: file.size },
+    { withCredentials: true }
+  );
+  return resumeUpload(apiBase, session, file, onProgress);
+}
+
+// Also used to continue an interrupted upload: only missing chunks are sent.
+export async function resumeUpload(apiBase, session, file, onProgress) {
+  const { data: current } = await axios.get(`${apiBase}/uploads/sessions/${session.token}`, {
+    withCredentials: true,
+  });
+  const received = new Set(current.received_chunks);
+
+  for (let index = 0; index < current.chunk_count; index++) {
+    if (received.has(index)) continue;
+    const start = index * current.chunk_size;
+    const chunk = file.slice(start, Math.min(start + current.chunk_size, file.size));
+
+    for (let attempt = 1; ; attempt++) {
+      try {
+        await axios.put(`${apiBase}/uploads/sessions/${session.token}/${index}`, chunk, {
+          withCredentials: true,
+          headers: { "Content-Type": "application/octet-stream" },
+        });
+        break;
+      } catch (err) {
+        if (attempt >= MAX_CHUNK_RETRIES || err.response?.status < 500) throw err;
+      }
+    }
+    received.add(index);
+    if (onProgress) onProgress(received.size / current.chunk_count);
+  }
+
+  await axios.post(`${apiBase}/uploads/sessions/${session.token}/finalize`, null, {
+    withCredentials: true,
+  });
+  return session.token;
+}
@@ -1,20 +1,65 @@
-import React, { useState } from "react";
+import React, { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import { Search } from "lucide-react";
+import api from "../api/axios";
+
+const SUGGEST_DELAY_MS = 150;
 
 const SearchBar = () => {
   const [searchTerm, setSearchTerm] = useState("");
+  const [suggestions, setSuggestions] = useState({ users: [], skills: [] });
   const navigate = useNavigate();
 
+  // Search-as-you-type: ask the in-memory typeahead index once typing pauses
+  useEffect(() => {
+    const term = searchTerm.trim();
+    if (!term) {
+      setSuggestions({ users: [], skills: [] });
+      return;
+    }
+
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const res = await api.get("/api/search/suggest", { params: { q: term } });
+        if (!cancelled) setSuggestions(res.data);
+      } catch (err) {
+        if (!cancelled) setSuggestions({ users: [], skills: [] });
+      }
+    }, SUGGEST_DELAY_MS);
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchTerm]);
+
+  const clear = () => {
+    setSearchTerm(""); // Clear the search bar after submit
+    setSuggestions({ users: [], skills: [] });
+  };
+
   const handleSearchSubmit = (e) => {
     e.preventDefault();
     if (searchTerm.trim()) {
       // Navigate to the search page with the query
       navigate(`/search?q=${encodeURIComponent(searchTerm.trim())}`);
-      setSearchTerm(""); // Clear the search bar after submit
+      clear();
     }
   };
 
+  const openProfile = (id) => {
+    navigate(`/profile/${id}`);
+    clear();
+  };
+
+  const searchSkill = (skill) => {
+    navigate(`/search?q=${encodeURIComponent(skill)}`);
+    clear();
+  };
+
+  const hasSuggestions = suggestions.users.length > 0 || suggestions.skills.length > 0;
+
   return (
     <form onSubmit={handleSearchSubmit} className="flex-1 px-4 lg:px-12">
       <div className="relative">
@@ -32,9 +77,36 @@ const SearchBar = () => {
         >
           <Search className="w-5 h-5" />
         </button>
+
+        {hasSuggestions && (
+          <ul className="absolute z-20 mt-1 w-full bg-gray-800 text-white rounded-lg shadow-lg overflow-hidden">
+            {suggestions.users.map((user) => (
+              <li key={`user-${user.id}`}>
+                <button
+                  type="button"
+                  onClick={() => openProfile(user.id)}
+                  className="w-full text-left px-4 py-2 hover:bg-gray-700"
+                >
+                  {user.full_name}
+                </button>
+              </li>
+            ))}
+            {suggestions.skills.map(({ skill, users }) => (
+              <li key={`skill-${skill}`}>
+                <button
+                  type="button"
+                  onClick={() => searchSkill(skill)}
+                  className="w-full text-left px-4 py-2 text-gray-300 hover:bg-gray-700"
+                >
+                  {skill} <span className="text-gray-500 text-sm">· {users} people</span>
+                </button>
+              </li>
+            ))}
+          </ul>
+        )}
       </div>
     </form>
   );
 };
 
-export default SearchBar;
\ No newline at end of file
+export default SearchBar;
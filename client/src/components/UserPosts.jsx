@@ -4,6 +4,8 @@ import api from "../api/axios";
 const UserPosts = ({ userId, isCurrentUser }) => {
   const [posts, setPosts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // Create Post State
   const [title, setTitle] = useState("");
@@ -12,15 +14,19 @@ const UserPosts = ({ userId, isCurrentUser }) => {
   const [creating, setCreating] = useState(false);
 
   // --------------------------
-  // Fetch posts
+  // Fetch posts (first page; older ones via "Load more")
   // --------------------------
+  const fetchPage = (cursor) =>
+    api.get(`/api/profile/${userId}/posts`, { params: cursor ? { cursor } : {} });
+
   useEffect(() => {
     if (!userId) return;
 
     const fetchPosts = async () => {
       try {
-        const res = await api.get(`/api/profile/${userId}/posts`);
+        const res = await fetchPage(null);
         setPosts(res.data);
+        setNextCursor(res.headers["x-next-cursor"] || null);
       } catch (err) {
         console.error("Failed to load posts:", err);
       } finally {
@@ -31,6 +37,19 @@ const UserPosts = ({ userId, isCurrentUser }) => {
     fetchPosts();
   }, [userId]);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const res = await fetchPage(nextCursor);
+      setPosts((prev) => [...prev, ...res.data]);
+      setNextCursor(res.headers["x-next-cursor"] || null);
+    } catch (err) {
+      console.error("Failed to load more posts:", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // --------------------------
   // Create Post
   // --------------------------
@@ -166,6 +185,15 @@ const UserPosts = ({ userId, isCurrentUser }) => {
               </p>
             </div>
           ))}
+          {nextCursor && (
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="w-full py-2 text-sm text-indigo-600 hover:text-indigo-800 disabled:opacity-50"
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          )}
         </div>
       )}
     </div>
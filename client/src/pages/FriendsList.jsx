@@ -58,7 +58,7 @@ const FriendsList = () => {
             >
               <div className="flex items-center space-x-4">
                 <img
-                  src={friend.profile_image || "/default-profile.png"}
+                  src={friend.profile_image_urls?.thumb || friend.profile_image || "/default-profile.png"}
                   alt={friend.name}
                   className="w-16 h-16 rounded-full object-cover"
                 />
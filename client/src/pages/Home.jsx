@@ -5,12 +5,18 @@ import { Link } from "react-router-dom";
 const Home = () => {
   const [posts, setPosts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  // Fetch Home Feed
+  const fetchPage = (cursor) =>
+    api.get("/api/posts/home", { params: cursor ? { cursor } : {} });
+
+  // Fetch Home Feed (first page; older posts via "Load more")
   const fetchHomeFeed = async () => {
     try {
-      const res = await api.get("/api/posts/home");
+      const res = await fetchPage(null);
       setPosts(res.data);
+      setNextCursor(res.headers["x-next-cursor"] || null);
     } catch (err) {
       console.error("Error loading feed:", err);
     } finally {
@@ -18,6 +24,19 @@ const Home = () => {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const res = await fetchPage(nextCursor);
+      setPosts((prev) => [...prev, ...res.data]);
+      setNextCursor(res.headers["x-next-cursor"] || null);
+    } catch (err) {
+      console.error("Error loading more posts:", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchHomeFeed();
   }, []);
@@ -50,7 +69,7 @@ const Home = () => {
               {/* Post Header */}
               <div className="flex items-center gap-3 px-4 py-3 border-b border-gray-100">
                 <img
-                  src={post.user?.profile_pic || "/default-profile.png"}
+                  src={post.user?.profile_pic_urls?.thumb || post.user?.profile_pic || "/default-profile.png"}
                   alt=""
                   className="w-11 h-11 rounded-full object-cover"
                 />
@@ -86,7 +105,9 @@ const Home = () => {
                   if (isImage) {
                     return (
                       <img
-                        src={url}
+                        src={post.file_urls?.large || url}
+                        srcSet={post.file_urls ? `${post.file_urls.medium} 640w, ${post.file_urls.large} 1280w` : undefined}
+                        sizes="(max-width: 640px) 100vw, 640px"
                         alt="Post"
                         className="mt-3 rounded-lg w-full max-h-96 object-cover"
                       />
@@ -109,6 +130,16 @@ const Home = () => {
           ))}
         </div>
 
+        {nextCursor && (
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="w-full mt-6 py-2 text-sm text-indigo-600 hover:text-indigo-800 disabled:opacity-50"
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        )}
+
       </div>
     </div>
   );
@@ -5,14 +5,31 @@ import { Bell, Trash2, Clock, CheckCircle } from "lucide-react";
 const NotificationsPage = () => {
   const [notifications, setNotifications] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const fetchPage = (cursor) =>
+    axios.get("http://localhost:5000/api/notifications/", {
+      params: cursor ? { cursor } : {},
+      withCredentials: true,
+    });
 
   useEffect(() => {
     const fetchNotifications = async () => {
       try {
-        const response = await axios.get("http://localhost:5000/api/notifications/", {
-          withCredentials: true,
-        });
+        const response = await fetchPage(null);
         setNotifications(response.data);
+        setNextCursor(response.headers["x-next-cursor"] || null);
+
+        // Acknowledge everything up to the newest one shown (one batched update)
+        const newestId = Math.max(0, ...response.data.map((n) => n.id));
+        if (response.data.some((n) => !n.is_read)) {
+          await axios.post(
+            "http://localhost:5000/api/notifications/read",
+            { up_to_id: newestId },
+            { withCredentials: true }
+          );
+        }
       } catch (error) {
         console.error("Error fetching notifications:", error);
       } finally {
@@ -22,6 +39,19 @@ const NotificationsPage = () => {
     fetchNotifications();
   }, []);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await fetchPage(nextCursor);
+      setNotifications((prev) => [...prev, ...response.data]);
+      setNextCursor(response.headers["x-next-cursor"] || null);
+    } catch (error) {
+      console.error("Error fetching more notifications:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const deleteNotif = async (id) => {
     try {
       await axios.delete(`http://localhost:5000/api/notifications/delete/${id}`, {
@@ -64,6 +94,15 @@ const NotificationsPage = () => {
               </button>
             </div>
           ))}
+          {nextCursor && (
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="w-full py-2 text-sm text-blue-400 hover:text-blue-300 disabled:opacity-50"
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          )}
         </div>
       )}
     </div>
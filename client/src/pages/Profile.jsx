@@ -142,7 +142,7 @@ const Profile = () => {
           <div className="h-48 w-full bg-gradient-to-r from-indigo-100 via-purple-100 to-pink-100">
             {user.cover_photo_url && (
               <img
-                src={user.cover_photo_url}
+                src={user.cover_photo_urls?.large || user.cover_photo_url}
                 alt="Cover"
                 className="w-full h-full object-cover"
               />
@@ -153,7 +153,7 @@ const Profile = () => {
           <div className="px-6 pb-6 relative">
             <div className="-mt-16">
               <img
-                src={user.profile_pic_url || "/default-profile.png"}
+                src={user.profile_pic_urls?.small || user.profile_pic_url || "/default-profile.png"}
                 alt="Profile"
                 className="w-32 h-32 rounded-full border-4 border-white shadow-md object-cover"
               />
@@ -3,14 +3,27 @@ import { useSearchParams, Link } from "react-router-dom";
 import axios from "axios";
 import { Loader2 } from "lucide-react";
 
+const TYPE_LABELS = { user: "People", post: "Posts", skill: "Skills" };
+
 const SearchPage = () => {
   const [searchParams] = useSearchParams();
   const [results, setResults] = useState([]);
+  const [facets, setFacets] = useState({});
+  const [type, setType] = useState("");        // "" = all types
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // Get the 'q' parameter from the URL (e.g., /search?q=John)
   const query = searchParams.get("q");
 
+  // One ranked search over people, posts and skills
+  const fetchPage = (cursor) =>
+    axios.get("/api/search/all", {
+      params: { q: query, ...(type && { types: type }), ...(cursor && { cursor }) },
+      withCredentials: true,
+    });
+
   useEffect(() => {
     // If there's no query, don't search
     if (!query) {
@@ -22,20 +35,91 @@ const SearchPage = () => {
     const fetchResults = async () => {
       setLoading(true);
       try {
-        // --- This is the backend call you need to create ---
-        // It's expecting an array of user objects in response
-        const res = await axios.get(`/api/search?q=${encodeURIComponent(query)}`);
-        setResults(res.data);
+        const res = await fetchPage(null);
+        setResults(res.data.results);
+        if (!type) setFacets(res.data.facets || {});
+        setNextCursor(res.headers["x-next-cursor"] || null);
       } catch (err) {
         console.error("Error fetching search results:", err);
         setResults([]); // Set to empty array on error
+        setNextCursor(null);
       } finally {
         setLoading(false);
       }
     };
 
     fetchResults();
-  }, [query]); // This effect re-runs every time the 'query' in the URL changes
+  }, [query, type]); // Re-run when the query in the URL or the selected type changes
+
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const res = await fetchPage(nextCursor);
+      setResults((prev) => [...prev, ...res.data.results]);
+      setNextCursor(res.headers["x-next-cursor"] || null);
+    } catch (err) {
+      console.error("Error fetching more results:", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const renderResult = (result) => {
+    if (result.type === "user") {
+      const user = result.user;
+      return (
+        <Link
+          key={`user-${user.id}`}
+          to={`/profile/${user.id}`}
+          className="block bg-white p-4 rounded-lg shadow-md hover:shadow-lg transition"
+        >
+          <div className="flex items-center space-x-4">
+            <img
+              src={user.profile_pic_url || "/default-profile.png"}
+              alt={user.full_name}
+              className="w-16 h-16 rounded-full object-cover"
+            />
+            <div>
+              <h3 className="text-xl font-semibold text-gray-900">{user.full_name}</h3>
+              <p className="text-gray-600">{user.email}</p>
+              {user.location && (
+                <p className="text-gray-500 text-sm mt-1">{user.location}</p>
+              )}
+            </div>
+          </div>
+        </Link>
+      );
+    }
+
+    if (result.type === "post") {
+      const post = result.post;
+      return (
+        <Link
+          key={`post-${post.id}`}
+          to={`/profile/${post.user.id}`}
+          className="block bg-white p-4 rounded-lg shadow-md hover:shadow-lg transition"
+        >
+          <h3 className="text-xl font-semibold text-gray-900">{post.title}</h3>
+          {post.description && (
+            <p className="text-gray-600 mt-1 line-clamp-2">{post.description}</p>
+          )}
+          <p className="text-gray-500 text-sm mt-2">by {post.user.name}</p>
+        </Link>
+      );
+    }
+
+    const { skill, users } = result.skill;
+    return (
+      <Link
+        key={`skill-${skill}`}
+        to={`/search?q=${encodeURIComponent(skill)}`}
+        className="block bg-white p-4 rounded-lg shadow-md hover:shadow-lg transition"
+      >
+        <h3 className="text-lg font-semibold text-indigo-600">{skill}</h3>
+        <p className="text-gray-500 text-sm">{users} people list this skill</p>
+      </Link>
+    );
+  };
 
   // 1. Show a loading spinner
   if (loading) {
@@ -53,31 +137,34 @@ const SearchPage = () => {
         Search Results for: <span className="text-indigo-600">"{query}"</span>
       </h1>
 
+      {/* Facets: match counts per type, click to filter */}
+      <div className="flex gap-2 mb-6">
+        {["", ...Object.keys(TYPE_LABELS)].map((t) => (
+          <button
+            key={t || "all"}
+            onClick={() => setType(t)}
+            className={`px-3 py-1 rounded-full text-sm ${
+              type === t ? "bg-indigo-600 text-white" : "bg-gray-200 text-gray-700"
+            }`}
+          >
+            {t ? `${TYPE_LABELS[t]} (${facets[t] ?? 0})` : "All"}
+          </button>
+        ))}
+      </div>
+
       {results.length > 0 ? (
         <div className="space-y-4">
-          {/* Here we map over the results and show a "profile card" for each */}
-          {results.map((user) => (
-            <Link
-              key={user.id}
-              to={`/profile/${user.id}`}
-              className="block bg-white p-4 rounded-lg shadow-md hover:shadow-lg transition"
+          {results.map(renderResult)}
+
+          {nextCursor && (
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="w-full py-2 text-indigo-600 hover:underline disabled:opacity-50"
             >
-              <div className="flex items-center space-x-4">
-                <img
-                  src={user.profile_pic_url || "/default-profile.png"}
-                  alt={user.full_name}
-                  className="w-16 h-16 rounded-full object-cover"
-                />
-                <div>
-                  <h3 className="text-xl font-semibold text-gray-900">{user.full_name}</h3>
-                  <p className="text-gray-600">{user.email}</p>
-                  {user.location && (
-                    <p className="text-gray-500 text-sm mt-1">{user.location}</p>
-                  )}
-                </div>
-              </div>
-            </Link>
-          ))}
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          )}
         </div>
       ) : (
         // 3. Show this if no results were found
@@ -89,4 +176,4 @@ const SearchPage = () => {
   );
 };
 
-export default SearchPage;
\ No newline at end of file
+export default SearchPage;
@@ -1,25 +1,90 @@
 import React, { useState, useEffect, useRef } from "react";
 import axios from "axios";
 import { Send, Paperclip, X, MessageSquare, Loader2, MoreVertical, Search } from "lucide-react";
+import { uploadResumable } from "../api/uploads";
 
 const API_BASE = "http://localhost:5000/api"; 
+const RESUMABLE_THRESHOLD = 4 * 1024 * 1024; // bytes
 
 const ChatApp = () => {
   const [friends, setFriends] = useState([]);
+  const [inbox, setInbox] = useState({}); // friend id -> { last_message, unread }
   const [currentFriend, setCurrentFriend] = useState(null);
   const [messages, setMessages] = useState([]);
   const [newMessageContent, setNewMessageContent] = useState("");
   const [selectedFile, setSelectedFile] = useState(null);
   const [loadingFriends, setLoadingFriends] = useState(true);
   const [loadingChat, setLoadingChat] = useState(false);
+  const [hasEarlier, setHasEarlier] = useState(false);
+  const [loadingEarlier, setLoadingEarlier] = useState(false);
 
   const messagesEndRef = useRef(null);
   const textareaRef = useRef(null);
+  const currentFriendRef = useRef(null);
 
-  // Auto scroll
+  useEffect(() => {
+    currentFriendRef.current = currentFriend;
+  }, [currentFriend]);
+
+  // Move a conversation to the top of the sidebar with its new last message
+  const updateInbox = (friendId, msg, unreadDelta) => {
+    setInbox((prev) => ({
+      ...prev,
+      [friendId]: {
+        last_message: msg,
+        unread: unreadDelta === null ? 0 : (prev[friendId]?.unread || 0) + unreadDelta,
+      },
+    }));
+  };
+
+  // Append a pushed message if it belongs to the open conversation (ignoring ones we already have)
+  const receiveMessage = (msg) => {
+    const friend = currentFriendRef.current;
+    const otherId = msg.is_sender ? msg.receiver_id : msg.sender_id;
+    const isOpen = friend && friend.id === otherId;
+    updateInbox(otherId, msg, isOpen || msg.is_sender ? null : 1);
+    if (!isOpen) return;
+    setMessages((prev) => (prev.some((m) => m.id === msg.id) ? prev : [...prev, msg]));
+    if (!msg.is_sender) {
+      axios.post(`${API_BASE}/messages/read/${otherId}`, {}, { withCredentials: true }).catch(() => {});
+    }
+  };
+
+  // PUSH: Server-Sent Events, with long-polling where EventSource is unavailable
+  useEffect(() => {
+    if (typeof EventSource !== "undefined") {
+      const source = new EventSource(`${API_BASE}/messages/stream`, { withCredentials: true });
+      source.addEventListener("message", (e) => receiveMessage(JSON.parse(e.data)));
+      return () => source.close();
+    }
+
+    let stopped = false;
+    const poll = async () => {
+      let afterId = null; // the first poll returns the newest message id to start from
+      while (!stopped) {
+        try {
+          const res = await axios.get(`${API_BASE}/messages/poll`, {
+            params: afterId === null ? {} : { after_id: afterId },
+            withCredentials: true,
+          });
+          res.data.messages.forEach(receiveMessage);
+          afterId = res.data.last_id;
+        } catch (err) {
+          await new Promise((resolve) => setTimeout(resolve, 3000)); // back off on errors
+        }
+      }
+    };
+    poll();
+    return () => {
+      stopped = true;
+    };
+  }, []);
+
+  // Auto scroll (not when older messages are prepended)
+  const newestId = messages.length ? messages[messages.length - 1].id : null;
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
-  }, [messages]);
+  }, [newestId]);
 
   // Auto-resize textarea like ChatGPT
   useEffect(() => {
@@ -30,15 +95,30 @@ const ChatApp = () => {
     }
   }, [newMessageContent]);
 
-  // FETCH FRIEND LIST (Using your original working URL)
+  // FETCH FRIEND LIST (Using your original working URL) + INBOX (last message, unread)
   useEffect(() => {
     axios
       .get("/api/friends/list", { withCredentials: true })
       .then((res) => setFriends(res.data))
       .catch(() => console.log("Failed to fetch friends"))
       .finally(() => setLoadingFriends(false));
+
+    axios
+      .get(`${API_BASE}/messages/inbox`, { params: { limit: 100 }, withCredentials: true })
+      .then((res) =>
+        setInbox(
+          Object.fromEntries(
+            res.data.map((c) => [c.friend.id, { last_message: c.last_message, unread: c.unread }])
+          )
+        )
+      )
+      .catch(() => console.log("Failed to fetch inbox"));
   }, []);
 
+  // Friends with the most recent conversation first
+  const lastMessageId = (f) => inbox[f.id]?.last_message?.id || 0;
+  const sortedFriends = [...friends].sort((a, b) => lastMessageId(b) - lastMessageId(a));
+
   // FETCH CHAT HISTORY
 // --- Updated loadChat Function ---
   const loadChat = async (friendId) => {
@@ -48,8 +128,10 @@ const ChatApp = () => {
       const res = await axios.get(`${API_BASE}/messages/chat/${friendId}`, {
         withCredentials: true,
       });
-      // Set messages from the backend response
+      // Set messages from the backend response (the latest page); loading it marks the chat read
       setMessages(res.data.messages || []);
+      setInbox((prev) => (prev[friendId] ? { ...prev, [friendId]: { ...prev[friendId], unread: 0 } } : prev));
+      setHasEarlier(Boolean(res.data.has_more));
     } catch (err) {
       console.error("Failed to load chat history:", err);
       // Optional: Set messages to empty if fetch fails to avoid showing old friend's chat
@@ -60,6 +142,24 @@ const ChatApp = () => {
     }
   };
 
+  // LOAD EARLIER MESSAGES (scrolling back)
+  const loadEarlier = async () => {
+    if (!currentFriend || !messages.length) return;
+    setLoadingEarlier(true);
+    try {
+      const res = await axios.get(`${API_BASE}/messages/chat/${currentFriend.id}`, {
+        params: { before_id: messages[0].id },
+        withCredentials: true,
+      });
+      setMessages((prev) => [...(res.data.messages || []), ...prev]);
+      setHasEarlier(Boolean(res.data.has_more));
+    } catch (err) {
+      console.error("Failed to load earlier messages:", err);
+    } finally {
+      setLoadingEarlier(false);
+    }
+  };
+
   // --- Updated useEffect Watcher ---
   useEffect(() => {
     // We watch for the specific ID change
@@ -73,10 +173,6 @@ const ChatApp = () => {
     if (e) e.preventDefault();
     if (!currentFriend || (!newMessageContent.trim() && !selectedFile)) return;
 
-    const formData = new FormData();
-    if (newMessageContent.trim()) formData.append("content", newMessageContent);
-    if (selectedFile) formData.append("file", selectedFile);
-
     const oldText = newMessageContent;
     const oldFile = selectedFile;
 
@@ -84,12 +180,24 @@ const ChatApp = () => {
     setSelectedFile(null);
 
     try {
+      const formData = new FormData();
+      if (oldText.trim()) formData.append("content", oldText);
+      if (oldFile) {
+        // Large attachments go up in resumable chunks instead of one request
+        if (oldFile.size > RESUMABLE_THRESHOLD) {
+          formData.append("upload", await uploadResumable(API_BASE, oldFile));
+        } else {
+          formData.append("file", oldFile);
+        }
+      }
+
       const res = await axios.post(
         `${API_BASE}/messages/send/${currentFriend.id}`,
         formData,
         { withCredentials: true }
       );
-      setMessages((prev) => [...prev, res.data]);
+      setMessages((prev) => (prev.some((m) => m.id === res.data.id) ? prev : [...prev, res.data]));
+      updateInbox(currentFriend.id, res.data, null);
     } catch (err) {
       console.log("Message sending failed");
       setNewMessageContent(oldText);
@@ -132,7 +240,7 @@ const ChatApp = () => {
           ) : friends.length === 0 ? (
             <p className="text-slate-500 text-center mt-10 text-sm">No friends found.</p>
           ) : (
-            friends.map((f) => (
+            sortedFriends.map((f) => (
               <div
               key={f.id}
               onClick={() => {
@@ -158,8 +266,15 @@ const ChatApp = () => {
                 />
                 <div className="ml-4 overflow-hidden">
                   <h3 className="font-semibold text-slate-900 truncate">{f.name}</h3>
-                  <p className="text-xs text-slate-500 truncate">{f.email}</p>
+                  <p className="text-xs text-slate-500 truncate">
+                    {inbox[f.id]?.last_message?.content || f.email}
+                  </p>
                 </div>
+                {inbox[f.id]?.unread > 0 && (
+                  <span className="ml-auto min-w-[20px] h-5 px-1.5 rounded-full bg-indigo-600 text-white text-[11px] font-semibold flex items-center justify-center">
+                    {inbox[f.id].unread}
+                  </span>
+                )}
               </div>
             ))
           )}
@@ -200,7 +315,19 @@ const ChatApp = () => {
                    <p className="text-slate-400 text-sm italic">Say hello to {currentFriend.name}!</p>
                 </div>
               ) : (
-                messages.map((msg) => {
+                <>
+                {hasEarlier && (
+                  <div className="text-center">
+                    <button
+                      onClick={loadEarlier}
+                      disabled={loadingEarlier}
+                      className="text-xs text-indigo-600 hover:underline disabled:opacity-50"
+                    >
+                      {loadingEarlier ? "Loading..." : "Load earlier messages"}
+                    </button>
+                  </div>
+                )}
+                {messages.map((msg) => {
                   const isSender = msg.is_sender; // This depends on your backend serializer
                   return (
                     <div key={msg.id} className={`flex ${isSender ? "justify-end" : "justify-start"}`}>
@@ -223,7 +350,8 @@ const ChatApp = () => {
                       </div>
                     </div>
                   );
-                })
+                })}
+                </>
               )}
               <div ref={messagesEndRef} />
             </div>
@@ -22,7 +22,8 @@ def create_app():
         app,
         # origins=[app.config["FRONTEND_URL"]],
         origins=["*"],
-        supports_credentials=True
+        supports_credentials=True,
+        expose_headers=["X-Next-Cursor", "ETag"]
     )
 
     # Initialize extensions with the application instance
@@ -31,6 +32,14 @@ def create_app():
     bcrypt.init_app(app)
     login_manager.init_app(app)
 
+    # Per-request query count / DB / serialization / wall time, served at /api/_metrics
+    from app.metrics.instrumentation import init_metrics
+    init_metrics(app)
+
+    # Notifications are written in batches by a background thread
+    from app.notifications.outbox import init_outbox
+    init_outbox(app)
+
      # Initialize Cloudinary (only if using cloud provider)
     if app.config['UPLOAD_PROVIDER'] == 'cloudinary':
         cloudinary.config(
@@ -74,6 +83,12 @@ def create_app():
     from app.messages.routes import messages_bp
     app.register_blueprint(messages_bp, url_prefix='/api/messages')
 
+    from app.uploads.routes import uploads_bp
+    app.register_blueprint(uploads_bp, url_prefix='/api/uploads')
+
+    from app.metrics.routes import metrics_bp
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+
     # =================================================================
     # Register Backend Admin Interface
     # =================================================================
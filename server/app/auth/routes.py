@@ -2,6 +2,9 @@
 from flask import Blueprint, jsonify, request
 from app import db, bcrypt, login_manager # <--- Import login_manager here!
 from app.models import User
+from app.suggestions.model import invalidate as invalidate_suggestions
+from app.search.backend import index_user
+from app.search import typeahead
 from flask_login import login_user, logout_user, login_required, current_user
 
 # FIX 1: Remove url_prefix (it is already set in app.py)
@@ -47,7 +50,10 @@ def register():
         password=hashed_pw
     )
     db.session.add(new_user)
+    index_user(new_user)
     db.session.commit()
+    invalidate_suggestions()
+    typeahead.update_user(new_user)
 
     return jsonify({
         'message': 'Registration successful. Please log in.',
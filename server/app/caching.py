@@ -0,0 +1,126 @@
+"""
+Version counters and conditional GET (ETag / 304).
+
+Write paths bump a per-user counter for each cached view they change
+(`bump('friends', user_id)`). Read endpoints build their ETag from those
+counters with a single primary-key lookup, and answer a matching
+If-None-Match with 304 before running their query or serializing anything.
+"""
+import hashlib
+from functools import wraps
+
+from flask import current_app, make_response, request
+from sqlalchemy import String, cast, literal, select
+
+from app import db
+from app.models import Counter, friendships
+
+
+def counter_key(scope, user_id=None):
+    """'feed', 12 -> 'feed:12'; a scope alone names a global counter."""
+    return scope if user_id is None else f"{scope}:{user_id}"
+
+
+def upsert_insert(model):
+    """An INSERT for `model` supporting on_conflict_do_update, or None if the dialect has none."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(model)
+
+
+def _upsert():
+    return upsert_insert(Counter)
+
+
+def _on_conflict_add(stmt):
+    return stmt.on_conflict_do_update(
+        index_elements=[Counter.key],
+        set_={'value': Counter.value + stmt.excluded.value}
+    )
+
+
+def add(keys, delta=1):
+    """Atomically add `delta` to each counter, creating missing ones."""
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return
+
+    stmt = _upsert()
+    if stmt is not None:
+        db.session.execute(_on_conflict_add(stmt), [{'key': k, 'value': delta} for k in keys])
+        return
+
+    # Other databases: update, then insert whatever did not exist yet
+    existing = {k for (k,) in db.session.query(Counter.key).filter(Counter.key.in_(keys))}
+    if existing:
+        db.session.query(Counter).filter(Counter.key.in_(existing)).update(
+            {Counter.value: Counter.value + delta}, synchronize_session=False
+        )
+    db.session.add_all(Counter(key=k, value=delta) for k in keys if k not in existing)
+
+
+def bump(scope, *user_ids):
+    """Invalidate a cached view for some users (or the global `scope` counter if none given)."""
+    add(counter_key(scope, u) for u in user_ids) if user_ids else add([scope])
+
+
+def bump_friends_of(scope, user_id):
+    """Invalidate a cached view for every friend of a user in one INSERT ... SELECT."""
+    stmt = _upsert()
+    if stmt is None:
+        friend_ids = [f for (f,) in db.session.query(friendships.c.friend_id).filter(
+            friendships.c.user_id == user_id
+        )]
+        return bump(scope, *friend_ids)
+
+    rows = select(
+        literal(f"{scope}:") + cast(friendships.c.friend_id, String), literal(1)
+    ).where(friendships.c.user_id == user_id).distinct()
+    db.session.execute(_on_conflict_add(stmt.from_select(['key', 'value'], rows)))
+
+
+def get(keys):
+    """Current values of some counters (missing ones read as 0)."""
+    keys = list(keys)
+    found = dict(db.session.query(Counter.key, Counter.value).filter(Counter.key.in_(keys)))
+    return [found.get(k, 0) for k in keys]
+
+
+def make_etag(keys, *extra):
+    """ETag from counter versions plus anything else the response depends on (viewer, query string)."""
+    parts = [f"{k}={v}" for k, v in zip(keys, get(keys))]
+    parts.extend(str(e) for e in extra)
+    parts.append(request.query_string.decode())
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest()
+
+
+def conditional(keys_for):
+    """
+    Decorator for GET views. `keys_for(*view_args)` returns the counter keys
+    (and optionally extra values) the response depends on; a client sending
+    the matching If-None-Match gets 304 without the view running.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            keys, *extra = keys_for(*args, **kwargs)
+            etag = make_etag(keys, *extra)
+
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            # Browsers may keep the body but must revalidate every time
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapped
+    return decorator
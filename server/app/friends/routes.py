@@ -1,11 +1,41 @@
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 from app import db
+from app.caching import bump, conditional, counter_key
 from app.models import User, FriendRequest
 from app.notifications.notify import notify  # ✅ Optional: keep for in-app notifications
+from app.suggestions.model import invalidate as invalidate_suggestions
+from app.posts.timeline import on_friendship_added, on_friendship_removed
+from app.serializers import serializer
+from app.pagination import search_page_args
+from app.search import backend as search_index
+from app.uploads.derivatives import image_urls
 
 friends_bp = Blueprint('friends', __name__, url_prefix='/friends')
 
+
+@serializer(FriendRequest, joined=('sender',))
+def serialize_request(req):
+    return {
+        "id": req.id,
+        "sender_id": req.sender.id,
+        "sender_name": req.sender.full_name,
+        "sender_profile": req.sender.profile_image if hasattr(req.sender, 'profile_image') else None,
+        "status": req.status
+    }
+
+
+@serializer(User)
+def serialize_friend(f):
+    return {
+        "id": f.id,
+        "name": f.full_name,
+        "email": f.email,
+        "profile_image": getattr(f, "profile_pic", None),
+        "profile_image_urls": image_urls(getattr(f, "profile_pic", None), external=True)
+    }
+
+
 # ---------------------------
 # Send Friend Request
 # ---------------------------
@@ -28,13 +58,16 @@ def send_request(user_id):
     # Create request
     req = FriendRequest(sender_id=current_user.id, receiver_id=target_user.id)
     db.session.add(req)
+    bump('requests', current_user.id, target_user.id)
     db.session.commit()
 
     # Optional: notify
     notify(
-        target_user,
+        target_user.id,
         f"{current_user.full_name} sent you a friend request.",
-        "/friends/requests"
+        "/friends/requests",
+        kind='friend_request',
+        actor=current_user.full_name
     )
 
     return jsonify({"message": "Friend request sent successfully.", "status": "requested"}), 200
@@ -46,17 +79,10 @@ def send_request(user_id):
 @friends_bp.route('/requests', methods=['GET'])
 @login_required
 def get_requests():
-    pending = FriendRequest.query.filter_by(receiver_id=current_user.id, status='pending').all()
-    requests_data = [
-        {
-            "id": req.id,
-            "sender_id": req.sender.id,
-            "sender_name": req.sender.full_name,
-            "sender_profile": req.sender.profile_image if hasattr(req.sender, 'profile_image') else None,
-            "status": req.status
-        }
-        for req in pending
-    ]
+    pending = serialize_request.eager(
+        FriendRequest.query.filter_by(receiver_id=current_user.id, status='pending')
+    ).all()
+    requests_data = serialize_request.many(pending)
     return jsonify(requests_data), 200
 
 
@@ -74,12 +100,18 @@ def accept_request(req_id):
     req.status = 'accepted'
     current_user.friends.append(req.sender)
     req.sender.friends.append(current_user)
+    on_friendship_added(current_user, req.sender)
+    bump('friends', current_user.id, req.sender_id)
+    bump('requests', current_user.id, req.sender_id)
     db.session.commit()
+    invalidate_suggestions()
 
     notify(
-        req.sender,
+        req.sender_id,
         f"{current_user.full_name} accepted your friend request.",
-        "/friends/list"
+        "/friends/list",
+        kind='friend_accept',
+        actor=current_user.full_name
     )
 
     return jsonify({"message": "Friend request accepted.", "status": "accepted"}), 200
@@ -97,6 +129,7 @@ def reject_request(req_id):
         return jsonify({"message": "Unauthorized."}), 403
 
     req.status = 'rejected'
+    bump('requests', current_user.id, req.sender_id)
     db.session.commit()
 
     return jsonify({"message": "Friend request rejected.", "status": "rejected"}), 200
@@ -115,7 +148,10 @@ def remove_friend(user_id):
 
     current_user.friends.remove(friend)
     friend.friends.remove(current_user)
+    on_friendship_removed(current_user, friend)
+    bump('friends', current_user.id, friend.id)
     db.session.commit()
+    invalidate_suggestions()
 
     return jsonify({"message": "Friend removed successfully.", "status": "removed"}), 200
 
@@ -125,17 +161,10 @@ def remove_friend(user_id):
 # ---------------------------
 @friends_bp.route('/list', methods=['GET'])
 @login_required
+@conditional(lambda: ([counter_key('friends', current_user.id)],))
 def list_friends():
-    friends = current_user.friends.all()
-    friends_data = [
-        {
-            "id": f.id,
-            "name": f.full_name,
-            "email": f.email,
-            "profile_image": getattr(f, "profile_pic", None)
-        }
-        for f in friends
-    ]
+    friends = serialize_friend.eager(current_user.friends).all()
+    friends_data = serialize_friend.many(friends)
     return jsonify(friends_data), 200
 
 
@@ -149,10 +178,11 @@ def search_friends():
     if not query:
         return jsonify([]), 200
 
-    results = User.query.filter(
-        User.id != current_user.id,
-        (User.full_name.ilike(f'%{query}%')) | (User.skills.ilike(f'%{query}%'))
-    ).all()
+    limit, offset = search_page_args()
+    results = search_index.search_users(
+        query, fields=('full_name', 'skills'),
+        limit=limit, offset=offset, exclude_id=current_user.id
+    )
 
     users = [
         {
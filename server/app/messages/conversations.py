@@ -0,0 +1,105 @@
+"""
+Conversation summaries for the chat inbox.
+
+send_message upserts the pair's Conversation row in the same transaction as
+the message: last message, recency and the receiver's unread counter. The
+inbox then reads that table instead of grouping the whole message table.
+"""
+from sqlalchemy import case, select, tuple_, union_all
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.caching import upsert_insert
+from app.models import Conversation, Message, User
+from app.pagination import encode_cursor
+
+
+def record_message(msg):
+    """Update (or create) the conversation for a new, flushed message."""
+    low, high = Message.conversation_key(msg.sender_id, msg.receiver_id)
+    values = {
+        'low_user_id': low,
+        'high_user_id': high,
+        'last_message_id': msg.id,
+        'last_timestamp': msg.timestamp,
+        'low_unread': int(msg.receiver_id == low),
+        'high_unread': int(msg.receiver_id == high),
+    }
+
+    stmt = upsert_insert(Conversation)
+    if stmt is not None:
+        stmt = stmt.values(**values)
+        # Concurrent sends may commit out of order: keep the newest message as "last"
+        newer = stmt.excluded.last_message_id > Conversation.last_message_id
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[Conversation.low_user_id, Conversation.high_user_id],
+            set_={
+                'last_message_id': case((newer, stmt.excluded.last_message_id), else_=Conversation.last_message_id),
+                'last_timestamp': case((newer, stmt.excluded.last_timestamp), else_=Conversation.last_timestamp),
+                'low_unread': Conversation.low_unread + stmt.excluded.low_unread,
+                'high_unread': Conversation.high_unread + stmt.excluded.high_unread,
+            }
+        ))
+        return
+
+    # Other databases: lock the row if it exists, otherwise create it
+    conversation = Conversation.query.filter_by(low_user_id=low, high_user_id=high).with_for_update().first()
+    if conversation is None:
+        db.session.add(Conversation(**values))
+        return
+    if msg.id > (conversation.last_message_id or 0):
+        conversation.last_message_id = msg.id
+        conversation.last_timestamp = msg.timestamp
+    conversation.low_unread += values['low_unread']
+    conversation.high_unread += values['high_unread']
+
+
+def mark_read(user_id, other_id):
+    """Zero user_id's unread counter for their conversation with other_id."""
+    low, high = Message.conversation_key(user_id, other_id)
+    column = 'low_unread' if user_id == low else 'high_unread'
+    Conversation.query.filter_by(low_user_id=low, high_user_id=high).update(
+        {column: 0}, synchronize_session=False
+    )
+
+
+def unread_for(conversation, user_id):
+    return conversation.low_unread if conversation.low_user_id == user_id else conversation.high_unread
+
+
+def inbox_page(user_id, position, limit):
+    """
+    A user's conversations, most recent first, with the other participant and
+    last message, starting after `position` (a decoded cursor).
+
+    The user may be either participant, so the page is the union of a range
+    scan of each participant index (each stopping after limit + 1 rows),
+    merged and joined in one statement. Returns ([(conversation, other_user)], next_cursor).
+    """
+    def side(column):
+        q = select(Conversation.id, Conversation.last_timestamp).where(column == user_id)
+        if position is not None:
+            q = q.where(tuple_(Conversation.last_timestamp, Conversation.id) < position)
+        q = q.order_by(Conversation.last_timestamp.desc(), Conversation.id.desc()).limit(limit + 1)
+        return select(q.subquery())
+
+    page_ids = union_all(side(Conversation.low_user_id), side(Conversation.high_user_id)).subquery()
+    other_id = case(
+        (Conversation.low_user_id == user_id, Conversation.high_user_id), else_=Conversation.low_user_id
+    )
+    rows = (
+        db.session.query(Conversation, User)
+        .join(User, User.id == other_id)
+        .options(joinedload(Conversation.last_message))
+        .filter(Conversation.id.in_(select(page_ids.c.id)))
+        .order_by(Conversation.last_timestamp.desc(), Conversation.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        next_cursor = encode_cursor(last.last_timestamp, last.id)
+    return rows, next_cursor
@@ -0,0 +1,195 @@
+"""
+Publish/subscribe for pushing chat messages to open connections.
+
+Channels are strings ("user:42"); payloads are JSON-serialisable dicts.
+
+- MemoryBroker delivers within one process. It is enough for a single
+  worker (or a threaded dev server).
+- SocketBroker connects every worker to one hub process (`flask chat-broker`),
+  which relays each publish to all workers, standing in for Redis pub/sub in
+  multi-worker deployments. Each worker still dispatches to its own
+  subscribers through a MemoryBroker.
+
+CHAT_BROKER selects one ("memory" or "socket"). Open SSE streams hold a
+worker thread each, so run gunicorn with threaded workers (-k gthread).
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+from flask import current_app
+
+log = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = channels
+        self._queue = queue.SimpleQueue()
+
+    def deliver(self, channel, payload):
+        self._queue.put((channel, payload))
+
+    def get(self, timeout):
+        """Next (channel, payload), or None after `timeout` seconds."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MemoryBroker:
+    def __init__(self):
+        self._subscribers = {}  # channel -> set of Subscription
+        self._lock = threading.Lock()
+
+    def subscribe(self, *channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def publish(self, channel, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(channel, payload)
+
+
+class SocketBroker:
+    """Relays publishes through the hub so subscribers in every worker receive them."""
+
+    RETRY_SECONDS = 1.0
+
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+        self.local = MemoryBroker()
+        self._conn = None
+        self._send_lock = threading.Lock()
+        self._connected = threading.Event()
+        threading.Thread(target=self._read_loop, name='chat-broker', daemon=True).start()
+
+    def subscribe(self, *channels):
+        return self.local.subscribe(*channels)
+
+    def unsubscribe(self, subscription):
+        self.local.unsubscribe(subscription)
+
+    def publish(self, channel, payload):
+        data = json.dumps([channel, payload]).encode()
+        if self._connected.wait(timeout=self.RETRY_SECONDS):
+            try:
+                with self._send_lock:
+                    self._conn.send_bytes(data)
+                return
+            except (OSError, EOFError):
+                self._connected.clear()
+        # Hub unreachable: still reach this worker's subscribers
+        log.warning("chat broker hub %s unreachable; delivering locally only", self.address)
+        self.local.publish(channel, payload)
+
+    def _read_loop(self):
+        while True:
+            try:
+                self._conn = Client(self.address, authkey=self.authkey)
+                self._connected.set()
+                while True:
+                    channel, payload = json.loads(self._conn.recv_bytes())
+                    self.local.publish(channel, payload)
+            except (OSError, EOFError) as e:
+                self._connected.clear()
+                if self._conn is not None:
+                    self._conn.close()  # a racing publish() then fails with OSError and goes local
+                log.debug("chat broker connection to %s lost: %s", self.address, e)
+                time.sleep(self.RETRY_SECONDS)
+
+
+def run_hub(address, authkey):
+    """Accept worker connections and relay every publish to all of them (blocks forever)."""
+    listener = Listener(address, authkey=authkey)
+    # conn -> its send lock: relays from several workers may write to one
+    # client at once, and interleaved send_bytes calls would corrupt its framing
+    clients, lock = {}, threading.Lock()
+
+    def relay(conn):
+        try:
+            while True:
+                data = conn.recv_bytes()
+                with lock:
+                    targets = list(clients.items())
+                for target, send_lock in targets:
+                    try:
+                        with send_lock:
+                            target.send_bytes(data)
+                    except (OSError, EOFError):
+                        with lock:
+                            clients.pop(target, None)
+        except (OSError, EOFError):
+            pass
+        finally:
+            with lock:
+                clients.pop(conn, None)
+            conn.close()
+
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception as e:  # failed handshake (e.g. wrong authkey)
+            log.warning("chat broker: rejected connection: %s", e)
+            continue
+        with lock:
+            clients[conn] = threading.Lock()
+        threading.Thread(target=relay, args=(conn,), daemon=True).start()
+
+
+def parse_address(value):
+    """'127.0.0.1:6390' -> ('127.0.0.1', 6390)."""
+    host, _, port = value.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+_broker = None
+_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _lock:
+            if _broker is None:
+                config = current_app.config
+                if config.get('CHAT_BROKER', 'memory') == 'socket':
+                    _broker = SocketBroker(
+                        parse_address(config['CHAT_BROKER_ADDRESS']), config['SECRET_KEY'].encode()
+                    )
+                else:
+                    _broker = MemoryBroker()
+    return _broker
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
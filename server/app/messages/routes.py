@@ -1,52 +1,36 @@
-import os
-import secrets
-from flask import Blueprint, jsonify, request, current_app, url_for
+import json
+import time
+from flask import Blueprint, Response, jsonify, request, current_app
 from flask_login import login_required, current_user
+from sqlalchemy import or_
 from app.models import User, Message
 from app import db
+from app.messages.pubsub import get_broker, user_channel
+from app.messages.conversations import inbox_page, mark_read, record_message, unread_for
+from app.pagination import page_args, paginated
 from werkzeug.datastructures import FileStorage
-import cloudinary.uploader # <-- Need this import
+from app.uploads.pipeline import stage, queue_upload, start as start_uploads
+from app.uploads.resumable import UploadError, claim as claim_upload
+from app.uploads.serving import file_url as upload_url
 
 # Define the blueprint
 messages_bp = Blueprint('messages', __name__)
 
-# --- Utility: File Saving (Updated for Cloudinary) ---
+# --- Utility: File Saving ---
 
 def save_message_file(file: FileStorage) -> str:
     """
-    Uploads file to Cloudinary if enabled,
-    otherwise saves locally in /static/uploads.
-    Returns the Cloudinary URL or the local filename.
+    Saves the file locally in /static/uploads and returns the local filename.
+    With Cloudinary enabled, the message is switched to the Cloudinary URL in
+    the background once the upload finishes (see uploads/pipeline.py).
     """
-    
-    # 1. Cloudinary Upload
-    if current_app.config.get("UPLOAD_PROVIDER") == "cloudinary":
-        # Check for file size or type limits before upload if needed
-        
-        upload_result = cloudinary.uploader.upload(
-            file,
-            folder="acadlinker/messages" # Use a dedicated folder for messages
-        )
-        return upload_result["secure_url"]  # Return Cloudinary URL
-
-    # 2. Local Storage Fallback
-    random_hex = secrets.token_hex(8)
-    _, f_ext = os.path.splitext(file.filename)
-    filename = random_hex + f_ext
-
-    upload_folder = os.path.join(current_app.root_path, "static/uploads")
-    os.makedirs(upload_folder, exist_ok=True)
-
-    path = os.path.join(upload_folder, filename)
-    file.save(path)
-
-    return filename # Return filename only for local storage
+    return stage(file)
 
 
 # --- Utility: Message Serialization ---
 
-def serialize_message(msg: Message):
-    """Converts a Message object into a serializable dictionary."""
+def serialize_message(msg: Message, viewer_id=None):
+    """Converts a Message object into a serializable dictionary (as seen by viewer_id, default the current user)."""
     file_url = None
     
     # Logic to generate file_url based on storage type (local vs. Cloudinary)
@@ -56,11 +40,7 @@ def serialize_message(msg: Message):
             file_url = msg.file_name
         # If local filename
         else:
-            file_url = url_for(
-                "static",
-                filename=f"uploads/{msg.file_name}",
-                _external=False
-            )
+            file_url = upload_url(msg.file_name)
 
     return {
         'id': msg.id,
@@ -70,7 +50,7 @@ def serialize_message(msg: Message):
         'timestamp': msg.timestamp.isoformat(), 
         'file_url': file_url,
         # Add this helper field
-        'is_sender': msg.sender_id == current_user.id 
+        'is_sender': msg.sender_id == (viewer_id if viewer_id is not None else current_user.id)
     }
 
 
@@ -97,7 +77,14 @@ def get_friends():
 @login_required
 def get_chat_history(user_id):
     """
-    Returns the message history between the current user and the specified friend.
+    Returns messages between the current user and the specified friend, oldest first.
+
+    - no arguments: the latest `limit` messages
+    - before_id: the `limit` messages before it (scrolling back)
+    - after_id: messages after it, up to `limit` (catching up)
+
+    `has_more` says whether more messages exist in that direction. Every
+    variant is one range scan of ix_message_conversation_id.
     """
     friend = User.query.get(user_id)
     if not friend:
@@ -106,11 +93,30 @@ def get_chat_history(user_id):
     if not current_user.friends.filter_by(id=friend.id).first():
         return jsonify({"error": "You can only chat with your friends."}), 403 
 
+    before_id = request.args.get('before_id', type=int)
+    after_id = request.args.get('after_id', type=int)
+    if before_id is not None and after_id is not None:
+        return jsonify({"error": "Use either before_id or after_id, not both."}), 400
+    limit = request.args.get('limit', current_app.config.get('CHAT_HISTORY_PAGE_SIZE', 50), type=int)
+    limit = max(1, min(limit, current_app.config.get('CHAT_REPLAY_LIMIT', 200)))
+
     # Fetch messages
-    msgs = Message.query.filter(
-        ((Message.sender_id == current_user.id) & (Message.receiver_id == friend.id)) |
-        ((Message.sender_id == friend.id) & (Message.receiver_id == current_user.id))
-    ).order_by(Message.timestamp.asc()).all()
+    query = Message.query.filter(Message.in_conversation(current_user.id, friend.id))
+    if after_id is not None:
+        msgs = query.filter(Message.id > after_id).order_by(Message.id.asc()).limit(limit + 1).all()
+        has_more = len(msgs) > limit
+        msgs = msgs[:limit]
+    else:
+        if before_id is not None:
+            query = query.filter(Message.id < before_id)
+        msgs = query.order_by(Message.id.desc()).limit(limit + 1).all()
+        has_more = len(msgs) > limit
+        msgs = msgs[:limit][::-1]
+
+    if before_id is None:
+        # Loading the newest messages means the conversation has been read
+        mark_read(current_user.id, friend.id)
+        db.session.commit()
 
     messages_data = [serialize_message(msg) for msg in msgs]
 
@@ -120,7 +126,8 @@ def get_chat_history(user_id):
         "username": getattr(friend, 'name', 'Unknown'), # Fix this line
         "profile_pic_url": getattr(friend, 'image_file', None)
     },
-    "messages": messages_data
+    "messages": messages_data,
+    "has_more": has_more
     }), 200
 
 ## 3. Send New Message (POST) - Uses updated file saving
@@ -141,12 +148,18 @@ def send_message(user_id):
     # Get data from request.form (for text content)
     content = request.form.get('content') 
     file_data = request.files.get('file') # From multipart form data
+    upload_token = request.form.get('upload') # Or a finalized resumable upload (large files)
 
-    if not content and not file_data:
+    if not content and not file_data and not upload_token:
         return jsonify({"error": "Message content or file is required."}), 400
 
     file_name_or_url = None
-    if file_data and file_data.filename != '':
+    if upload_token:
+        try:
+            file_name_or_url = claim_upload(upload_token, current_user.id, {'png', 'jpg', 'jpeg', 'pdf', 'doc', 'docx'})
+        except UploadError as e:
+            return jsonify({"error": str(e)}), 400
+    elif file_data and file_data.filename != '':
         # Simple file validation for messages (optional)
         allowed_extensions = {'png', 'jpg', 'jpeg', 'pdf', 'doc', 'docx'}
         if not ('.' in file_data.filename and file_data.filename.rsplit('.', 1)[1].lower() in allowed_extensions):
@@ -163,10 +176,181 @@ def send_message(user_id):
         sender_id=current_user.id,
         receiver_id=friend.id,
         content=content,
-        file_name=file_name_or_url # This stores EITHER the Cloudinary URL or the local filename
+        file_name=file_name_or_url # The local filename; swapped for the Cloudinary URL once uploaded
     )
     db.session.add(msg)
+    db.session.flush()  # assigns msg.id / timestamp for the conversation summary
+    record_message(msg)
+    upload = None
+    if file_name_or_url:
+        upload = queue_upload(
+            current_user.id, file_name_or_url, file_name_or_url, 'message.file_name', msg.id, "acadlinker/messages"
+        )
     db.session.commit()
+    publish_message(msg)
+    start_uploads(upload)
     
     # Return the new message using the updated serializer
-    return jsonify(serialize_message(msg)), 201
\ No newline at end of file
+    return jsonify({**serialize_message(msg), "upload_id": upload.id if upload else None}), 201
+
+
+## 6. Inbox (Chat Sidebar)
+@messages_bp.route('/inbox', methods=['GET'])
+@login_required
+def get_inbox():
+    """
+    The current user's conversations, most recent first, with the last message
+    and unread count. Paginated with ?cursor=&limit=; next cursor in X-Next-Cursor.
+    """
+    try:
+        position, limit = page_args()
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    rows, next_cursor = inbox_page(current_user.id, position, limit)
+    inbox = [{
+        "conversation_id": conversation.id,
+        "friend": {
+            "id": other.id,
+            "name": other.full_name,
+            "email": other.email,
+            "profile_image": other.profile_pic
+        },
+        "last_message": serialize_message(conversation.last_message) if conversation.last_message else None,
+        "last_timestamp": conversation.last_timestamp.isoformat(),
+        "unread": unread_for(conversation, current_user.id)
+    } for conversation, other in rows]
+
+    return paginated(jsonify(inbox), next_cursor), 200
+
+
+## 7. Mark Conversation Read
+@messages_bp.route('/read/<int:user_id>', methods=['POST'])
+@login_required
+def mark_conversation_read(user_id):
+    """Zero the unread count of the conversation with user_id (e.g. after a pushed message was shown)."""
+    mark_read(current_user.id, user_id)
+    db.session.commit()
+    return jsonify({"message": "Conversation marked as read"}), 200
+
+
+# --- Push delivery ---
+
+def publish_message(msg):
+    """Push a committed message to every open stream/poll of its sender and receiver."""
+    payload = serialize_message(msg, viewer_id=msg.sender_id)
+    broker = get_broker()
+    broker.publish(user_channel(msg.receiver_id), payload)
+    if msg.sender_id != msg.receiver_id:
+        broker.publish(user_channel(msg.sender_id), payload)  # the sender's other tabs
+
+
+def for_viewer(payload, user_id):
+    return {**payload, 'is_sender': payload['sender_id'] == user_id}
+
+
+def messages_after(user_id, after_id, limit):
+    """Messages to or from user_id with id > after_id, oldest first (a primary key range scan)."""
+    msgs = Message.query.filter(
+        Message.id > after_id,
+        or_(Message.sender_id == user_id, Message.receiver_id == user_id)
+    ).order_by(Message.id.asc()).limit(limit).all()
+    return [serialize_message(msg, viewer_id=user_id) for msg in msgs]
+
+
+def latest_message_id(user_id):
+    """Id of the newest message to or from user_id (0 if none): where to resume from."""
+    last_id = db.session.query(db.func.max(Message.id)).filter(
+        or_(Message.sender_id == user_id, Message.receiver_id == user_id)
+    ).scalar()
+    return last_id or 0
+
+
+def sse_event(payload):
+    return f"id: {payload['id']}\nevent: message\ndata: {json.dumps(payload)}\n\n"
+
+
+## 4. Stream New Messages (Server-Sent Events)
+@messages_bp.route('/stream', methods=['GET'])
+@login_required
+def stream_messages():
+    """
+    Server-Sent Events stream of every new message to or from the current user.
+    On reconnect the browser sends Last-Event-ID and missed messages are replayed
+    first. The stream ends after CHAT_STREAM_MAX_AGE seconds; EventSource reconnects.
+    """
+    user_id = current_user.id
+    config = current_app.config
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    if last_id is None:
+        last_id = request.args.get('after_id', type=int)
+
+    # Subscribe before reading the backlog so nothing committed in between is lost
+    subscription = get_broker().subscribe(user_channel(user_id))
+    if last_id is None:
+        # A fresh stream starts at the newest message; nothing to replay
+        last_id, backlog = latest_message_id(user_id), []
+    else:
+        backlog = messages_after(user_id, last_id, config.get('CHAT_REPLAY_LIMIT', 200))
+    db.session.close()  # don't hold a pooled connection for the life of the stream
+
+    heartbeat = config.get('CHAT_STREAM_HEARTBEAT', 15)
+    deadline = time.monotonic() + config.get('CHAT_STREAM_MAX_AGE', 300)
+
+    def events():
+        try:
+            # Set the browser's Last-Event-ID now, so even a reconnect before any
+            # message arrives (or after an idle CHAT_STREAM_MAX_AGE) replays what it missed
+            yield f"retry: 2000\nid: {last_id}\n\n"
+            replayed = set()
+            for payload in backlog:
+                replayed.add(payload['id'])
+                yield sse_event(payload)
+            while time.monotonic() < deadline:
+                item = subscription.get(timeout=heartbeat)
+                if item is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                _, payload = item
+                if payload['id'] not in replayed:
+                    yield sse_event(for_viewer(payload, user_id))
+        finally:
+            subscription.close()
+
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # let nginx pass events straight through
+    })
+
+
+## 5. Long-Poll for New Messages (fallback when EventSource is unavailable)
+@messages_bp.route('/poll', methods=['GET'])
+@login_required
+def poll_messages():
+    """
+    Returns messages with id > after_id at once if there are any, otherwise
+    waits up to `timeout` seconds (max CHAT_POLL_TIMEOUT) for the next one.
+    `last_id` is the after_id for the next poll; call without after_id to get
+    the starting point.
+    """
+    user_id = current_user.id
+    after_id = request.args.get('after_id', type=int)
+    if after_id is None:
+        return jsonify({"messages": [], "last_id": latest_message_id(user_id)}), 200
+
+    config = current_app.config
+    max_timeout = config.get('CHAT_POLL_TIMEOUT', 25)
+    timeout = max(0, min(request.args.get('timeout', max_timeout, type=float), max_timeout))
+
+    with get_broker().subscribe(user_channel(user_id)) as subscription:
+        messages = messages_after(user_id, after_id, config.get('CHAT_REPLAY_LIMIT', 200))
+        if not messages:
+            db.session.close()
+            item = subscription.get(timeout=timeout)
+            while item is not None:
+                messages.append(for_viewer(item[1], user_id))
+                item = subscription.get(timeout=0.05)  # collect a burst in one response
+
+    last_id = max([after_id] + [m['id'] for m in messages])
+    return jsonify({"messages": messages, "last_id": last_id}), 200
+
@@ -0,0 +1,183 @@
+"""
+Per-request SQL and latency instrumentation.
+
+Engine events count queries and DB time, Flask hooks time the whole request,
+and the JSON provider plus list serializers report serialization time. The
+totals are folded into per-endpoint histograms exposed at /api/_metrics in
+Prometheus text format. Histograms are per process: with several workers,
+scrape each one (or sum them in Prometheus).
+"""
+import threading
+import time
+from collections import defaultdict
+
+from flask import g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = defaultdict(lambda: [[0] * len(buckets), 0.0, 0])  # counts, sum, count
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, value):
+        with self._lock:
+            counts, _, _ = series = self._series[endpoint]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for endpoint, (counts, total, count) in sorted(self._series.items()):
+                label = f'endpoint="{endpoint}"'
+                for bound, n in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {n}')
+                lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+                lines.append(f'{self.name}_sum{{{label}}} {total}')
+                lines.append(f'{self.name}_count{{{label}}} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def inc(self, endpoint, status):
+        with self._lock:
+            self._values[(endpoint, status)] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for (endpoint, status), n in sorted(self._values.items()):
+                lines.append(f'{self.name}{{endpoint="{endpoint}",status="{status}"}} {n}')
+        return lines
+
+
+REQUESTS = Counter('acadlinker_requests_total', 'Requests handled, by endpoint and status.')
+WALL_TIME = Histogram('acadlinker_request_seconds', 'Wall time per request.', SECONDS_BUCKETS)
+DB_TIME = Histogram('acadlinker_request_db_seconds', 'Time spent executing SQL per request.', SECONDS_BUCKETS)
+SERIALIZE_TIME = Histogram(
+    'acadlinker_request_serialization_seconds', 'Time spent serializing responses per request.', SECONDS_BUCKETS
+)
+QUERIES = Histogram('acadlinker_request_queries', 'SQL statements executed per request.', QUERY_BUCKETS)
+
+METRICS = (REQUESTS, WALL_TIME, DB_TIME, SERIALIZE_TIME, QUERIES)
+
+
+class Gauge:
+    """A value read from `read()` at scrape time."""
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge",
+                f"{self.name} {self.read()}"]
+
+
+GAUGES = []
+
+
+def register_gauge(name, help_text, read):
+    GAUGES.append(Gauge(name, help_text, read))
+
+
+def render_metrics():
+    lines = []
+    for metric in (*METRICS, *GAUGES):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def record_serialization(seconds):
+    if has_request_context() and hasattr(g, 'metrics_start'):
+        g.metrics_serialize_time += seconds
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Default JSON provider that reports how long encoding responses takes."""
+
+    def dumps(self, obj, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            record_serialization(time.perf_counter() - start)
+
+
+# The start time lives on the statement's execution context, not the pooled
+# connection: a statement that raises never reaches after_cursor_execute, and its
+# context is simply discarded instead of leaving an entry behind.
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.metrics_query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, 'metrics_query_start', None)
+    if start is None or not has_request_context() or not hasattr(g, 'metrics_start'):
+        return
+    elapsed = time.perf_counter() - start
+
+    g.metrics_queries += 1
+    g.metrics_db_time += elapsed
+    if g.metrics_statements is not None:
+        g.metrics_statements.append((elapsed, statement))
+
+
+def init_metrics(app):
+    app.json = TimedJSONProvider(app)
+    slow_ms = app.config.get('SLOW_REQUEST_MS')
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_db_time = 0.0
+        g.metrics_serialize_time = 0.0
+        g.metrics_statements = [] if slow_ms else None
+
+    @app.after_request
+    def record_request_metrics(response):
+        if not hasattr(g, 'metrics_start'):
+            return response
+
+        wall = time.perf_counter() - g.metrics_start
+        endpoint = request.endpoint or 'unmatched'
+
+        REQUESTS.inc(endpoint, response.status_code)
+        WALL_TIME.observe(endpoint, wall)
+        DB_TIME.observe(endpoint, g.metrics_db_time)
+        SERIALIZE_TIME.observe(endpoint, g.metrics_serialize_time)
+        QUERIES.observe(endpoint, g.metrics_queries)
+
+        if slow_ms and wall * 1000 >= slow_ms:
+            slowest = sorted(g.metrics_statements, key=lambda s: s[0], reverse=True)[:10]
+            app.logger.warning(
+                "Slow request %s %s (%s): %.0f ms, %d queries, %.0f ms in DB\n%s",
+                request.method, request.path, endpoint, wall * 1000,
+                g.metrics_queries, g.metrics_db_time * 1000,
+                "\n".join(f"  {elapsed * 1000:.1f} ms  {statement}" for elapsed, statement in slowest)
+            )
+
+        return response
@@ -0,0 +1,10 @@
+from flask import Blueprint, Response
+from app.metrics.instrumentation import render_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/_metrics', methods=['GET'])
+def metrics():
+    """Per-endpoint request metrics for Prometheus to scrape."""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
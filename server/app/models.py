@@ -22,6 +22,49 @@ class Message(db.Model):
     file_name = db.Column(db.String(120))
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Conversation key: the two participants in id order, set on insert
+    low_user_id = db.Column(db.Integer)
+    high_user_id = db.Column(db.Integer)
+
+    __table_args__ = (
+        # One conversation, in id order: WHERE low_user_id = ? AND high_user_id = ? AND id > ?
+        db.Index('ix_message_conversation_id', 'low_user_id', 'high_user_id', 'id'),
+    )
+
+    @staticmethod
+    def conversation_key(user_id, other_id):
+        return min(user_id, other_id), max(user_id, other_id)
+
+    @classmethod
+    def in_conversation(cls, user_id, other_id):
+        low, high = cls.conversation_key(user_id, other_id)
+        return (cls.low_user_id == low) & (cls.high_user_id == high)
+
+
+class Conversation(db.Model):
+    """One row per pair of users who have exchanged messages: the chat inbox, kept up to date by send_message."""
+    id = db.Column(db.Integer, primary_key=True)
+    low_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    high_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    last_message_id = db.Column(db.Integer, db.ForeignKey('message.id'))
+    last_timestamp = db.Column(db.DateTime, nullable=False)
+    low_unread = db.Column(db.Integer, nullable=False, default=0)   # unread by low_user_id
+    high_unread = db.Column(db.Integer, nullable=False, default=0)  # unread by high_user_id
+
+    last_message = db.relationship('Message')
+
+    __table_args__ = (
+        db.UniqueConstraint('low_user_id', 'high_user_id', name='uq_conversation_users'),
+        # A user's inbox, newest first, is a range scan of one of these (they may be either participant)
+        db.Index('ix_conversation_low_recent', 'low_user_id', 'last_timestamp', 'id'),
+        db.Index('ix_conversation_high_recent', 'high_user_id', 'last_timestamp', 'id'),
+    )
+
+
+@db.event.listens_for(Message, 'before_insert')
+def _set_conversation_key(mapper, connection, message):
+    message.low_user_id, message.high_user_id = Message.conversation_key(message.sender_id, message.receiver_id)
+
 
 class Group(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -52,9 +95,38 @@ class Post(db.Model):
 
     user = db.relationship('User', backref=db.backref('posts', lazy='dynamic'))
 
+    __table_args__ = (
+        # Keyset pagination of a user's posts: WHERE user_id = ? AND (timestamp, id) < (?, ?)
+        db.Index('ix_post_user_timestamp_id', 'user_id', 'timestamp', 'id'),
+    )
+
 from app import db
 from datetime import datetime
 
+class TimelineEntry(db.Model):
+    """A post pushed into one user's home feed when it was written (fan-out on write)."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
+    author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'post_id', name='uq_timeline_entry_user_post'),
+        # Feed reads: WHERE user_id = ? AND (timestamp, post_id) < (?, ?)
+        db.Index('ix_timeline_entry_user_timestamp_post', 'user_id', 'timestamp', 'post_id'),
+        # Pruning on unfriend: WHERE user_id = ? AND author_id = ?
+        db.Index('ix_timeline_entry_user_author', 'user_id', 'author_id'),
+    )
+
+class Counter(db.Model):
+    """
+    Named integer counters, e.g. 'feed:12' (cache version of user 12's feed).
+    Bumped with an upsert by app.caching; one primary-key read to check.
+    """
+    key = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -62,10 +134,84 @@ class Notification(db.Model):
     link = db.Column(db.String(255))
     is_read = db.Column(db.Boolean, default=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # Grouping (see notifications/grouping.py): kind of event and how many were folded into this row
+    kind = db.Column(db.String(32))
+    actor_count = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     user = db.relationship('User', backref=db.backref('notifications', lazy='dynamic'))
 
+    __table_args__ = (
+        # Finding the open group for (user, kind, link) when coalescing
+        db.Index('ix_notification_user_kind_link', 'user_id', 'kind', 'link'),
+        # Keyset pagination of a user's notifications, newest first
+        db.Index('ix_notification_user_timestamp_id', 'user_id', 'timestamp', 'id'),
+    )
+
+
+class Suggestion(db.Model):
+    """Top-k friend suggestions per user, materialized by `flask compute-suggestions`."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    suggested_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
+    __table_args__ = (
+        db.Index('ix_suggestion_user_score', 'user_id', 'score'),
+    )
+
+
+class Upload(db.Model):
+    """
+    A file staged locally and pushed to the upload provider in the background
+    (see uploads/pipeline.py). `target`.`target_id` holds `placeholder` until
+    the worker replaces it with the provider's `url`.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='pending')  # pending / uploading / done / failed
+    target = db.Column(db.String(32), nullable=False)  # e.g. 'post.file_name'
+    target_id = db.Column(db.Integer, nullable=False)
+    staged_name = db.Column(db.String(300))  # under static/uploads; cleared once pruned
+    placeholder = db.Column(db.String(500), nullable=False)
+    folder = db.Column(db.String(100), nullable=False)
+    resource_type = db.Column(db.String(16), nullable=False, default='auto')
+    url = db.Column(db.String(500))
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Resuming stuck uploads and pruning finished ones: WHERE status = ? AND updated_at < ?
+        db.Index('ix_upload_status_updated', 'status', 'updated_at'),
+    )
+
+
+class StoredFile(db.Model):
+    """A content-addressed file under static/uploads and how many rows use it (see uploads/storage.py)."""
+    path = db.Column(db.String(300), primary_key=True)  # ab/cd/<sha256><ext>
+    size = db.Column(db.BigInteger)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Garbage collection: WHERE refcount <= 0 AND updated_at < ?
+        db.Index('ix_stored_file_refcount_updated', 'refcount', 'updated_at'),
+    )
+
+
+class UploadSession(db.Model):
+    """A chunked, resumable upload in progress (see uploads/resumable.py)."""
+    id = db.Column(db.String(32), primary_key=True)  # unguessable token
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    chunk_size = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='open')  # open / (assembling) / complete / used
+    staged_name = db.Column(db.String(300))  # under static/uploads once finalized
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
 
 @login_manager.user_loader
@@ -85,6 +231,9 @@ class User(db.Model, UserMixin):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     skills = db.Column(db.String(255))
     education = db.Column(db.Text)
+    # Set once a user has too many friends to fan their posts out on write;
+    # their friends' feeds pull those posts at read time instead.
+    fanout_disabled = db.Column(db.Boolean, default=False, nullable=False)
 
     sent_requests = db.relationship(
         'FriendRequest',
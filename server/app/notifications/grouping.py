@@ -0,0 +1,73 @@
+"""
+Write-time coalescing of notifications.
+
+Notifications of a groupable kind for the same (user, kind, link) that
+arrive within NOTIFICATION_GROUP_WINDOW seconds of the group's latest one,
+while it is still unread, are folded into a single row:
+"Priya and 49 others sent you a friend request." The row's timestamp moves
+to the newest event, so the group surfaces again at the top.
+"""
+from app.models import Notification
+
+# kind -> message once more than one actor is grouped
+GROUP_MESSAGES = {
+    'friend_request': "{actor} and {others} sent you a friend request.",
+    'friend_accept': "{actor} and {others} accepted your friend request.",
+}
+
+
+def group_message(kind, actor, count):
+    others = "1 other" if count == 2 else f"{count - 1} others"
+    return GROUP_MESSAGES[kind].format(actor=actor, others=others)
+
+
+def coalesce(rows, window):
+    """
+    Merge groupable rows with each other and into existing unread rows
+    (updated in the session). Returns the rows still to insert.
+    """
+    insert, groups = [], {}
+    for row in rows:
+        if not window or row['kind'] not in GROUP_MESSAGES:
+            insert.append(row)
+            continue
+        key = (row['user_id'], row['kind'], row['link'])
+        group = groups.get(key)
+        if group is None or row['timestamp'] - group['timestamp'] > window:
+            if group is not None:
+                insert.append(group)
+            groups[key] = {**row, 'actor_count': 1}
+        else:
+            group['actor_count'] += 1
+            group['actor'] = row['actor']
+            group['timestamp'] = row['timestamp']
+    if not groups:
+        return insert
+
+    # The newest unread row per key, if recent enough, absorbs the group
+    earliest = min(g['timestamp'] for g in groups.values()) - window
+    existing = Notification.query.filter(
+        Notification.user_id.in_({user_id for user_id, _, _ in groups}),
+        Notification.kind.in_({kind for _, kind, _ in groups}),
+        Notification.is_read.is_(False),
+        Notification.timestamp >= earliest
+    ).order_by(Notification.timestamp.desc()).all()
+
+    merged = set()
+    for notif in existing:
+        key = (notif.user_id, notif.kind, notif.link)
+        group = groups.get(key)
+        if group is None or key in merged or group['timestamp'] - notif.timestamp > window:
+            continue
+        merged.add(key)
+        notif.actor_count += group['actor_count']
+        notif.timestamp = group['timestamp']
+        notif.message = group_message(notif.kind, group['actor'], notif.actor_count)
+
+    for key, group in groups.items():
+        if key in merged:
+            continue
+        if group['actor_count'] > 1:
+            group['message'] = group_message(group['kind'], group['actor'], group['actor_count'])
+        insert.append(group)
+    return insert
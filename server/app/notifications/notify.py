@@ -1,16 +1,10 @@
-from app import db
-from app.models import Notification
+from app.notifications.outbox import enqueue, new_row
 
-def notify(user_id, message, link="/"): # Pass user_id instead of user object for flexibility
+def notify(user_id, message, link="/", kind=None, actor=None): # Pass user_id instead of user object for flexibility
     """
     Utility function to create a notification.
+    Queued and written in the background (see outbox.py), so it never waits on the database.
+    Notifications with a `kind` listed in grouping.py are grouped per (user, kind, link);
+    `actor` is the name shown in the grouped message.
     """
-    notif = Notification(
-        user_id=user_id,
-        message=message,
-        link=link,
-        is_read=False
-    )
-    db.session.add(notif)
-    db.session.commit()
-    return notif
\ No newline at end of file
+    enqueue(new_row(user_id, message, link, kind, actor))
@@ -0,0 +1,170 @@
+"""
+Notification outbox: notify() enqueues, a background thread writes.
+
+Request handlers put notifications on a bounded in-process queue and return.
+One worker thread per process drains it, inserting everything that arrived
+within NOTIFICATION_FLUSH_INTERVAL (up to NOTIFICATION_BATCH_SIZE rows) in a
+single bulk INSERT and commit. When the queue is full, enqueue waits at most
+NOTIFICATION_ENQUEUE_TIMEOUT seconds for room and then drops the
+notification (counted in acadlinker_notifications_dropped). On interpreter
+exit the queue is flushed.
+
+NOTIFICATION_OUTBOX = "sync" writes inline instead, for environments where
+background threads do not outlive the request (serverless) and for
+debugging.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert
+
+from app import db
+from app.caching import bump
+from app.metrics.instrumentation import register_gauge
+from app.models import Notification
+from app.notifications import unread
+from app.notifications.grouping import coalesce
+
+log = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+COLUMNS = ('user_id', 'message', 'link', 'is_read', 'timestamp', 'kind', 'actor_count')
+
+
+def write_batch(rows, group_window=0):
+    """
+    Insert queued notifications, folding groupable ones into open groups, and
+    update their users' unread counts and cache versions (caller commits).
+    """
+    # Everyone gets a new version, including users whose rows were folded into a group
+    user_ids = {row['user_id'] for row in rows}
+    rows = coalesce(rows, group_window)
+    if rows:
+        db.session.execute(insert(Notification), [{c: row[c] for c in COLUMNS} for row in rows])
+        # Rows folded into an open group were already unread; only new rows count
+        unread.added(rows)
+    bump('notifications', *user_ids)
+
+
+class NotificationOutbox:
+    def __init__(self, app):
+        config = app.config
+        self.app = app
+        self.batch_size = config.get('NOTIFICATION_BATCH_SIZE', 500)
+        self.flush_interval = config.get('NOTIFICATION_FLUSH_INTERVAL', 0.05)
+        self.enqueue_timeout = config.get('NOTIFICATION_ENQUEUE_TIMEOUT', 0.05)
+        self.queue = queue.Queue(maxsize=config.get('NOTIFICATION_QUEUE_SIZE', 10000))
+        self.dropped = 0
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_worker(self):
+        # Started on first use, so a worker forked from a preloaded app gets its own thread
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='notification-outbox', daemon=True)
+                self._thread.start()
+
+    def enqueue(self, row):
+        self._ensure_worker()
+        try:
+            self.queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self.dropped += 1
+            log.warning("notification outbox full; dropped notification for user %s", row['user_id'])
+
+    def _run(self):
+        while True:
+            row = self.queue.get()
+            if row is _STOP:
+                return
+            batch, stop = [row], False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    row = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stop = True
+                    break
+                batch.append(row)
+            self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch):
+        with self.app.app_context():
+            try:
+                write_batch(batch, group_window())
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                log.exception("failed to write %d notifications", len(batch))
+
+    def close(self, timeout=5.0):
+        """Write everything still queued, then stop the worker."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self.queue.put(_STOP)
+        self._thread.join(timeout)
+
+
+_outbox = None
+
+
+def init_outbox(app):
+    global _outbox
+    if app.config.get('NOTIFICATION_OUTBOX', 'async') == 'async':
+        _outbox = NotificationOutbox(app)
+        atexit.register(_outbox.close)
+    else:
+        _outbox = None
+
+
+def enqueue(row):
+    """Queue one notification row, or write it now when the outbox is disabled."""
+    if _outbox is not None:
+        _outbox.enqueue(row)
+        return
+    write_batch([row], group_window())
+    db.session.commit()
+
+
+def group_window():
+    return timedelta(seconds=current_app.config.get('NOTIFICATION_GROUP_WINDOW', 3600))
+
+
+def new_row(user_id, message, link, kind=None, actor=None):
+    return {
+        'user_id': user_id,
+        'message': message,
+        'link': link,
+        'is_read': False,
+        'timestamp': datetime.utcnow(),
+        'kind': kind,
+        'actor': actor,
+        'actor_count': 1,
+    }
+
+
+register_gauge(
+    'acadlinker_notifications_pending', 'Notifications queued in the outbox, not yet written.',
+    lambda: _outbox.queue.qsize() if _outbox is not None else 0
+)
+register_gauge(
+    'acadlinker_notifications_dropped', 'Notifications dropped because the outbox queue was full.',
+    lambda: _outbox.dropped if _outbox is not None else 0
+)
@@ -1,18 +1,30 @@
 from flask import Blueprint, jsonify, request # Added request
 from flask_login import login_required, current_user
 from app import db
+from app.caching import bump, conditional, counter_key
 from app.models import Notification
+from app.notifications import unread
+from app.pagination import page_args, keyset_page, paginated
 
 notifications_bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
 
-# 1. Get All Notifications
+# 1. Get Notifications (newest first, paginated)
 @notifications_bp.route('/', methods=['GET'])
 @login_required
+@conditional(lambda: ([counter_key('notifications', current_user.id)],))
 def get_notifications():
-    notifications = (
-        Notification.query.filter_by(user_id=current_user.id)
-        .order_by(Notification.timestamp.desc())
-        .all()
+    """
+    Pass ?cursor=<X-Next-Cursor of the previous page>&limit=N for the next page.
+    A pure read: acknowledge what was shown with POST /read.
+    """
+    try:
+        position, limit = page_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    notifications, next_cursor = keyset_page(
+        Notification.query.filter_by(user_id=current_user.id),
+        Notification.timestamp, Notification.id, position, limit
     )
 
     data = [
@@ -22,22 +34,20 @@ def get_notifications():
             "link": n.link,
             "is_read": n.is_read,
             "timestamp": n.timestamp.isoformat(),
+            "kind": n.kind,
+            "count": n.actor_count,
         }
         for n in notifications
     ]
-
-    # Optimized: Mark all as read in one query instead of a loop
-    Notification.query.filter_by(user_id=current_user.id, is_read=False).update({"is_read": True})
-    db.session.commit()
-
-    return jsonify(data), 200
+    return paginated(jsonify(data), next_cursor), 200
 
 # 2. Get Unread Count (For Navbar Badge)
 @notifications_bp.route('/unread_count', methods=['GET'])
 @login_required
+@conditional(lambda: ([counter_key('notifications', current_user.id)],))
 def get_unread_count():
-    count = Notification.query.filter_by(user_id=current_user.id, is_read=False).count()
-    return jsonify({"unread_count": count}), 200
+    # Counter maintained on write (see unread.py): a single primary-key read
+    return jsonify({"unread_count": unread.get(current_user.id)}), 200
 
 # 3. Mark Single as Read
 @notifications_bp.route('/mark_read/<int:notification_id>', methods=['PATCH']) # Changed to PATCH (semantic)
@@ -47,7 +57,12 @@ def mark_as_read(notification_id):
     if notif.user_id != current_user.id:
         return jsonify({"error": "Unauthorized"}), 403
 
-    notif.is_read = True
+    # Conditional update, so two tabs marking the same notification decrement once
+    marked = Notification.query.filter_by(id=notif.id, is_read=False).update(
+        {"is_read": True}, synchronize_session=False
+    )
+    unread.adjust({current_user.id: -marked})
+    bump('notifications', current_user.id)
     db.session.commit()
     return jsonify({"message": "Read"}), 200
 
@@ -59,6 +74,35 @@ def delete_notification(notification_id):
     if notif.user_id != current_user.id:
         return jsonify({"error": "Unauthorized"}), 403
 
-    db.session.delete(notif)
+    # Delete it as unread first: only the request that removed an unread row decrements
+    deleted_unread = Notification.query.filter_by(id=notif.id, is_read=False).delete(synchronize_session=False)
+    unread.adjust({current_user.id: -deleted_unread})
+    Notification.query.filter_by(id=notif.id).delete(synchronize_session=False)
+    bump('notifications', current_user.id)
+    db.session.commit()
+    return jsonify({"message": "Deleted"}), 200
+
+# 5. Mark Many as Read (batched acknowledgement)
+@notifications_bp.route('/read', methods=['POST'])
+@login_required
+def mark_many_read():
+    """
+    JSON body {"up_to_id": N} marks every unread notification with id <= N
+    (the high-water mark of what the client has shown); add "from_id": M to
+    limit it to the range M..N. One UPDATE however many rows it covers.
+    """
+    data = request.get_json(silent=True) or {}
+    up_to_id, from_id = data.get('up_to_id'), data.get('from_id', 0)
+    if not isinstance(up_to_id, int) or not isinstance(from_id, int):
+        return jsonify({"error": "up_to_id (and optional from_id) must be integers"}), 400
+
+    marked = Notification.query.filter(
+        Notification.user_id == current_user.id,
+        Notification.is_read.is_(False),
+        Notification.id.between(from_id, up_to_id)
+    ).update({"is_read": True}, synchronize_session=False)
+    if marked:
+        unread.adjust({current_user.id: -marked})
+        bump('notifications', current_user.id)
     db.session.commit()
-    return jsonify({"message": "Deleted"}), 200
\ No newline at end of file
+    return jsonify({"marked": marked, "unread_count": unread.get(current_user.id)}), 200
@@ -0,0 +1,75 @@
+"""
+Per-user unread notification counts, kept in the counter table.
+
+Every write that changes how many unread rows a user has adjusts their
+`unread_notifications:<id>` counter in the same transaction, so the navbar
+badge is a primary-key read instead of a COUNT over the notification table.
+`flask reconcile-unread-counts` (run it from cron) repairs any drift.
+"""
+from collections import Counter as Tally, defaultdict
+
+from sqlalchemy import func
+
+from app import db
+from app import caching
+from app.models import Counter, Notification, User
+
+SCOPE = 'unread_notifications'
+
+
+def key(user_id):
+    return caching.counter_key(SCOPE, user_id)
+
+
+def get(user_id):
+    # Drift can only be corrected by reconciliation; never show a negative badge
+    return max(0, caching.get([key(user_id)])[0])
+
+
+def adjust(deltas):
+    """Apply {user_id: delta}, one statement per distinct delta."""
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(key(user_id))
+    for delta, keys in by_delta.items():
+        caching.add(keys, delta)
+
+
+def added(rows):
+    """Count newly inserted notification rows."""
+    adjust(Tally(row['user_id'] for row in rows if not row['is_read']))
+
+
+def reconcile(chunk_size=1000):
+    """
+    Recount unread notifications and correct every counter that drifted.
+    Commits per chunk of users; returns how many counters were fixed.
+    """
+    fixed, last_id = 0, 0
+    while True:
+        user_ids = [u for (u,) in db.session.query(User.id).filter(User.id > last_id)
+                    .order_by(User.id).limit(chunk_size)]
+        if not user_ids:
+            return fixed
+        last_id = user_ids[-1]
+        keys = {key(u): u for u in user_ids}
+
+        # Lock existing counters so concurrent writers wait for the recount (no-op on SQLite)
+        current = dict(
+            db.session.query(Counter.key, Counter.value)
+            .filter(Counter.key.in_(keys)).with_for_update()
+        )
+        actual = dict(
+            db.session.query(Notification.user_id, func.count())
+            .filter(Notification.user_id.in_(user_ids), Notification.is_read.is_(False))
+            .group_by(Notification.user_id)
+        )
+        deltas = {u: actual.get(u, 0) - current.get(k, 0) for k, u in keys.items()}
+        adjust(deltas)
+        drifted = [u for u, delta in deltas.items() if delta]
+        if drifted:
+            # The badge is served with an ETag on the notifications version
+            caching.bump('notifications', *drifted)
+        fixed += len(drifted)
+        db.session.commit()
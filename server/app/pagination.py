@@ -0,0 +1,72 @@
+import base64
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(timestamp, row_id):
+    """Opaque cursor for the (timestamp, id) position of the last row on a page."""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.split('|')
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def page_args():
+    """
+    Read `cursor` and `limit` from the query string.
+    Returns (position or None, limit); raises ValueError on a bad cursor.
+    """
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    cursor = request.args.get('cursor')
+    return (decode_cursor(cursor) if cursor else None), limit
+
+
+def search_page_args():
+    """`limit` (default 20, max 100) and `offset` from the query string, for relevance-ranked results."""
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE)), max(0, offset)
+
+
+def keyset_page(query, timestamp_col, id_col, position, limit):
+    """
+    Newest-first page of `query` starting after `position` (a decoded cursor).
+
+    Seeks with a (timestamp, id) row comparison instead of OFFSET, so with an
+    index ending in (timestamp, id) every page costs the same as the first.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if position is not None:
+        query = query.filter(tuple_(timestamp_col, id_col) < position)
+
+    rows = query.order_by(timestamp_col.desc(), id_col.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_col.key), getattr(last, id_col.key))
+
+    return rows, next_cursor
+
+
+def paginated(response, next_cursor):
+    """Attach the next page's cursor as a header, keeping list bodies unchanged for the client."""
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
@@ -1,16 +1,23 @@
-import os
-import secrets
-from flask import Blueprint, jsonify, request, current_app, url_for
+from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 from app import db
+from app.caching import conditional, counter_key
 from app.models import Post, User
-import cloudinary.uploader
+from app.pagination import page_args, keyset_page, paginated, encode_cursor
+from app.posts.timeline import fan_out, read_timeline
+from app.search.backend import index_post
+from app.serializers import serializer
+from app.uploads.pipeline import stage, queue_upload, start as start_uploads
+from app.uploads.resumable import UploadError, claim as claim_upload
+from app.uploads.derivatives import image_urls, schedule as schedule_variants
+from app.uploads.serving import file_url
 
 # --- BLUEPRINT ---
 # The /api prefix is now part of the blueprint for all post routes
 posts_bp = Blueprint('posts', __name__)
 
 
+@serializer(Post, joined=('user',))
 def serialize_post(post):
     """Converts a Post object into a serializable dictionary."""
 
@@ -20,24 +27,22 @@ def serialize_post(post):
     if post.file_name and post.file_name.startswith("http"):
         image_url = post.file_name
 
-    # If local file → build static path
+    # If local file → served by the uploads blueprint (see uploads/serving.py)
     elif post.file_name:
-        image_url = url_for(
-            "static",
-            filename=f"uploads/{post.file_name}",
-            _external=False
-        )
+        image_url = file_url(post.file_name)
 
     return {
         "id": post.id,
         "title": post.title,
         "description": post.description,
         "file_url": image_url,
+        "file_urls": image_urls(post.file_name),  # resized WebP variants, if an image
         "date_posted": post.timestamp.isoformat(),
         "user": {
             "id": post.user.id,
             "name": post.user.full_name,
-            "profile_pic": getattr(post.user, "profile_pic", None)
+            "profile_pic": getattr(post.user, "profile_pic", None),
+            "profile_pic_urls": image_urls(getattr(post.user, "profile_pic", None), external=True)
         }
     }
 
@@ -47,30 +52,11 @@ def serialize_post(post):
 
 def save_post_file(file):
     """
-    Uploads file to Cloudinary if enabled,
-    otherwise saves locally in /static/uploads.
+    Saves the file locally in /static/uploads and returns its filename.
+    With Cloudinary enabled, the post is switched to the Cloudinary URL in the
+    background once the upload finishes (see uploads/pipeline.py).
     """
-
-    # If CLOUDINARY mode ON → upload there
-    if current_app.config.get("UPLOAD_PROVIDER") == "cloudinary":
-        upload_result = cloudinary.uploader.upload(
-            file,
-            folder="acadlinker/posts"
-        )
-        return upload_result["secure_url"]   # return Cloudinary URL
-
-    # Otherwise → LOCAL STORAGE fallback
-    random_hex = secrets.token_hex(8)
-    _, f_ext = os.path.splitext(file.filename)
-    filename = random_hex + f_ext
-
-    upload_folder = os.path.join(current_app.root_path, "static/uploads")
-    os.makedirs(upload_folder, exist_ok=True)
-
-    path = os.path.join(upload_folder, filename)
-    file.save(path)
-
-    return filename   # return filename only
+    return stage(file)
 
 
 
@@ -90,7 +76,13 @@ def create_post():
 
     # 2. Get file data from request.files
     file_name = None
-    if 'file' in request.files and request.files['file'].filename != '':
+    if request.form.get('upload'):
+        # A finalized resumable upload (large files)
+        try:
+            file_name = claim_upload(request.form['upload'], current_user.id, {'png', 'jpg', 'jpeg'})
+        except UploadError as e:
+            return jsonify({"error": str(e)}), 400
+    elif 'file' in request.files and request.files['file'].filename != '':
         file = request.files['file']
         
         # Simple validation for images
@@ -110,12 +102,21 @@ def create_post():
         # e.g., posts = db.relationship('Post', backref='author', lazy=True)
     )
     db.session.add(post)
+    db.session.flush()  # assigns post.id for the timeline entries
+    fan_out(post)
+    index_post(post)
+    upload = None
+    if file_name:
+        upload = queue_upload(current_user.id, file_name, file_name, 'post.file_name', post.id, "acadlinker/posts")
     db.session.commit()
+    start_uploads(upload)
+    schedule_variants(file_name)
 
     # Return the new post as JSON
     return jsonify({
         "message": "Post created!",
-        "post": serialize_post(post) # Send the new post back
+        "post": serialize_post(post), # Send the new post back
+        "upload_id": upload.id if upload else None
     }), 201 # 201 = Created
 
 
@@ -124,34 +125,47 @@ def create_post():
 @login_required
 def user_posts():
     """
-    Returns a list of all posts made by the current user.
+    Returns a page of posts made by the current user, newest first.
+    Pass ?cursor=<X-Next-Cursor of the previous page>&limit=N for the next page.
     """
-    posts = Post.query.filter_by(user_id=current_user.id).order_by(Post.timestamp.desc()).all()
+    try:
+        position, limit = page_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    posts, next_cursor = keyset_page(
+        serialize_post.eager(Post.query.filter_by(user_id=current_user.id)),
+        Post.timestamp, Post.id, position, limit
+    )
     
     # Serialize the list of posts
-    serialized_posts = [serialize_post(post) for post in posts]
+    serialized_posts = serialize_post.many(posts)
     
-    return jsonify(serialized_posts), 200
+    return paginated(jsonify(serialized_posts), next_cursor), 200
 
 
 # --- API ROUTE: GET HOME FEED ---
 @posts_bp.route('/home', methods=['GET'])
 @login_required
+@conditional(lambda: ([counter_key('feed', current_user.id), 'feed_pull'],))
 def home_feed():
     """
-    Returns a list of posts from the user's friends.
+    Returns a page of posts from the user's friends, newest first.
+    Pass ?cursor=<X-Next-Cursor of the previous page>&limit=N for the next page.
     """
-    # Assumes current_user.friends is a list of User objects
-    friend_ids = [f.id for f in current_user.friends]
-    
-    # Add user's own ID to the list to see their own posts in the feed
-    friend_ids.append(current_user.id) 
+    try:
+        position, limit = page_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    posts = Post.query.filter(
-        Post.user_id.in_(friend_ids)
-    ).order_by(Post.timestamp.desc()).all()
-    
-    serialized_posts = [serialize_post(post) for post in posts]
-    print(serialized_posts)
+    # Own + friends' posts were pushed into the timeline when written
+    post_ids, last = read_timeline(current_user.id, position, limit)
+
+    posts_by_id = {
+        p.id: p for p in serialize_post.eager(Post.query.filter(Post.id.in_(post_ids))).all()
+    }
+    posts = [posts_by_id[i] for i in post_ids if i in posts_by_id]
+    next_cursor = encode_cursor(*last) if last else None
     
-    return jsonify(serialized_posts), 200
\ No newline at end of file
+    serialized_posts = serialize_post.many(posts)
+    return paginated(jsonify(serialized_posts), next_cursor), 200
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Fan-out-on-write home feed.
+
+When a post is created it is pushed as a TimelineEntry into the author's own
+timeline and every friend's. Users with more than FEED_FANOUT_LIMIT friends
+are flagged `fanout_disabled`: their posts are not pushed, and readers pull
+them at read time instead (hybrid push/pull), so one post never costs
+thousands of inserts.
+"""
+import heapq
+
+from flask import current_app
+from sqlalchemy import and_, delete, exists, func, insert, literal, select, tuple_
+
+from app import db, caching
+from app.models import Post, TimelineEntry, User, friendships
+
+TIMELINE_COLUMNS = ['user_id', 'post_id', 'author_id', 'timestamp']
+
+
+def fanout_limit():
+    return current_app.config.get('FEED_FANOUT_LIMIT', 1000)
+
+
+def friend_count(user_id):
+    return db.session.query(func.count()).select_from(friendships).filter(
+        friendships.c.user_id == user_id
+    ).scalar()
+
+
+def fan_out(post):
+    """Push a new (flushed) post into its author's timeline and, unless they pull, their friends'."""
+    rows = select(literal(post.user_id), literal(post.id), literal(post.user_id), literal(post.timestamp))
+
+    author = db.session.get(User, post.user_id)
+    if not author.fanout_disabled:
+        friends = select(
+            friendships.c.friend_id, literal(post.id), literal(post.user_id), literal(post.timestamp)
+        ).where(
+            friendships.c.user_id == post.user_id,
+            friendships.c.friend_id != post.user_id
+        ).distinct()
+        rows = rows.union(friends)
+        caching.bump_friends_of('feed', post.user_id)
+    else:
+        caching.bump('feed_pull')  # every feed may merge this author's posts in
+
+    caching.bump('feed', post.user_id)
+    db.session.execute(insert(TimelineEntry).from_select(TIMELINE_COLUMNS, rows))
+
+
+def backfill(user_id, author_id, limit=None):
+    """Copy an author's most recent posts into a new friend's timeline."""
+    # The feed changes either way: backfilled here, or pulled at read time from now on
+    caching.bump('feed', user_id)
+    author = db.session.get(User, author_id)
+    if author.fanout_disabled:
+        return  # pulled at read time anyway
+
+    limit = limit or current_app.config.get('FEED_BACKFILL_LIMIT', 100)
+    already = exists().where(and_(
+        TimelineEntry.user_id == user_id,
+        TimelineEntry.post_id == Post.id
+    ))
+    recent = (
+        select(literal(user_id), Post.id, Post.user_id, Post.timestamp)
+        .where(Post.user_id == author_id, ~already)
+        .order_by(Post.timestamp.desc(), Post.id.desc())
+        .limit(limit)
+    )
+    db.session.execute(insert(TimelineEntry).from_select(TIMELINE_COLUMNS, recent))
+
+
+def prune(user_id, author_id):
+    """Remove an ex-friend's posts from a user's timeline."""
+    db.session.execute(delete(TimelineEntry).where(
+        TimelineEntry.user_id == user_id,
+        TimelineEntry.author_id == author_id
+    ))
+    caching.bump('feed', user_id)
+
+
+def update_fanout_mode(user):
+    """Switch a user to pull mode once they pass the fan-out limit (one way, so feeds never lose posts)."""
+    if not user.fanout_disabled and friend_count(user.id) > fanout_limit():
+        user.fanout_disabled = True
+
+
+def on_friendship_added(user, friend):
+    for a, b in ((user, friend), (friend, user)):
+        update_fanout_mode(a)
+        backfill(a.id, b.id)
+
+
+def on_friendship_removed(user, friend):
+    prune(user.id, friend.id)
+    prune(friend.id, user.id)
+
+
+def read_timeline(user_id, position, limit):
+    """
+    One page of (timestamp, post_id) for a user's feed, newest first: an index
+    range scan over their timeline merged with posts pulled from high-degree
+    friends. Returns (post_ids, last_position or None).
+    """
+    pushed = db.session.query(TimelineEntry.timestamp, TimelineEntry.post_id).filter(
+        TimelineEntry.user_id == user_id
+    )
+    pulled = (
+        db.session.query(Post.timestamp, Post.id)
+        .join(friendships, friendships.c.friend_id == Post.user_id)
+        .join(User, User.id == Post.user_id)
+        .filter(friendships.c.user_id == user_id, User.fanout_disabled.is_(True))
+    )
+    if position is not None:
+        pushed = pushed.filter(tuple_(TimelineEntry.timestamp, TimelineEntry.post_id) < position)
+        pulled = pulled.filter(tuple_(Post.timestamp, Post.id) < position)
+
+    pushed = pushed.order_by(TimelineEntry.timestamp.desc(), TimelineEntry.post_id.desc()).limit(limit + 1)
+    pulled = pulled.order_by(Post.timestamp.desc(), Post.id.desc()).limit(limit + 1)
+
+    page, seen = [], set()
+    newest_first = heapq.merge(map(tuple, pushed.all()), map(tuple, pulled.all()), reverse=True)
+    for timestamp, post_id in newest_first:
+        if post_id in seen:
+            continue  # pushed before the author switched to pull mode
+        seen.add(post_id)
+        page.append((timestamp, post_id))
+
+    has_more = len(page) > limit
+    page = page[:limit]
+    last = page[-1] if has_more else None
+    return [post_id for _, post_id in page], last
+
+
+def rebuild_all():
+    """Recreate every timeline from posts and friendships (for the initial migration or repair)."""
+    db.session.execute(delete(TimelineEntry))
+    own = select(Post.user_id, Post.id, Post.user_id, Post.timestamp)
+    friends = (
+        select(friendships.c.friend_id, Post.id, Post.user_id, Post.timestamp)
+        .join(friendships, friendships.c.user_id == Post.user_id)
+        .join(User, User.id == Post.user_id)
+        .where(User.fanout_disabled.is_(False), friendships.c.friend_id != Post.user_id)
+        .distinct()
+    )
+    db.session.execute(insert(TimelineEntry).from_select(TIMELINE_COLUMNS, own.union(friends)))
+    db.session.commit()
@@ -5,8 +5,15 @@ from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from werkzeug.datastructures import FileStorage
 from app import db
+from app.caching import bump, bump_friends_of, conditional, counter_key
 from app.models import User, Post,FriendRequest
-import cloudinary.uploader
+from app.suggestions.model import invalidate as invalidate_suggestions
+from app.pagination import page_args, keyset_page, paginated
+from app.search.backend import index_user
+from app.search import typeahead
+from app.uploads.pipeline import stage, staged_url, queue_upload, start as start_uploads
+from app.uploads.derivatives import decodes_as_image, image_urls, schedule as schedule_variants
+from app.uploads.storage import release
 
 profile_bp = Blueprint('profile', __name__, url_prefix='/api/profile')
 
@@ -23,7 +30,9 @@ def serialize_user(user, include_posts=False):
         "skills": user.skills,
         "education": user.education,
         "profile_pic_url": user.profile_pic,
+        "profile_pic_urls": image_urls(user.profile_pic, external=True),
         "cover_photo_url": user.cover_photo,
+        "cover_photo_urls": image_urls(user.cover_photo, external=True),
         "created_at": user.created_at.isoformat(),
     }
 
@@ -75,19 +84,47 @@ def serialize_user(user, include_posts=False):
 
 
 
-def save_file(file_storage):
-    if file_storage:
-        upload_result = cloudinary.uploader.upload(
-            file_storage,
-            folder="profile_pics",
-            resource_type="image"
-        )
-        return upload_result.get("secure_url")
+PICTURE_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+
+
+def invalid_picture(file_storage):
+    """Error message if an uploaded profile/cover picture isn't a png/jpg/jpeg image, else None."""
+    filename = file_storage.filename
+    if not ('.' in filename and filename.rsplit('.', 1)[1].lower() in PICTURE_EXTENSIONS):
+        return "File must be an image (png, jpg, jpeg)"
+    if not decodes_as_image(file_storage.stream):
+        return "File is not a valid image"
     return None
 
 
+def save_file(file_storage, column):
+    """
+    Stage an image for `column` of the current user, point it at the local
+    copy and start rendering its resized variants. With Cloudinary enabled, returns the Upload that swaps in the
+    Cloudinary URL in the background (start it after committing).
+    """
+    filename = stage(file_storage)
+    placeholder = staged_url(filename)
+    release(getattr(current_user, column))  # the picture being replaced, if stored here
+    setattr(current_user, column, placeholder)
+    schedule_variants(filename)
+    return queue_upload(
+        current_user.id, filename, placeholder, f"user.{column}", current_user.id, "profile_pics", "image"
+    )
+
+
+def profile_etag_keys(user_id):
+    # The payload depends on the profile itself and on how the viewer relates to it
+    return [
+        counter_key('profile', user_id),
+        counter_key('friends', current_user.id),
+        counter_key('requests', current_user.id),
+    ], current_user.id
+
+
 @profile_bp.route("/<int:user_id>", methods=["GET"])
 @login_required
+@conditional(profile_etag_keys)
 def get_profile(user_id):
     user = User.query.get(user_id)
     if not user:
@@ -113,7 +150,9 @@ def get_profile(user_id):
         "skills": user.skills,
         "education": user.education,
         "profile_pic_url": user.profile_pic,
+        "profile_pic_urls": image_urls(user.profile_pic, external=True),
         "cover_photo_url": user.cover_photo,
+        "cover_photo_urls": image_urls(user.cover_photo, external=True),
         "created_at": user.created_at.isoformat(),
         # ✅ Include friendship/request status
         "is_friend": is_friend,
@@ -138,10 +177,14 @@ def get_user_posts(user_id):
     if not user:
         return jsonify({"message": "User not found"}), 404
 
-    posts = (
-        Post.query.filter_by(user_id=user.id)
-        .order_by(Post.timestamp.desc())
-        .all()
+    try:
+        position, limit = page_args()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    posts, next_cursor = keyset_page(
+        Post.query.filter_by(user_id=user.id),
+        Post.timestamp, Post.id, position, limit
     )
 
     posts_data = [
@@ -154,7 +197,7 @@ def get_user_posts(user_id):
         }
         for p in posts
     ]
-    return jsonify(posts_data), 200
+    return paginated(jsonify(posts_data), next_cursor), 200
 
 
 @profile_bp.route("/edit", methods=["PUT", "PATCH"])
@@ -162,6 +205,20 @@ def get_user_posts(user_id):
 def edit_profile():
     data = request.form
 
+    # ✅ Handle file uploads (pushed to Cloudinary in the background)
+    profile_pic_file = request.files.get("profile_pic")
+    cover_photo_file = request.files.get("cover_photo")
+    if not (profile_pic_file and isinstance(profile_pic_file, FileStorage) and profile_pic_file.filename):
+        profile_pic_file = None
+    if not (cover_photo_file and isinstance(cover_photo_file, FileStorage) and cover_photo_file.filename):
+        cover_photo_file = None
+
+    # Validate before anything is stored: these are served from our own origin
+    for file_storage in (profile_pic_file, cover_photo_file):
+        error = file_storage and invalid_picture(file_storage)
+        if error:
+            return jsonify({"error": error}), 400
+
     current_user.full_name = data.get("full_name", current_user.full_name)
     current_user.email = data.get("email", current_user.email)
     current_user.mobile_no = data.get("mobile_no", current_user.mobile_no)
@@ -170,25 +227,31 @@ def edit_profile():
     current_user.skills = data.get("skills", current_user.skills)
     current_user.education = data.get("education", current_user.education)
 
-    # ✅ Handle file uploads with Cloudinary
-    profile_pic_file = request.files.get("profile_pic")
-    cover_photo_file = request.files.get("cover_photo")
+    uploads = []
+    if profile_pic_file:
+        uploads.append(save_file(profile_pic_file, "profile_pic"))
+
+    if cover_photo_file:
+        uploads.append(save_file(cover_photo_file, "cover_photo"))
 
-    if profile_pic_file and isinstance(profile_pic_file, FileStorage) and profile_pic_file.filename:
-        uploaded_url = save_file(profile_pic_file)
-        if uploaded_url:
-            current_user.profile_pic = uploaded_url
+    index_user(current_user)
 
-    if cover_photo_file and isinstance(cover_photo_file, FileStorage) and cover_photo_file.filename:
-        uploaded_url = save_file(cover_photo_file)
-        if uploaded_url:
-            current_user.cover_photo = uploaded_url
+    # Name/picture appear in friends' feeds and friend lists too
+    bump('profile', current_user.id)
+    bump('feed', current_user.id)
+    bump('friends', current_user.id)
+    bump_friends_of('feed', current_user.id)
+    bump_friends_of('friends', current_user.id)
 
     try:
         db.session.commit()
+        start_uploads(*uploads)
+        invalidate_suggestions()
+        typeahead.update_user(current_user)
         return jsonify({
             "message": "Profile updated successfully",
-            "user": serialize_user(current_user)
+            "user": serialize_user(current_user),
+            "upload_ids": [u.id for u in uploads if u is not None]
         }), 200
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,227 @@
+"""
+Full-text search over users and posts.
+
+SQLite (local) uses FTS5 tables, `user_fts` and `post_fts`, kept in sync by
+index_user() on register/edit_profile and index_post() on create_post.
+Postgres (production) uses generated, weighted `search_vector` tsvector
+columns with GIN indexes, so Postgres keeps them in sync itself. Other
+databases fall back to ILIKE scans.
+
+Every backend returns (id, relevance) pairs, best first, with limit/offset.
+Relevance is squashed into [0, 1) so users and posts can be merged.
+"""
+import re
+
+from sqlalchemy import func, or_, text
+
+from app import db
+from app.models import Post, User
+
+
+class Index:
+    """A searchable table and the tsvector weight (A highest) of each of its fields."""
+
+    def __init__(self, table, model, weights):
+        self.table = table
+        self.model = model
+        self.weights = weights
+        self.fields = tuple(weights)
+
+    @property
+    def fts_table(self):
+        return f"{self.table}_fts"
+
+
+USERS = Index('user', User, {'full_name': 'A', 'email': 'C', 'skills': 'B', 'location': 'D'})
+POSTS = Index('post', Post, {'title': 'A', 'description': 'B'})
+INDEXES = (USERS, POSTS)
+
+# SQLite bm25() column weights matching the Postgres ts_rank defaults' order of importance
+BM25_WEIGHTS = {'A': 10.0, 'B': 5.0, 'C': 2.0, 'D': 1.0}
+
+
+def tokenize(query):
+    """Lower-cased word tokens; punctuation (FTS operators, quotes, '@') is dropped."""
+    return re.findall(r'\w+', (query or '').lower())
+
+
+class SQLiteFTSBackend:
+    def __init__(self):
+        self._ready = set()
+
+    def _ensure_table(self, index):
+        if index.table not in self._ready:
+            db.session.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {index.fts_table} "
+                f"USING fts5({', '.join(index.fields)}, prefix='2 3')"
+            ))
+            self._ready.add(index.table)
+
+    def index_row(self, index, row):
+        self._ensure_table(index)
+        db.session.execute(text(f"DELETE FROM {index.fts_table} WHERE rowid = :id"), {'id': row.id})
+        db.session.execute(
+            text(f"INSERT INTO {index.fts_table} (rowid, {', '.join(index.fields)}) "
+                 f"VALUES (:id, {', '.join(':' + f for f in index.fields)})"),
+            {'id': row.id, **{f: getattr(row, f) or '' for f in index.fields}}
+        )
+
+    def rebuild(self):
+        for index in INDEXES:
+            self._ensure_table(index)
+            values = ', '.join(f"coalesce({f}, '')" for f in index.fields)
+            db.session.execute(text(f"DELETE FROM {index.fts_table}"))
+            db.session.execute(text(
+                f"INSERT INTO {index.fts_table} (rowid, {', '.join(index.fields)}) "
+                f"SELECT id, {values} FROM {index.table}"
+            ))
+
+    @staticmethod
+    def _match(index, tokens, fields):
+        # {full_name email} : ("py"* AND "dev"*)  -> every token, as a prefix, in one of the fields
+        return "{%s} : (%s)" % (' '.join(fields), ' AND '.join(f'"{t}"*' for t in tokens))
+
+    def search(self, index, query, fields=None, limit=20, offset=0, exclude_id=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        self._ensure_table(index)
+
+        weights = ', '.join(str(BM25_WEIGHTS[index.weights[f]]) for f in index.fields)
+        rows = db.session.execute(
+            text(f"SELECT rowid, bm25({index.fts_table}, {weights}) AS rank FROM {index.fts_table} "
+                 f"WHERE {index.fts_table} MATCH :match AND rowid != :exclude "
+                 f"ORDER BY rank, rowid LIMIT :limit OFFSET :offset"),
+            {'match': self._match(index, tokens, fields or index.fields),
+             'exclude': exclude_id or 0, 'limit': limit, 'offset': offset}
+        )
+        # bm25 is negative, more negative is better
+        return [(r[0], -r[1] / (1.0 - r[1])) for r in rows]
+
+    def count(self, index, query, fields=None, exclude_id=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return 0
+        self._ensure_table(index)
+        return db.session.execute(
+            text(f"SELECT count(*) FROM {index.fts_table} WHERE {index.fts_table} MATCH :match "
+                 f"AND rowid != :exclude"),
+            {'match': self._match(index, tokens, fields or index.fields), 'exclude': exclude_id or 0}
+        ).scalar()
+
+
+class PostgresFTSBackend:
+    def index_row(self, index, row):
+        pass  # search_vector is a generated column
+
+    def rebuild(self):
+        pass
+
+    @staticmethod
+    def _tsquery(index, tokens, fields):
+        # 'py:*AB & dev:*AB' -> prefix match restricted to the weights of the requested fields
+        weights = ''.join(sorted({index.weights[f] for f in fields}))
+        return ' & '.join(f"{t}:*{weights}" for t in tokens)
+
+    def search(self, index, query, fields=None, limit=20, offset=0, exclude_id=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        rows = db.session.execute(
+            text(f"SELECT id, ts_rank(search_vector, to_tsquery('simple', :q)) AS rank FROM \"{index.table}\" "
+                 "WHERE search_vector @@ to_tsquery('simple', :q) AND id != :exclude "
+                 "ORDER BY rank DESC, id "
+                 "LIMIT :limit OFFSET :offset"),
+            {'q': self._tsquery(index, tokens, fields or index.fields),
+             'exclude': exclude_id or 0, 'limit': limit, 'offset': offset}
+        )
+        # ts_rank is small (a single title match is ~0.1)
+        return [(r[0], r[1] / (r[1] + 0.1)) for r in rows]
+
+    def count(self, index, query, fields=None, exclude_id=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return 0
+        return db.session.execute(
+            text(f"SELECT count(*) FROM \"{index.table}\" "
+                 "WHERE search_vector @@ to_tsquery('simple', :q) AND id != :exclude"),
+            {'q': self._tsquery(index, tokens, fields or index.fields), 'exclude': exclude_id or 0}
+        ).scalar()
+
+
+class LikeBackend:
+    """Unindexed fallback: the original ILIKE '%term%' scan, now bounded by limit/offset."""
+
+    def index_row(self, index, row):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def _query(self, columns, index, query, fields, exclude_id):
+        model = index.model
+        q = db.session.query(*columns).filter(
+            or_(*(getattr(model, f).ilike(f"%{query}%") for f in fields or index.fields))
+        )
+        if exclude_id:
+            q = q.filter(model.id != exclude_id)
+        return q
+
+    def search(self, index, query, fields=None, limit=20, offset=0, exclude_id=None):
+        if not query:
+            return []
+        q = self._query([index.model.id], index, query, fields, exclude_id)
+        return [(r.id, 0.5) for r in q.order_by(index.model.id).limit(limit).offset(offset)]
+
+    def count(self, index, query, fields=None, exclude_id=None):
+        if not query:
+            return 0
+        return self._query([func.count()], index, query, fields, exclude_id).scalar()
+
+
+_backends = {}
+
+
+def get_backend():
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in _backends:
+        _backends[dialect] = {
+            'sqlite': SQLiteFTSBackend,
+            'postgresql': PostgresFTSBackend,
+        }.get(dialect, LikeBackend)()
+    return _backends[dialect]
+
+
+def index_user(user):
+    """Call after a user's searchable fields change, before committing (needs user.id)."""
+    if user.id is None:
+        db.session.flush()
+    get_backend().index_row(USERS, user)
+
+
+def index_post(post):
+    """Call after creating a post, before committing (needs post.id)."""
+    if post.id is None:
+        db.session.flush()
+    get_backend().index_row(POSTS, post)
+
+
+def search_ids(index, query, fields=None, limit=20, offset=0, exclude_id=None):
+    """(id, relevance) pairs, best match first."""
+    return get_backend().search(index, query, fields, limit=limit, offset=offset, exclude_id=exclude_id)
+
+
+def count(index, query, fields=None, exclude_id=None):
+    return get_backend().count(index, query, fields, exclude_id=exclude_id)
+
+
+def search_user_ids(query, fields=USERS.fields, limit=20, offset=0, exclude_id=None):
+    return [i for i, _ in search_ids(USERS, query, fields, limit=limit, offset=offset, exclude_id=exclude_id)]
+
+
+def search_users(query, fields=USERS.fields, limit=20, offset=0, exclude_id=None):
+    """Users matching `query`, best match first."""
+    ids = search_user_ids(query, fields, limit=limit, offset=offset, exclude_id=exclude_id)
+    by_id = {u.id: u for u in User.query.filter(User.id.in_(ids)).all()} if ids else {}
+    return [by_id[i] for i in ids if i in by_id]
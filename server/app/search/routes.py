@@ -1,6 +1,10 @@
 from flask import Blueprint, jsonify, request
-from sqlalchemy import or_
-from app.models import User, db  # Make sure models.py is accessible
+from flask_login import login_required
+from app.models import Post, User, db  # Make sure models.py is accessible
+from app.search import backend as search_index
+from app.search import typeahead, unified
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginated, search_page_args
+from app.posts.routes import serialize_post
 
 # 1. Create a new Blueprint
 search_bp = Blueprint('search', __name__, url_prefix='/api')
@@ -19,32 +23,106 @@ def search_users():
     if not search_term:
         return jsonify({"error": "Search query not provided"}), 400
 
-    # Build the search query (case-insensitive, partial match)
-    search_query = f"%{search_term}%"
+    limit, offset = search_page_args()
 
     try:
-        # Query the database for users where 'full_name' OR 'email' contains the search term
-        found_users = User.query.filter(
-            or_(
-                User.full_name.ilike(search_query),
-                User.email.ilike(search_query)
-            )
-        ).all()
+        # Full-text, relevance-ranked match on name or email (prefix per word)
+        found_users = search_index.search_users(
+            search_term, fields=('full_name', 'email'), limit=limit, offset=offset
+        )
 
         # Format the results to send to the frontend
-        results_list = []
-        for user in found_users:
-            results_list.append({
-                "id": user.id,
-                "full_name": user.full_name,
-                "email": user.email,
-                "profile_pic_url": user.profile_pic or "default.jpg", # Use 'profile_pic_url' as the key for the frontend
-                "location": user.location
-            })
+        results_list = [serialize_search_user(user) for user in found_users]
 
         # Send the list back as JSON
         return jsonify(results_list)
 
     except Exception as e:
         print(f"Error during search: {e}")
-        return jsonify({"error": "An error occurred during search"}), 500
\ No newline at end of file
+        return jsonify({"error": "An error occurred during search"}), 500
+
+
+@search_bp.route('/search/suggest', methods=['GET'])
+@login_required
+def suggest():
+    """
+    Search-as-you-type completions from the in-memory prefix index.
+    /api/search/suggest?q=ra&limit=8
+    """
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', 8, type=int), 20))
+
+    users, skills = typeahead.get_index().suggest(query, limit)
+    return jsonify({
+        "users": [
+            {"id": user_id, "full_name": full_name, "profile_pic_url": profile_pic or "default.jpg"}
+            for user_id, full_name, profile_pic in users
+        ],
+        "skills": [{"skill": skill, "users": count} for skill, count in skills]
+    })
+
+
+@search_bp.route('/search/suggest/stats', methods=['GET'])
+@login_required
+def suggest_stats():
+    """Size and memory footprint of this process's typeahead index."""
+    return jsonify(typeahead.get_index().stats())
+
+
+def serialize_search_user(user):
+    return {
+        "id": user.id,
+        "full_name": user.full_name,
+        "email": user.email,
+        "profile_pic_url": user.profile_pic or "default.jpg",  # 'profile_pic_url' is the key the frontend uses
+        "location": user.location
+    }
+
+
+@search_bp.route('/search/all', methods=['GET'])
+@login_required
+def search_all():
+    """
+    Users, posts and skills in one relevance-ranked list.
+    /api/search/all?q=python&types=user,post&limit=20&cursor=...
+
+    Facet counts are returned with the first page; the next page's cursor is
+    in the X-Next-Cursor header.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Search query not provided"}), 400
+
+    types = tuple(t for t in request.args.get('types', ','.join(unified.TYPES)).split(',') if t)
+    if not types or any(t not in unified.TYPES for t in types):
+        return jsonify({"error": f"types must be a comma-separated subset of {', '.join(unified.TYPES)}"}), 400
+
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor')
+    try:
+        offsets = unified.decode_offsets(cursor) if cursor else None
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    hits, facets, next_offsets = unified.search(query, types, offsets, limit)
+
+    # Load only this page's users and posts, in two queries
+    user_ids = [key for kind, key, _ in hits if kind == 'user']
+    post_ids = [key for kind, key, _ in hits if kind == 'post']
+    users = {u.id: u for u in User.query.filter(User.id.in_(user_ids))} if user_ids else {}
+    posts = {p.id: p for p in serialize_post.eager(Post.query.filter(Post.id.in_(post_ids)))} if post_ids else {}
+
+    results = []
+    for kind, key, score in hits:
+        if kind == 'user' and key in users:
+            results.append({"type": "user", "score": round(score, 4), "user": serialize_search_user(users[key])})
+        elif kind == 'post' and key in posts:
+            results.append({"type": "post", "score": round(score, 4), "post": serialize_post(posts[key])})
+        elif kind == 'skill':
+            skill, count = key
+            results.append({"type": "skill", "score": round(score, 4), "skill": {"skill": skill, "users": count}})
+
+    body = {"results": results}
+    if facets is not None:
+        body["facets"] = facets
+    return paginated(jsonify(body), unified.encode_offsets(next_offsets) if next_offsets else None)
@@ -0,0 +1,247 @@
+"""
+In-process typeahead index for search-as-you-type.
+
+Names and skills are normalised (lower-case, accents and punctuation
+stripped) and stored under every word-boundary suffix, so "rahul kumar" is
+found by "ra", "rahul k" and "ku". Each kind of key lives in one sorted list
+of interned strings with a parallel array of values: a prefix lookup is a
+bisect plus a short slice, with no database round trip.
+
+The index is built lazily on first use, updated in place when a user
+registers or edits their profile, and rebuilt after SEARCH_TYPEAHEAD_TTL
+seconds so other worker processes pick up edits they did not handle.
+"""
+import heapq
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+from flask import current_app
+
+from app import db
+from app.metrics.instrumentation import register_gauge
+from app.models import User
+
+MAX_KEY_WORDS = 4  # suffixes start at one of a value's first few words
+
+
+@lru_cache(maxsize=65536)  # skill phrases and first names repeat heavily
+def normalize(value):
+    """'Ráhul  Kumar-Singh' -> 'rahul kumar singh'."""
+    value = value or ''
+    if not value.isascii():
+        value = unicodedata.normalize('NFKD', value)
+        value = ''.join(c for c in value if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'\w+', value.lower()))
+
+
+def suffixes(normalized):
+    """'rahul kumar' -> ['rahul kumar', 'kumar']."""
+    words = normalized.split(' ')
+    return [' '.join(words[i:]) for i in range(min(len(words), MAX_KEY_WORDS)) if words[i]]
+
+
+def skill_phrases(skills):
+    """Distinct normalised phrases of a comma-separated skills field."""
+    phrases = (normalize(s) for s in (skills or '').split(','))
+    return list(dict.fromkeys(p for p in phrases if p))
+
+
+class TypeaheadIndex:
+    def __init__(self, rows):
+        """`rows`: (id, full_name, profile_pic, skills) for every user."""
+        self.built_at = time.time()
+        self._lock = threading.Lock()
+        self._users = {}            # id -> (full_name, profile_pic, name keys, skill phrases)
+        self._skill_users = {}      # phrase -> number of users listing it
+        name_entries, skill_entries = [], set()
+
+        for user_id, full_name, profile_pic, skills in rows:
+            keys, phrases = self._entry(user_id, full_name, profile_pic, skills)
+            name_entries.extend((key, user_id) for key in keys)
+            for phrase in phrases:
+                self._skill_users[phrase] = self._skill_users.get(phrase, 0) + 1
+                skill_entries.update((key, phrase) for key in suffixes(phrase))
+
+        name_entries.sort()
+        self._name_keys = [key for key, _ in name_entries]
+        self._name_ids = array('q', (user_id for _, user_id in name_entries))
+
+        skill_entries = sorted(skill_entries)
+        self._skill_keys = [key for key, _ in skill_entries]
+        self._skill_values = [phrase for _, phrase in skill_entries]
+        self._memory = self._measure()
+
+    def _entry(self, user_id, full_name, profile_pic, skills):
+        keys = tuple(sys.intern(k) for k in suffixes(normalize(full_name)))
+        phrases = tuple(sys.intern(p) for p in skill_phrases(skills))
+        self._users[user_id] = (full_name, profile_pic, keys, phrases)
+        return keys, phrases
+
+    @staticmethod
+    def _entry_size(keys, phrases):
+        return sum(sys.getsizeof(s) + 16 for s in keys + phrases)  # string + list/array slot
+
+    @staticmethod
+    def _range(keys, prefix):
+        return bisect_left(keys, prefix), bisect_right(keys, prefix + '\uffff')
+
+    def update_user(self, user_id, full_name, profile_pic, skills):
+        with self._lock:
+            self._remove(user_id)
+            keys, phrases = self._entry(user_id, full_name, profile_pic, skills)
+            for key in keys:
+                i = bisect_right(self._name_keys, key)
+                self._name_keys.insert(i, key)
+                self._name_ids.insert(i, user_id)
+            for phrase in phrases:
+                count = self._skill_users.get(phrase, 0)
+                self._skill_users[phrase] = count + 1
+                if not count:
+                    for key in suffixes(phrase):
+                        i = bisect_right(self._skill_keys, key)
+                        self._skill_keys.insert(i, key)
+                        self._skill_values.insert(i, phrase)
+            self._memory += self._entry_size(keys, phrases)
+
+    def _remove(self, user_id):
+        old = self._users.pop(user_id, None)
+        if old is None:
+            return
+        _, _, keys, phrases = old
+        self._memory -= self._entry_size(keys, phrases)
+        for key in keys:
+            start, end = bisect_left(self._name_keys, key), bisect_right(self._name_keys, key)
+            for i in range(start, end):
+                if self._name_ids[i] == user_id:
+                    del self._name_keys[i]
+                    del self._name_ids[i]
+                    break
+        for phrase in phrases:
+            self._skill_users[phrase] -= 1
+            if self._skill_users[phrase]:
+                continue
+            del self._skill_users[phrase]
+            for key in suffixes(phrase):
+                start, end = bisect_left(self._skill_keys, key), bisect_right(self._skill_keys, key)
+                for i in range(start, end):
+                    if self._skill_values[i] == phrase:
+                        del self._skill_keys[i]
+                        del self._skill_values[i]
+                        break
+
+    def suggest(self, query, limit=8):
+        """
+        Up to `limit` users whose name, and skills whose phrase, has a word
+        starting with `query`. Users come in key order; skills most common first.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return [], []
+
+        with self._lock:
+            users, seen = [], set()
+            start, end = self._range(self._name_keys, prefix)
+            for i in range(start, end):
+                user_id = self._name_ids[i]
+                if user_id not in seen:
+                    seen.add(user_id)
+                    full_name, profile_pic, _, _ = self._users[user_id]
+                    users.append((user_id, full_name, profile_pic))
+                    if len(users) == limit:
+                        break
+
+            skills = heapq.nsmallest(limit, self._skill_matches(prefix), key=lambda m: (-m[1], m[0]))
+
+        return users, skills
+
+    def _skill_matches(self, prefix):
+        start, end = self._range(self._skill_keys, prefix)
+        return [(p, self._skill_users[p]) for p in set(self._skill_values[start:end])]
+
+    def match_skills(self, query):
+        """Every (skill phrase, number of users) with a word starting with `query`, unordered."""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        with self._lock:
+            return self._skill_matches(prefix)
+
+    def memory_bytes(self):
+        """
+        Approximate footprint. Measured exactly (containers, distinct strings,
+        tuples) at build time, then adjusted by an estimate on each update.
+        """
+        return self._memory
+
+    def _measure(self):
+        seen, total = set(), 0
+        for obj in self._objects():
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                total += sys.getsizeof(obj)
+        return total
+
+    def _objects(self):
+        yield from (self._users, self._skill_users, self._name_keys, self._name_ids,
+                    self._skill_keys, self._skill_values)
+        yield from self._name_keys
+        yield from self._skill_keys
+        for full_name, profile_pic, keys, phrases in self._users.values():
+            yield from (full_name, profile_pic, keys, phrases)
+            yield from phrases
+        yield from self._skill_users
+
+    def stats(self):
+        return {
+            'users': len(self._users),
+            'name_keys': len(self._name_keys),
+            'skill_phrases': len(self._skill_users),
+            'skill_keys': len(self._skill_keys),
+            'memory_bytes': self.memory_bytes(),
+            'age_s': round(time.time() - self.built_at, 1),
+        }
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def build():
+    rows = db.session.query(User.id, User.full_name, User.profile_pic, User.skills).all()
+    return TypeaheadIndex(rows)
+
+
+def get_index():
+    """The process-wide index, (re)built when missing or older than SEARCH_TYPEAHEAD_TTL."""
+    global _index
+
+    def expired(index):
+        ttl = current_app.config.get('SEARCH_TYPEAHEAD_TTL', 300)
+        return index is None or time.time() - index.built_at >= ttl
+
+    index = _index
+    if not expired(index):
+        return index
+
+    with _lock:
+        if expired(_index):
+            _index = build()
+        return _index
+
+
+def update_user(user):
+    """Reflect a committed register/profile edit; a no-op until the index is first built."""
+    if _index is not None:
+        _index.update_user(user.id, user.full_name, user.profile_pic, user.skills)
+
+
+register_gauge(
+    'acadlinker_typeahead_memory_bytes', 'Approximate memory held by the typeahead index.',
+    lambda: _index.memory_bytes() if _index is not None else 0
+)
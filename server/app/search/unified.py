@@ -0,0 +1,124 @@
+"""
+One ranked search over users, posts and skills.
+
+Each type is a sub-query: users and posts hit the full-text backend, skills
+the in-memory typeahead index. The sub-queries run concurrently on a small
+thread pool (each in its own app context, so each has its own DB session),
+and their (id, relevance) lists are merged by relevance.
+
+Relevance-ranked results have no stable sort key to seek on, so the cursor
+is an opaque per-type offset: a page fetches limit + 1 rows from every type
+starting at that type's offset, keeps the best `limit`, and advances each
+offset by the rows it used.
+"""
+import base64
+import heapq
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from app.search import backend, typeahead
+
+TYPES = ('user', 'post', 'skill')
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=current_app.config.get('SEARCH_WORKERS', 4), thread_name_prefix='search'
+        )
+    return _executor
+
+
+def encode_offsets(offsets):
+    raw = json.dumps(offsets, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_offsets(cursor):
+    """Inverse of encode_offsets. Raises ValueError for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        offsets = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(offsets, dict) or not all(
+        t in TYPES and isinstance(n, int) and n >= 0 for t, n in offsets.items()
+    ):
+        raise ValueError("Invalid cursor")
+    return offsets
+
+
+def skill_relevance(phrase, users, prefix):
+    """Exact > phrase prefix > word prefix, then more popular skills first; in [0, 1)."""
+    if phrase == prefix:
+        base = 1.0
+    elif phrase.startswith(prefix):
+        base = 0.8
+    else:
+        base = 0.6
+    return base * users / (users + 1)
+
+
+def search_skills(query, offset, limit, with_count):
+    prefix = typeahead.normalize(query)
+    scored = sorted(
+        ((phrase, users, skill_relevance(phrase, users, prefix))
+         for phrase, users in typeahead.get_index().match_skills(query)),
+        key=lambda m: (-m[2], m[0])
+    )
+    rows = [((phrase, users), score) for phrase, users, score in scored[offset:offset + limit]]
+    return rows, (len(scored) if with_count else None)
+
+
+def search_index(index, query, offset, limit, with_count):
+    rows = backend.search_ids(index, query, limit=limit, offset=offset)
+    return rows, (backend.count(index, query) if with_count else None)
+
+
+def run_sub_query(app, kind, query, offset, limit, with_count):
+    with app.app_context():
+        if kind == 'skill':
+            return search_skills(query, offset, limit, with_count)
+        index = backend.USERS if kind == 'user' else backend.POSTS
+        return search_index(index, query, offset, limit, with_count)
+
+
+def search(query, types=TYPES, offsets=None, limit=20):
+    """
+    One page of merged results.
+    Returns (hits, facets, next_offsets): hits are (type, key, relevance), best
+    first, where key is a user/post id or a (skill, users) pair; facets (total
+    matches per type) are only counted on the first page; next_offsets is None
+    on the last page.
+    """
+    offsets = offsets or {}
+    first_page = not offsets
+    app = current_app._get_current_object()
+
+    futures = {
+        kind: executor().submit(run_sub_query, app, kind, query, offsets.get(kind, 0), limit + 1, first_page)
+        for kind in types
+    }
+    results = {kind: future.result() for kind, future in futures.items()}
+
+    ranked = heapq.merge(
+        *([(-score, kind, i, key) for i, (key, score) in enumerate(rows)] for kind, (rows, _) in results.items())
+    )
+    hits, used = [], dict.fromkeys(types, 0)
+    for negative, kind, _, key in ranked:
+        if len(hits) == limit:
+            break
+        hits.append((kind, key, -negative))
+        used[kind] += 1
+
+    next_offsets = None
+    if any(len(results[kind][0]) > used[kind] for kind in types):
+        next_offsets = {kind: offsets.get(kind, 0) + used[kind] for kind in types}
+
+    facets = {kind: total for kind, (_, total) in results.items()} if first_page else None
+    return hits, facets, next_offsets
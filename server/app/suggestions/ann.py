@@ -0,0 +1,74 @@
+import numpy as np
+
+
+class LSHIndex:
+    """
+    Random-projection (SimHash) LSH index for cosine similarity.
+
+    Each of `n_tables` tables hashes a vector to an `n_bits` code: one bit per
+    random hyperplane, set when the vector lies on its positive side. Users
+    whose codes collide with the query in any table become candidates, which
+    the caller re-scores exactly. Buckets are stored as sorted code arrays, so
+    a lookup is a binary search rather than a scan over every user.
+
+    Recall/speed knobs:
+      - more `n_tables`  -> higher recall, more candidates
+      - more `n_bits`    -> smaller buckets, lower recall per table
+      - more `n_probes`  -> also visit buckets one bit-flip away (multi-probe)
+    """
+
+    def __init__(self, matrix, n_tables=8, n_bits=8, n_probes=0, seed=0, chunk_size=50000):
+        if n_bits > 62:
+            raise ValueError("n_bits must be <= 62")
+
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.n_probes = min(n_probes, n_bits)
+
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal(
+            (matrix.shape[1], n_tables * n_bits)
+        ).astype(np.float32)
+        self._weights = np.left_shift(1, np.arange(n_bits, dtype=np.int64))
+
+        # Users with an empty profile have no direction to hash; leave them out
+        self.rows = np.flatnonzero(matrix.getnnz(axis=1)).astype(np.int64)
+
+        codes = np.empty((self.rows.size, n_tables), dtype=np.int64)
+        for start in range(0, self.rows.size, chunk_size):
+            chunk = self.rows[start:start + chunk_size]
+            codes[start:start + chunk.size] = self._hash(matrix[chunk])
+
+        # Per table: codes sorted ascending + the matrix rows in that order
+        self._order = []
+        self._sorted_codes = []
+        for t in range(n_tables):
+            order = np.argsort(codes[:, t], kind='stable')
+            self._order.append(self.rows[order])
+            self._sorted_codes.append(codes[order, t])
+
+    def _hash(self, vectors):
+        projected = np.asarray(vectors @ self.planes)
+        bits = (projected > 0).reshape(-1, self.n_tables, self.n_bits)
+        return bits.astype(np.int64) @ self._weights
+
+    def _probe_codes(self, code):
+        if not self.n_probes:
+            return np.array([code], dtype=np.int64)
+        flips = self._weights[:self.n_probes]
+        return np.concatenate(([code], np.bitwise_xor(code, flips)))
+
+    def candidates(self, vector):
+        """Matrix rows that share a bucket with `vector` in at least one table."""
+        codes = self._hash(vector)[0]
+        found = []
+        for t in range(self.n_tables):
+            sorted_codes = self._sorted_codes[t]
+            probes = self._probe_codes(codes[t])
+            lo = np.searchsorted(sorted_codes, probes, side='left')
+            hi = np.searchsorted(sorted_codes, probes, side='right')
+            found.extend(self._order[t][a:b] for a, b in zip(lo, hi) if b > a)
+
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
@@ -0,0 +1,100 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import delete, insert
+
+from app import db
+from app.models import Suggestion
+from app.suggestions.graph import mutual_boost
+from app.suggestions.model import SuggestionModel, SIMILARITY_THRESHOLD, DEFAULT_K
+
+# Worker-process state, set once per worker by _init_worker
+_matrix = None
+_user_ids = None
+_k = DEFAULT_K
+_threshold = SIMILARITY_THRESHOLD
+_graph = None
+_graph_weight = 0.0
+
+
+def _init_worker(matrix, user_ids, k, threshold, graph, graph_weight):
+    global _matrix, _user_ids, _k, _threshold, _graph, _graph_weight
+    _matrix = matrix
+    _user_ids = user_ids
+    _k = k
+    _threshold = threshold
+    _graph = graph
+    _graph_weight = graph_weight
+
+
+def _top_k_block(bounds):
+    """Score rows [start, end) against every user and keep each row's top-k."""
+    start, end = bounds
+    sims = (_matrix[start:end] @ _matrix.T).tocsr()
+
+    if _graph is not None and _graph_weight:
+        mutual = _graph.mutual_friends_block(start, end)
+        mutual.data = mutual_boost(mutual.data, _graph_weight)
+        sims = (sims + mutual).tocsr()
+
+    results = []
+    for i in range(end - start):
+        lo, hi = sims.indptr[i], sims.indptr[i + 1]
+        cols = sims.indices[lo:hi]
+        vals = sims.data[lo:hi]
+
+        keep = (vals >= _threshold) & (cols != start + i)
+        cols, vals = cols[keep], vals[keep]
+        if cols.size > _k:
+            top = np.argpartition(-vals, _k - 1)[:_k]
+            cols, vals = cols[top], vals[top]
+
+        user_id = int(_user_ids[start + i])
+        results.extend(
+            (user_id, int(_user_ids[c]), float(v)) for c, v in zip(cols, vals)
+        )
+    return results
+
+
+def materialize_suggestions(k=DEFAULT_K, block_size=1000, workers=None,
+                            threshold=SIMILARITY_THRESHOLD, graph_weight=None, insert_batch=5000):
+    """
+    Recompute the `suggestion` table for every user.
+
+    Users are split into blocks of `block_size` rows which are scored in a
+    process pool; results replace the previous run in a single transaction.
+    Scores match generate_suggestions, including the mutual-friends boost.
+    Returns the number of rows written.
+    """
+    if graph_weight is None:
+        graph_weight = current_app.config.get('SUGGESTION_GRAPH_WEIGHT', 0.0)
+
+    model = SuggestionModel.fit()
+    computed_at = datetime.utcnow()
+
+    n = model.user_ids.size if model.matrix is not None else 0
+    blocks = [(start, min(start + block_size, n)) for start in range(0, n, block_size)]
+    workers = workers or os.cpu_count() or 1
+
+    rows = []
+    if blocks:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(blocks)),
+            initializer=_init_worker,
+            initargs=(model.matrix, model.user_ids, k, threshold, model.graph, graph_weight)
+        ) as pool:
+            for block in pool.map(_top_k_block, blocks):
+                rows.extend(block)
+
+    db.session.execute(delete(Suggestion))
+    for start in range(0, len(rows), insert_batch):
+        db.session.execute(insert(Suggestion), [
+            {"user_id": u, "suggested_id": s, "score": score, "computed_at": computed_at}
+            for u, s, score in rows[start:start + insert_batch]
+        ])
+    db.session.commit()
+
+    return len(rows)
@@ -0,0 +1,75 @@
+import numpy as np
+from scipy import sparse
+
+from app import db
+from app.models import friendships
+
+# Mutual-friend count at which the graph boost reaches half its weight
+MUTUAL_FRIENDS_HALF = 2.0
+
+
+def load_edges():
+    """Every (user_id, friend_id) row of the friendships table, in one query."""
+    return db.session.query(friendships.c.user_id, friendships.c.friend_id).filter(
+        friendships.c.user_id.isnot(None),
+        friendships.c.friend_id.isnot(None)
+    ).all()
+
+
+def mutual_boost(counts, weight, half=MUTUAL_FRIENDS_HALF):
+    """Map mutual-friend counts to a score boost in [0, weight), saturating as counts grow."""
+    counts = np.asarray(counts, dtype=np.float64)
+    return weight * counts / (counts + half)
+
+
+class FriendGraph:
+    """
+    Accepted friendships as a symmetric CSR adjacency matrix A, indexed by the
+    same rows as the suggestion model. Row i of A·A holds, for every user j,
+    how many friends i and j have in common.
+    """
+
+    def __init__(self, user_ids, edges):
+        """`user_ids` must be sorted ascending (model rows are ordered by User.id)."""
+        n = user_ids.size
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+
+        # Map user ids to rows by bisection; drop edges to users outside the model
+        rows = np.searchsorted(user_ids, edges[:, 0]).clip(max=max(n - 1, 0))
+        cols = np.searchsorted(user_ids, edges[:, 1]).clip(max=max(n - 1, 0))
+        if n:
+            valid = (user_ids[rows] == edges[:, 0]) & (user_ids[cols] == edges[:, 1]) & (rows != cols)
+        else:
+            valid = np.zeros(rows.size, dtype=bool)
+        rows, cols = rows[valid], cols[valid]
+
+        adjacency = sparse.csr_matrix(
+            (np.ones(rows.size, dtype=np.float32), (rows, cols)), shape=(n, n)
+        )
+        # accept_request stores both directions, but don't rely on it; collapse duplicates to 1
+        adjacency = adjacency.maximum(adjacency.T).tocsr()
+        adjacency.data[:] = 1.0
+        self.adjacency = adjacency
+
+    def mutual_friends(self, row):
+        """
+        (rows, counts) of friends-of-friends for matrix row `row`, excluding the
+        user and people who are already their friends.
+        """
+        friends = self.adjacency[row]
+        counts = (friends @ self.adjacency).tocsr()
+
+        exclude = np.append(friends.indices, row)
+        keep = ~np.isin(counts.indices, exclude)
+        return counts.indices[keep].astype(np.int64), counts.data[keep]
+
+    def mutual_friends_block(self, start, end):
+        """
+        Sparse (end-start) x N mutual-friend counts for a block of rows, with
+        existing friends removed. Each row's own column is left for the caller.
+        """
+        friends = self.adjacency[start:end]
+        counts = (friends @ self.adjacency).tocsr()
+        counts = (counts - counts.multiply(friends)).tocsr()
+        counts.eliminate_zeros()
+        return counts
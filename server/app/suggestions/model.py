@@ -0,0 +1,178 @@
+import threading
+import time
+
+import numpy as np
+from flask import current_app
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app import db
+from app.models import User
+from app.suggestions.ann import LSHIndex
+from app.suggestions.graph import FriendGraph, load_edges, mutual_boost
+
+SIMILARITY_THRESHOLD = 0.40
+DEFAULT_K = 5
+
+
+def profile_text(skills, location):
+    """Text a user is matched on: skills + location."""
+    return f"{skills or ''} {location or ''}"
+
+
+class SuggestionModel:
+    """
+    TF-IDF model fitted once over every user's skills + location.
+
+    Rows of `matrix` are L2-normalised by TfidfVectorizer, so the cosine
+    similarity between two users is a plain sparse dot product. With
+    `lsh_params`, an LSHIndex narrows each query to candidate rows before
+    that dot product instead of scoring every user. With `edges`, a
+    FriendGraph over the same rows supplies mutual-friend counts.
+    """
+
+    def __init__(self, user_ids, texts, version, lsh_params=None, edges=None):
+        self.version = version
+        self.fitted_at = time.time()
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        self.row_of = {int(uid): row for row, uid in enumerate(self.user_ids)}
+
+        self.vectorizer = TfidfVectorizer(stop_words='english')
+        try:
+            self.matrix = self.vectorizer.fit_transform(texts).tocsr()
+        except ValueError:
+            # Empty vocabulary (no users, or nobody filled in skills/location)
+            self.vectorizer = None
+            self.matrix = None
+
+        self.index = None
+        if lsh_params is not None and self.matrix is not None:
+            self.index = LSHIndex(self.matrix, **lsh_params)
+
+        self.graph = None
+        if edges is not None:
+            self.graph = FriendGraph(self.user_ids, edges)
+
+    @classmethod
+    def fit(cls, version=0, lsh_params=None):
+        rows = db.session.query(User.id, User.skills, User.location).order_by(User.id).all()
+        return cls(
+            [r.id for r in rows],
+            [profile_text(r.skills, r.location) for r in rows],
+            version,
+            lsh_params,
+            load_edges()
+        )
+
+    def age(self):
+        return time.time() - self.fitted_at
+
+    def vector_for(self, user):
+        """
+        Sparse TF-IDF row for a user's *current* profile. Transforming one
+        document is cheap and keeps results right for users who joined or
+        edited their profile after the fit.
+        """
+        if self.matrix is None:
+            return None
+        return self.vectorizer.transform([profile_text(user.skills, user.location)])
+
+    def top_k(self, user, k=DEFAULT_K, threshold=SIMILARITY_THRESHOLD, exact=False, graph_weight=0.0):
+        """
+        Return up to k (user_id, score) pairs with score >= threshold, best first.
+
+        The score is TF-IDF cosine similarity, plus `mutual_boost(count, graph_weight)`
+        for friends-of-friends when `graph_weight` is set. Uses the LSH index when one
+        was built, unless `exact` is set.
+        """
+        if self.matrix is None:
+            return []
+
+        vec = self.vector_for(user)
+        self_row = self.row_of.get(user.id)
+
+        fof_rows = fof_counts = None
+        if graph_weight and self.graph is not None and self_row is not None:
+            fof_rows, fof_counts = self.graph.mutual_friends(self_row)
+
+        if self.index is not None and not exact:
+            rows = self.index.candidates(vec) if vec.nnz else np.empty(0, dtype=np.int64)
+            if fof_rows is not None:
+                rows = np.union1d(rows, fof_rows)
+            scores = (self.matrix[rows] @ vec.T).toarray().ravel()
+        else:
+            rows = np.arange(self.matrix.shape[0])
+            scores = (self.matrix @ vec.T).toarray().ravel()
+
+        if fof_rows is not None and fof_rows.size:
+            # rows is sorted in both branches, so friends-of-friends can be located by bisection
+            scores[np.searchsorted(rows, fof_rows)] += mutual_boost(fof_counts, graph_weight)
+
+        keep = scores >= threshold
+        if self_row is not None:
+            keep &= rows != self_row  # never suggest the user to themselves
+        rows, scores = rows[keep], scores[keep]
+
+        if rows.size > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+        rows, scores = rows[order], scores[order]
+
+        return [(int(self.user_ids[r]), float(score)) for r, score in zip(rows, scores)]
+
+
+# -----------------------------
+# Per-process model cache
+# -----------------------------
+_lock = threading.Lock()
+_model = None
+_version = 0
+_stale = False
+
+
+def lsh_params_from_config():
+    """LSH settings from config, or None when the exact path is selected."""
+    config = current_app.config
+    if config.get('SUGGESTION_INDEX', 'exact') != 'lsh':
+        return None
+    return {
+        'n_tables': config.get('SUGGESTION_LSH_TABLES', 8),
+        'n_bits': config.get('SUGGESTION_LSH_BITS', 8),
+        'n_probes': config.get('SUGGESTION_LSH_PROBES', 0),
+    }
+
+
+def get_model():
+    """
+    Return the process-wide model, refitting it when it is older than
+    SUGGESTION_MODEL_TTL seconds, or when it has been marked stale and is
+    older than SUGGESTION_MODEL_MIN_REFIT seconds (so a burst of profile
+    edits triggers one refit, not one per edit).
+    """
+    global _model, _version, _stale
+
+    def needs_refit(model):
+        if model is None:
+            return True
+        age = model.age()
+        if age >= current_app.config.get('SUGGESTION_MODEL_TTL', 600):
+            return True
+        return _stale and age >= current_app.config.get('SUGGESTION_MODEL_MIN_REFIT', 30)
+
+    model = _model
+    if not needs_refit(model):
+        return model
+
+    with _lock:
+        # Another thread may have refitted while we waited for the lock
+        if needs_refit(_model):
+            _version += 1
+            _stale = False
+            _model = SuggestionModel.fit(version=_version, lsh_params=lsh_params_from_config())
+        return _model
+
+
+def invalidate():
+    """Mark the model stale so it is refitted soon (e.g. after a register or profile edit)."""
+    global _stale
+    _stale = True
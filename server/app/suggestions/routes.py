@@ -1,46 +1,45 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, current_app
 from flask_login import login_required, current_user
-from app.models import User
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sqlalchemy import func
+from app import db
+from app.models import User, Suggestion
+from app.suggestions.model import get_model, DEFAULT_K
 
 suggestions_bp = Blueprint('suggestions', __name__)
 
 
-def generate_suggestions(current_user, all_users, k=5):
-    """Generate suggested friends using skills + location similarity"""
-
-    if not all_users:
-        return []
-
-    data = pd.DataFrame([{
-        'id': u.id,
-        'skills': u.skills or '',
-        'location': u.location or ''
-    } for u in all_users])
-
-    data['combined'] = data['skills'] + ' ' + data['location']
-
-    vectorizer = TfidfVectorizer(stop_words='english')
-    vectors = vectorizer.fit_transform(data['combined'])
-    similarity_matrix = cosine_similarity(vectors)
-
-    try:
-        current_index = data.index[data['id'] == current_user.id][0]
-    except IndexError:
-        return []
-
-    similarity_scores = list(enumerate(similarity_matrix[current_index]))
-    similarity_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
-
-    top_users = [
-        int(data.iloc[i[0]]['id'])
-        for i in similarity_scores
-        if data.iloc[i[0]]['id'] != current_user.id and i[1] >= 0.40
-    ][:k]
-
-    return top_users
+def generate_suggestions(current_user, k=DEFAULT_K, graph_weight=None):
+    """
+    Generate suggested friends using skills + location similarity,
+    boosted by mutual friends when graph_weight (default SUGGESTION_GRAPH_WEIGHT) > 0
+    """
+    if graph_weight is None:
+        graph_weight = current_app.config.get('SUGGESTION_GRAPH_WEIGHT', 0.0)
+
+    model = get_model()
+    return [user_id for user_id, _ in model.top_k(current_user, k=k, graph_weight=graph_weight)]
+
+
+def materialized_suggestions(current_user, k=DEFAULT_K):
+    """
+    Read suggestions precomputed by `flask compute-suggestions`.
+    Returns None when the user has joined since the last run (or it never ran),
+    so the caller can fall back to computing them on request.
+    """
+    users = (
+        User.query.join(Suggestion, Suggestion.suggested_id == User.id)
+        .filter(Suggestion.user_id == current_user.id)
+        .order_by(Suggestion.score.desc())
+        .limit(k)
+        .all()
+    )
+    if users:
+        return users
+
+    last_run = db.session.query(func.max(Suggestion.computed_at)).scalar()
+    if last_run is None or current_user.created_at > last_run:
+        return None
+    return []
 
 
 # -----------------------------
@@ -51,10 +50,12 @@ def generate_suggestions(current_user, all_users, k=5):
 def suggestions_api():
     """Return suggestions as JSON for React frontend"""
 
-    all_users = User.query.all()
-    similar_user_ids = generate_suggestions(current_user, all_users)
+    suggested_users = materialized_suggestions(current_user)
 
-    suggested_users = User.query.filter(User.id.in_(similar_user_ids)).all()
+    if suggested_users is None:
+        # Not covered by the last batch run: compute on request
+        similar_user_ids = generate_suggestions(current_user)
+        suggested_users = User.query.filter(User.id.in_(similar_user_ids)).all()
 
     # Convert to JSON
     response = [
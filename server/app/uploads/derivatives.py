@@ -0,0 +1,155 @@
+"""
+Resized WebP variants of uploaded images, so a 48px avatar does not cost a
+multi-megabyte download.
+
+IMAGE_SIZES names the variants and their longest side ("thumb:96,small:320,...").
+After a post or profile image is saved, `schedule(filename)` renders every
+variant on a small thread pool (Pillow releases the GIL while resizing and
+encoding) as `<stem>.<size>.webp` next to the original in static/uploads.
+
+Serializers emit variant URLs through `image_urls()`. Local images point at
+/api/uploads/img/<size>/<file>, which serves the stored variant (as
+serving.py serves originals) and renders it on the spot if the pool has not
+got to it yet. Cloudinary URLs get the
+equivalent Cloudinary transformation instead. Without Pillow installed
+nothing is generated and the variant route redirects to the original.
+"""
+import logging
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlparse
+
+from flask import current_app, url_for
+
+from app.uploads.storage import CONTENT_NAME, local_name, upload_folder
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional: derivatives are skipped without Pillow
+    Image = None
+
+log = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+
+
+@lru_cache(maxsize=8)
+def parse_sizes(spec):
+    pairs = (item.split(':') for item in spec.split(',') if item.strip())
+    return dict(sorted(((name.strip(), int(px)) for name, px in pairs), key=lambda p: -p[1]))
+
+
+def sizes():
+    """{'large': 1280, ..., 'thumb': 96} from IMAGE_SIZES, largest first."""
+    return parse_sizes(current_app.config.get('IMAGE_SIZES', 'thumb:96,small:320,medium:640,large:1280'))
+
+
+def is_image(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in IMAGE_EXTENSIONS
+
+
+def is_original(filename):
+    """
+    Whether `filename` is a stored original image that variants are made from:
+    a content hash name, never a variant (<hash>.<size>.webp) or anything else.
+    """
+    return is_image(filename) and CONTENT_NAME.match(filename) is not None
+
+
+def decodes_as_image(stream):
+    """Whether `stream` holds an image Pillow can read (True without Pillow). Rewinds it."""
+    if Image is None:
+        return True
+    try:
+        with Image.open(stream) as image:
+            image.verify()
+        return True
+    except Exception:
+        return False
+    finally:
+        stream.seek(0)
+
+
+def derivative_name(filename, size):
+    return f"{os.path.splitext(filename)[0]}.{size}.webp"
+
+
+def generate(filename):
+    """Render every variant of static/uploads/`filename`. Returns the names written."""
+    if Image is None or not is_image(filename):
+        return []
+    folder = upload_folder()
+    quality = current_app.config.get('IMAGE_QUALITY', 80)
+
+    written = []
+    with Image.open(os.path.join(folder, filename)) as original:
+        largest = max(sizes().values())
+        # JPEG: decode at a reduced scale straight away instead of full resolution
+        original.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        # Largest first, each variant resized from the previous one rather than the original
+        for size, px in sizes().items():
+            image.thumbnail((px, px), Image.LANCZOS)
+            name = derivative_name(filename, size)
+            # Unique temp name: the pool and the variant route may render the same file at once
+            tmp_path = os.path.join(folder, f"{name}.{secrets.token_hex(4)}.tmp")
+            image.save(tmp_path, 'WEBP', quality=quality, method=4)
+            os.replace(tmp_path, os.path.join(folder, name))
+            written.append(name)
+    return written
+
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=current_app.config.get('IMAGE_WORKERS', 2), thread_name_prefix='images'
+        )
+    return _executor
+
+
+def schedule(*filenames):
+    """Render variants of saved images in the background (None and non-images are skipped)."""
+    if Image is None:
+        return
+    app = current_app._get_current_object()
+    for filename in filenames:
+        if filename and is_image(filename):
+            executor().submit(run_generate, app, filename)
+
+
+def run_generate(app, filename):
+    with app.app_context():
+        try:
+            generate(filename)
+        except Exception:
+            log.exception("could not render variants of %s", filename)
+
+
+def cloudinary_variant(url, px):
+    # Cloudinary renders transformations on demand: .../upload/c_limit,w_96,h_96,f_webp/...
+    return url.replace('/upload/', f'/upload/c_limit,w_{px},h_{px},f_webp/', 1)
+
+
+def image_urls(value, external=False):
+    """{size: url} for a post file or profile picture, or None if it isn't a resizable image."""
+    if not value or not is_image(urlparse(value).path):
+        return None
+    filename = local_name(value)
+    if filename is not None:
+        # Uploads from before content addressing are only served as they are (see migrate-uploads)
+        if not is_original(filename):
+            return None
+        return {
+            size: url_for('uploads.image_variant', size=size, filename=filename, _external=external)
+            for size in sizes()
+        }
+    if 'res.cloudinary.com' in value and '/upload/' in value:
+        return {size: cloudinary_variant(value, px) for size, px in sizes().items()}
+    return None
@@ -0,0 +1,193 @@
+"""
+Upload offload: requests stage files locally and return; a thread pool pushes
+them to the provider.
+
+1. `stage(file)` saves the upload under static/uploads (content-addressed,
+   see storage.py). The row being written
+   (post, message, profile) stores a placeholder that serves that copy, so
+   the response never waits on the provider.
+2. `queue_upload(...)` records an Upload row in the request's transaction;
+   `start(upload)` hands it to the pool once that transaction has committed.
+3. The worker uploads with up to UPLOAD_MAX_ATTEMPTS tries (exponential
+   backoff from UPLOAD_RETRY_BACKOFF seconds), then swaps the placeholder for
+   the provider URL, unless the column has changed meanwhile.
+
+With UPLOAD_PROVIDER = "local" nothing is queued: the staged file is final.
+Staged copies of finished uploads stay servable (clients may still hold the
+placeholder) until `flask prune-uploads` releases them.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import db
+from app.caching import bump, bump_friends_of
+from app.models import Message, Post, Upload, User
+from app.search import typeahead
+from app.uploads.providers import get_provider
+from app.uploads.serving import file_url
+from app.uploads.storage import release, store_file, upload_folder
+
+log = logging.getLogger(__name__)
+
+
+def stage(file):
+    """Save an uploaded FileStorage under static/uploads; returns its stored name."""
+    return store_file(file)
+
+
+def staged_url(filename):
+    """Absolute URL of a staged file, for columns that hold URLs (profile pictures)."""
+    return file_url(filename, external=True)
+
+
+def _user_changed(user):
+    # Name/picture appear in friends' feeds and friend lists too
+    bump('profile', user.id)
+    bump('feed', user.id)
+    bump('friends', user.id)
+    bump_friends_of('feed', user.id)
+    bump_friends_of('friends', user.id)
+
+
+def _post_changed(post):
+    bump('feed', post.user_id)
+    bump_friends_of('feed', post.user_id)
+    if post.user.fanout_disabled:
+        bump('feed_pull')
+
+
+# target -> (model, column, cache invalidation once the row points at the provider)
+TARGETS = {
+    'post.file_name': (Post, 'file_name', _post_changed),
+    'message.file_name': (Message, 'file_name', None),
+    'user.profile_pic': (User, 'profile_pic', _user_changed),
+    'user.cover_photo': (User, 'cover_photo', _user_changed),
+}
+
+
+def queue_upload(user_id, staged_name, placeholder, target, target_id, folder, resource_type='auto'):
+    """
+    Record that `target` row `target_id` (currently `placeholder`) should get the
+    provider URL of `staged_name`. Returns the Upload, or None with local storage.
+    The caller commits, then calls start().
+    """
+    if get_provider() is None:
+        return None
+    upload = Upload(
+        user_id=user_id, target=target, target_id=target_id,
+        staged_name=staged_name, placeholder=placeholder,
+        folder=folder, resource_type=resource_type,
+    )
+    db.session.add(upload)
+    db.session.flush()
+    return upload
+
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=current_app.config.get('UPLOAD_WORKERS', 4), thread_name_prefix='upload'
+        )
+    return _executor
+
+
+def start(*uploads):
+    """Hand committed uploads to the worker pool (None entries are skipped)."""
+    app = current_app._get_current_object()
+    for upload in uploads:
+        if upload is not None:
+            executor().submit(run_upload, app, upload.id)
+
+
+def run_upload(app, upload_id):
+    with app.app_context():
+        try:
+            process(upload_id)
+        except Exception:
+            db.session.rollback()
+            log.exception("upload %s failed unexpectedly", upload_id)
+
+
+def process(upload_id):
+    """Push one pending upload to the provider, retrying, and patch its target row."""
+    upload = db.session.get(Upload, upload_id)
+    if upload is None or upload.status not in ('pending', 'uploading'):
+        return upload
+
+    config = current_app.config
+    max_attempts = config.get('UPLOAD_MAX_ATTEMPTS', 3)
+    backoff = config.get('UPLOAD_RETRY_BACKOFF', 2.0)
+    path = os.path.join(upload_folder(), upload.staged_name)
+
+    url = None
+    while url is None:
+        upload.status = 'uploading'
+        upload.attempts += 1
+        db.session.commit()
+        try:
+            url = get_provider().upload(path, upload.folder, upload.resource_type)
+        except Exception as e:
+            upload.error = str(e)
+            log.warning("upload %s attempt %d failed: %s", upload.id, upload.attempts, e)
+            if upload.attempts >= max_attempts:
+                # The placeholder keeps serving the staged copy
+                upload.status = 'failed'
+                db.session.commit()
+                return upload
+            db.session.commit()
+            time.sleep(backoff * 2 ** (upload.attempts - 1))
+
+    model, column, on_change = TARGETS[upload.target]
+    # Only if it still shows this upload: the user may have replaced it meanwhile
+    patched = model.query.filter(
+        model.id == upload.target_id, getattr(model, column) == upload.placeholder
+    ).update({column: url}, synchronize_session=False)
+    row = db.session.get(model, upload.target_id) if patched else None
+    if row is not None and on_change is not None:
+        on_change(row)
+    if not patched:
+        # Whatever replaced the placeholder also released its reference
+        upload.staged_name = None
+    upload.status, upload.url, upload.error = 'done', url, None
+    db.session.commit()
+
+    if isinstance(row, User):
+        typeahead.update_user(row)
+    return upload
+
+
+def resume(older_than=300):
+    """
+    Run uploads left pending or uploading for `older_than` seconds (their
+    worker's process died) in this process. Returns how many were processed.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+    ids = [u for (u,) in db.session.query(Upload.id).filter(
+        Upload.status.in_(('pending', 'uploading')), Upload.updated_at < cutoff
+    )]
+    for upload_id in ids:
+        process(upload_id)
+    return len(ids)
+
+
+def prune(older_than):
+    """Release staged copies of uploads finished `older_than` seconds ago. Returns how many."""
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+    uploads = Upload.query.filter(
+        Upload.status == 'done', Upload.updated_at < cutoff, Upload.staged_name.isnot(None)
+    ).all()
+    for upload in uploads:
+        # Deleted by `flask gc-uploads` unless another row stores the same content
+        release(upload.staged_name)
+        upload.staged_name = None
+    db.session.commit()
+    return len(uploads)
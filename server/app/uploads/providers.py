@@ -0,0 +1,56 @@
+"""
+Remote upload providers. Each takes a local file path and returns its public URL.
+
+UPLOAD_PROVIDER selects one: "cloudinary", or "fake" for tests and local
+development. "local" has no provider: staged files are served as they are.
+"""
+import os
+import threading
+import time
+
+import cloudinary.uploader
+from flask import current_app
+
+
+class CloudinaryProvider:
+    def upload(self, path, folder, resource_type='auto'):
+        result = cloudinary.uploader.upload(path, folder=folder, resource_type=resource_type)
+        return result['secure_url']
+
+
+class FakeProvider:
+    """
+    Records uploads instead of sending them. `fail_next` makes that many calls
+    raise first (to exercise retries); `delay` simulates network latency.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.fail_next = 0
+        self.uploads = []
+        self._lock = threading.Lock()
+
+    def upload(self, path, folder, resource_type='auto'):
+        time.sleep(self.delay)
+        with self._lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                raise ConnectionError("fake provider: simulated failure")
+            self.uploads.append((path, folder, resource_type))
+        return f"https://fake-cdn.invalid/{folder}/{os.path.basename(path)}"
+
+
+_providers = {}
+
+
+def get_provider():
+    """The configured provider (one instance per process), or None for local storage."""
+    name = current_app.config.get('UPLOAD_PROVIDER', 'local')
+    if name not in _providers:
+        if name == 'cloudinary':
+            _providers[name] = CloudinaryProvider()
+        elif name == 'fake':
+            _providers[name] = FakeProvider(current_app.config.get('UPLOAD_FAKE_DELAY', 0.0))
+        else:
+            _providers[name] = None
+    return _providers[name]
@@ -0,0 +1,179 @@
+"""
+Chunked, resumable uploads for large attachments.
+
+    POST /api/uploads/sessions              {"filename", "size"} -> token, chunk_size
+    PUT  /api/uploads/sessions/<token>/<n>  raw bytes of chunk n
+    GET  /api/uploads/sessions/<token>      chunks received so far (to resume)
+    POST /api/uploads/sessions/<token>/finalize
+
+Each chunk body is copied from the WSGI input stream to its own file under
+UPLOAD_CHUNK_DIR in small blocks, so neither a chunk nor the whole file is
+ever held in memory, and chunks may arrive in any order or be re-sent.
+Finalizing concatenates them into a staged upload (hashing as it goes, see
+storage.py); the token is then passed
+as the `upload` form field of send_message / create_post instead of a file.
+
+Sessions not finalized (or finalized but never used) within
+UPLOAD_SESSION_TTL seconds are removed by `flask prune-uploads`.
+"""
+import os
+import secrets
+import shutil
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import db
+from app.models import UploadSession
+from app.uploads.storage import read_blocks, release, store
+
+COPY_BLOCK = 64 * 1024
+
+# Extensions any session may carry; each consumer narrows this further
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf', 'doc', 'docx'}
+
+
+class UploadError(ValueError):
+    """A client error in the upload protocol; the message is safe to return."""
+
+
+def chunk_dir(token=None):
+    root = current_app.config.get('UPLOAD_CHUNK_DIR') or os.path.join(current_app.instance_path, 'upload_chunks')
+    return os.path.join(root, token) if token else root
+
+
+def extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+
+def chunk_count(session):
+    return max(1, -(-session.size // session.chunk_size))
+
+
+def expected_length(session, index):
+    if index == chunk_count(session) - 1:
+        return session.size - index * session.chunk_size
+    return session.chunk_size
+
+
+def received_chunks(session):
+    try:
+        names = os.listdir(chunk_dir(session.id))
+    except FileNotFoundError:
+        return []
+    return sorted(int(n) for n in names if n.isdigit())
+
+
+def start(user_id, filename, size):
+    max_size = current_app.config.get('UPLOAD_MAX_SIZE', 25 * 1024 * 1024)
+    if not filename or extension(filename) not in ALLOWED_EXTENSIONS:
+        raise UploadError(f"Invalid file type. Allowed: {', '.join(sorted(ALLOWED_EXTENSIONS))}.")
+    if not isinstance(size, int) or size <= 0:
+        raise UploadError("size must be a positive integer")
+    if size > max_size:
+        raise UploadError(f"File too large (max {max_size} bytes)")
+
+    session = UploadSession(
+        id=secrets.token_hex(16), user_id=user_id, filename=filename, size=size,
+        chunk_size=current_app.config.get('UPLOAD_CHUNK_SIZE', 1024 * 1024),
+    )
+    db.session.add(session)
+    os.makedirs(chunk_dir(session.id), exist_ok=True)
+    return session
+
+
+def write_chunk(session, index, stream, content_length):
+    """Copy one chunk from `stream` to disk, enforcing its exact length."""
+    if session.status != 'open':
+        raise UploadError("Upload already finalized")
+    if not 0 <= index < chunk_count(session):
+        raise UploadError("Chunk index out of range")
+    expected = expected_length(session, index)
+    if content_length is not None and content_length != expected:
+        raise UploadError(f"Chunk {index} must be {expected} bytes")
+
+    directory = chunk_dir(session.id)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f"{index}.{secrets.token_hex(4)}.tmp")
+    written = 0
+    try:
+        with open(tmp_path, 'wb') as out:
+            while written <= expected:
+                block = stream.read(min(COPY_BLOCK, expected + 1 - written))
+                if not block:
+                    break
+                out.write(block)
+                written += len(block)
+        if written != expected:
+            raise UploadError(f"Chunk {index} must be {expected} bytes")
+        # Atomic, so a retried or concurrent PUT of the same chunk never leaves a partial file
+        os.replace(tmp_path, os.path.join(directory, str(index)))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    session.updated_at = datetime.utcnow()
+
+
+def finalize(session):
+    """Concatenate all chunks into a staged upload (idempotent; caller commits)."""
+    if session.status != 'open':
+        return session
+    # Claim the session with a conditional update. Its row stays locked until the caller
+    # commits, so a concurrent finalize waits, then finds it no longer open instead of
+    # assembling (and referencing) the same file twice.
+    claimed = UploadSession.query.filter_by(id=session.id, status='open').update(
+        {UploadSession.status: 'assembling'}, synchronize_session=False
+    )
+    if not claimed:
+        db.session.refresh(session)
+        return session
+
+    missing = sorted(set(range(chunk_count(session))) - set(received_chunks(session)))
+    if missing:
+        raise UploadError(f"Missing chunks: {missing[:20]}")
+
+    directory = chunk_dir(session.id)
+
+    def blocks():
+        for index in range(chunk_count(session)):
+            with open(os.path.join(directory, str(index)), 'rb') as chunk:
+                yield from read_blocks(chunk)
+
+    # The session holds the reference until a post or message claims it
+    staged_name = store(blocks(), os.path.splitext(session.filename)[1])
+    shutil.rmtree(directory, ignore_errors=True)
+
+    session.status, session.staged_name = 'complete', staged_name
+    return session
+
+
+def claim(token, user_id, allowed_extensions):
+    """
+    Hand a finalized session's staged file to a post or message (once).
+    Returns the staged filename; raises UploadError if the token can't be used.
+    """
+    session = db.session.get(UploadSession, token) if token else None
+    if session is None or session.user_id != user_id:
+        raise UploadError("Upload not found")
+    if session.status != 'complete':
+        raise UploadError("Upload not finalized" if session.status == 'open' else "Upload already used")
+    if extension(session.filename) not in allowed_extensions:
+        raise UploadError(f"Invalid file type. Allowed: {', '.join(sorted(allowed_extensions))}.")
+    session.status = 'used'
+    return session.staged_name
+
+
+def prune_sessions(older_than=None):
+    """Remove abandoned sessions, their chunks and unused assembled files. Returns how many."""
+    if older_than is None:
+        older_than = current_app.config.get('UPLOAD_SESSION_TTL', 86400)
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+    stale = UploadSession.query.filter(UploadSession.updated_at < cutoff).all()
+    for session in stale:
+        shutil.rmtree(chunk_dir(session.id), ignore_errors=True)
+        # A used session's reference now belongs to its post or message
+        if session.staged_name and session.status == 'complete':
+            release(session.staged_name)
+        db.session.delete(session)
+    db.session.commit()
+    return len(stale)
@@ -0,0 +1,135 @@
+import os
+from flask import Blueprint, abort, jsonify, redirect, request
+from flask_login import login_required, current_user
+from werkzeug.security import safe_join
+from app import db
+from app.models import Upload, UploadSession
+from app.uploads import derivatives, resumable
+from app.uploads.serving import file_url, send_upload
+from app.uploads.storage import upload_folder
+from app.uploads.resumable import UploadError
+
+uploads_bp = Blueprint('uploads', __name__)
+
+
+def serialize_upload(upload):
+    return {
+        "id": upload.id,
+        "status": upload.status,
+        "target": upload.target,
+        "target_id": upload.target_id,
+        "url": upload.url or upload.placeholder,
+        "attempts": upload.attempts,
+        "error": upload.error,
+    }
+
+
+# Status of a background upload (pending / uploading / done / failed)
+@uploads_bp.route('/<int:upload_id>', methods=['GET'])
+@login_required
+def get_upload(upload_id):
+    upload = db.session.get(Upload, upload_id)
+    if upload is None or upload.user_id != current_user.id:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify(serialize_upload(upload)), 200
+
+
+def serialize_session(session):
+    return {
+        "token": session.id,
+        "filename": session.filename,
+        "size": session.size,
+        "chunk_size": session.chunk_size,
+        "chunk_count": resumable.chunk_count(session),
+        "status": session.status,
+        "received_chunks": resumable.received_chunks(session) if session.status == 'open' else [],
+    }
+
+
+def owned_session(token):
+    session = db.session.get(UploadSession, token)
+    if session is None or session.user_id != current_user.id:
+        return None
+    return session
+
+
+# --- Resumable uploads (see resumable.py) ---
+
+@uploads_bp.route('/sessions', methods=['POST'])
+@login_required
+def start_session():
+    data = request.get_json(silent=True) or {}
+    try:
+        session = resumable.start(current_user.id, data.get('filename'), data.get('size'))
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+    db.session.commit()
+    return jsonify(serialize_session(session)), 201
+
+
+@uploads_bp.route('/sessions/<token>', methods=['GET'])
+@login_required
+def get_session(token):
+    session = owned_session(token)
+    if session is None:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify(serialize_session(session)), 200
+
+
+@uploads_bp.route('/sessions/<token>/<int:index>', methods=['PUT'])
+@login_required
+def put_chunk(token, index):
+    session = owned_session(token)
+    if session is None:
+        return jsonify({"error": "Upload not found"}), 404
+    try:
+        # request.stream, not request.data: the body goes to disk as it arrives
+        resumable.write_chunk(session, index, request.stream, request.content_length)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+    db.session.commit()
+    return jsonify({"index": index}), 200
+
+
+@uploads_bp.route('/sessions/<token>/finalize', methods=['POST'])
+@login_required
+def finalize_session(token):
+    session = owned_session(token)
+    if session is None:
+        return jsonify({"error": "Upload not found"}), 404
+    try:
+        resumable.finalize(session)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+    db.session.commit()
+    return jsonify(serialize_session(session)), 200
+
+
+# --- Image variants (see derivatives.py) ---
+
+@uploads_bp.route('/img/<size>/<path:filename>', methods=['GET'])
+def image_variant(size, filename):
+    """A resized WebP of an uploaded image, rendered now if the pool hasn't yet."""
+    # Originals only: a variant's own name would render variants of variants without end
+    if size not in derivatives.sizes() or not derivatives.is_original(filename):
+        abort(404)
+    folder = upload_folder()
+    name = derivatives.derivative_name(filename, size)
+    original = safe_join(folder, filename)
+    if original is None:
+        abort(404)
+
+    if not os.path.exists(os.path.join(folder, name)):
+        if not os.path.exists(original):
+            abort(404)
+        if derivatives.Image is None:
+            return redirect(file_url(filename))
+        derivatives.generate(filename)
+
+    return send_upload(name)
+
+
+# Stored files (see serving.py): immutable, conditional, Range-capable
+@uploads_bp.route('/files/<path:filename>', methods=['GET'])
+def serve_file(filename):
+    return send_upload(filename)
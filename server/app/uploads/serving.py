@@ -0,0 +1,99 @@
+"""
+Serving local uploads: GET /api/uploads/files/<name>.
+
+Stored names are content hashes (see storage.py) and variant names derive
+from them, so a URL never changes meaning. Responses are therefore cached
+for a year as `immutable`, with a strong ETag (the digest itself for
+originals) and Last-Modified, and support Range requests so PDF viewers
+and media players can fetch parts of a file.
+
+UPLOAD_SENDFILE hands the transfer itself to the front server, so Python
+workers only check the path and write headers:
+
+    x-sendfile  Apache mod_xsendfile / lighttpd: X-Sendfile: <absolute path>
+    x-accel     nginx: X-Accel-Redirect: <UPLOAD_ACCEL_PREFIX><name>, with e.g.
+
+                    location /_uploads/ {
+                        internal;
+                        alias /srv/acadlinker/server/app/static/uploads/;
+                    }
+
+The front server then answers Range requests itself; conditional requests
+that match are still answered here with a 304 before anything is delegated.
+
+Uploads are user content on the API's own origin, so only INLINE_TYPES
+(raster images and PDF) are displayed in the browser. Anything else is sent
+as an application/octet-stream attachment under a sandbox CSP, so no
+upload can run script here.
+"""
+import mimetypes
+import os
+from urllib.parse import quote
+
+from flask import abort, current_app, request, send_file, url_for
+from werkzeug.security import safe_join
+
+from app.uploads.storage import CONTENT_NAME, upload_folder
+
+ONE_YEAR = 31536000
+
+# Types browsers may render in place; none of them can run script (no HTML, no SVG)
+INLINE_TYPES = {'image/png', 'image/jpeg', 'image/gif', 'image/webp', 'application/pdf'}
+
+
+def file_url(name, external=False):
+    """URL of a stored upload (a name under static/uploads)."""
+    return url_for('uploads.serve_file', filename=name, _external=external)
+
+
+def etag_for(name, stat):
+    # A content-addressed name is its own strong validator
+    if CONTENT_NAME.match(name):
+        return os.path.splitext(os.path.basename(name))[0]
+    return f"{int(stat.st_mtime)}-{stat.st_size}-{os.path.basename(name)}"
+
+
+def send_upload(name):
+    """Response for static/uploads/`name`: cache headers, conditional and Range handling."""
+    path = safe_join(upload_folder(), name)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    stat = os.stat(path)
+    mode = current_app.config.get('UPLOAD_SENDFILE')
+    mimetype = mimetypes.guess_type(name)[0]
+    inline = mimetype in INLINE_TYPES
+    if not inline:
+        mimetype = 'application/octet-stream'
+
+    if mode in ('x-sendfile', 'x-accel'):
+        response = current_app.response_class(mimetype=mimetype)
+        if mode == 'x-sendfile':
+            response.headers['X-Sendfile'] = path
+        else:
+            prefix = current_app.config.get('UPLOAD_ACCEL_PREFIX', '/_uploads/')
+            response.headers['X-Accel-Redirect'] = prefix + quote(name)
+        response.set_etag(etag_for(name, stat))
+        response.last_modified = stat.st_mtime
+        response.make_conditional(request, accept_ranges=False)
+        if response.status_code == 304:
+            response.headers.pop('X-Sendfile', None)
+            response.headers.pop('X-Accel-Redirect', None)
+    else:
+        response = send_file(
+            path, mimetype=mimetype, etag=etag_for(name, stat), last_modified=stat.st_mtime,
+            conditional=True
+        )
+        # Werkzeug only says so on range responses; PDF viewers look for it on the first one
+        response.headers['Accept-Ranges'] = 'bytes'
+
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = ONE_YEAR
+    response.cache_control.immutable = True
+    response.expires = None
+    # Uploaded files are user content: never let a browser sniff them into something else
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    if not inline:
+        response.headers['Content-Disposition'] = 'attachment'
+        response.headers['Content-Security-Policy'] = "sandbox; default-src 'none'"
+    return response
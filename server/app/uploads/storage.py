@@ -0,0 +1,286 @@
+"""
+Content-addressed local storage for uploads.
+
+Files live under static/uploads at a path derived from their SHA-256:
+`ab/cd/abcd1234...<ext>`. The digest is computed while the upload is being
+written, so there is no second pass over the file. Identical uploads (the
+same PDF sent to twenty chats) end up as one file, and no directory grows
+past a few hundred entries.
+
+StoredFile.refcount counts the rows pointing at each file: posts, messages,
+profile and cover pictures, finished provider uploads whose staged copy is
+still kept, and finalized resumable uploads not yet used. A reference is
+taken when a file is stored and dropped when its row lets go of it. Files
+that reach zero are deleted (with their image variants) by
+`flask gc-uploads`, after a grace period. `flask gc-uploads --recount`
+rebuilds every count from the tables. `flask migrate-uploads` moves older
+flat, randomly named uploads into this layout, merging duplicates.
+"""
+import hashlib
+import logging
+import os
+import re
+import secrets
+from collections import Counter as Tally
+from datetime import datetime, timedelta
+from urllib.parse import unquote, urlparse
+
+from flask import current_app
+
+from app import db
+from app.caching import upsert_insert
+from app.models import Message, Post, StoredFile, Upload, UploadSession, User
+
+log = logging.getLogger(__name__)
+
+BLOCK = 64 * 1024
+CONTENT_NAME = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[A-Za-z0-9]+)?$')
+# URL paths local uploads have been served from (serving.py, and Flask's static route before it)
+LOCAL_PREFIXES = ('/api/uploads/files/', '/static/uploads/')
+
+
+def upload_folder():
+    return os.path.join(current_app.root_path, 'static/uploads')
+
+
+def content_name(digest, ext):
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}"
+
+
+def read_blocks(stream):
+    return iter(lambda: stream.read(BLOCK), b'')
+
+
+def store(blocks, ext):
+    """
+    Write an iterable of byte blocks under its content hash and take a
+    reference to it (caller commits). Returns the stored name.
+    """
+    folder = upload_folder()
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = os.path.join(folder, f".incoming-{secrets.token_hex(8)}.tmp")
+    digest, size = hashlib.sha256(), 0
+    try:
+        with open(tmp_path, 'wb') as out:
+            for block in blocks:
+                digest.update(block)
+                out.write(block)
+                size += len(block)
+
+        name = content_name(digest.hexdigest(), ext)
+        # Reference first: a collector that already locked this file's row makes us
+        # wait until it has deleted it, and the rename below then brings it back
+        acquire(name, size)
+        path = os.path.join(folder, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Identical content, so replacing an existing copy is harmless and atomic
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return name
+
+
+def store_file(file):
+    """Store an uploaded FileStorage, streaming it from the request."""
+    return store(read_blocks(file.stream), os.path.splitext(file.filename)[1])
+
+
+def local_name(value):
+    """The static/uploads name behind a stored file_name or local URL, else None (remote URL)."""
+    if not value:
+        return None
+    if not value.startswith('http'):
+        return value
+    path = unquote(urlparse(value).path)
+    for prefix in LOCAL_PREFIXES:
+        if path.startswith(prefix):
+            return path[len(prefix):]
+    return None
+
+
+def acquire(name, size=None):
+    now = datetime.utcnow()
+    stmt = upsert_insert(StoredFile)
+    if stmt is not None:
+        stmt = stmt.values(path=name, size=size, refcount=1, updated_at=now)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[StoredFile.path],
+            set_={'refcount': StoredFile.refcount + 1, 'updated_at': now}
+        ))
+        return
+
+    # Other databases: lock the row if it exists, otherwise create it
+    stored = StoredFile.query.filter_by(path=name).with_for_update().first()
+    if stored is None:
+        db.session.add(StoredFile(path=name, size=size, refcount=1, updated_at=now))
+    else:
+        stored.refcount += 1
+        stored.updated_at = now
+
+
+def release(value):
+    """Drop one reference to a stored file (file_name or local URL; remote URLs are ignored)."""
+    name = local_name(value)
+    if name is None:
+        return
+    StoredFile.query.filter_by(path=name).update(
+        {StoredFile.refcount: StoredFile.refcount - 1, StoredFile.updated_at: datetime.utcnow()},
+        synchronize_session=False
+    )
+
+
+def remove_file(name):
+    """Delete a stored file and any image variants rendered from it."""
+    folder = upload_folder()
+    path = os.path.join(folder, name)
+    stem = os.path.splitext(os.path.basename(name))[0]
+    directory = os.path.dirname(path)
+    for entry in [os.path.basename(name)] + [
+        e for e in _listdir(directory) if e.startswith(stem + '.') and e.endswith('.webp')
+    ]:
+        try:
+            os.remove(os.path.join(directory, entry))
+        except FileNotFoundError:
+            pass
+    # Drop shard directories left empty (fails harmlessly if not)
+    for shard in (directory, os.path.dirname(directory)):
+        try:
+            os.rmdir(shard)
+        except OSError:
+            break
+
+
+def _listdir(directory):
+    try:
+        return os.listdir(directory)
+    except FileNotFoundError:
+        return []
+
+
+def collect(grace=3600):
+    """Delete files nobody has referenced for `grace` seconds. Returns (files, bytes) freed."""
+    cutoff = datetime.utcnow() - timedelta(seconds=grace)
+    # Rows stay locked until commit, so a concurrent store() of the same content waits
+    garbage = StoredFile.query.filter(
+        StoredFile.refcount <= 0, StoredFile.updated_at < cutoff
+    ).with_for_update().all()
+    freed = 0
+    for stored in garbage:
+        remove_file(stored.path)
+        freed += stored.size or 0
+        db.session.delete(stored)
+    db.session.commit()
+    return len(garbage), freed
+
+
+def references():
+    """Count every row that points at each stored file, from the tables themselves."""
+    refs = Tally()
+    for (value,) in db.session.query(Post.file_name).filter(Post.file_name.isnot(None)):
+        refs[local_name(value)] += 1
+    for (value,) in db.session.query(Message.file_name).filter(Message.file_name.isnot(None)):
+        refs[local_name(value)] += 1
+    for pic, cover in db.session.query(User.profile_pic, User.cover_photo):
+        refs[local_name(pic)] += 1
+        refs[local_name(cover)] += 1
+    # Finished provider uploads hold their staged copy until pruned
+    for (value,) in db.session.query(Upload.staged_name).filter(
+        Upload.status == 'done', Upload.staged_name.isnot(None)
+    ):
+        refs[value] += 1
+    for (value,) in db.session.query(UploadSession.staged_name).filter(UploadSession.status == 'complete'):
+        refs[value] += 1
+    refs.pop(None, None)
+    return refs
+
+
+def recount():
+    """Rebuild every refcount from the tables; stored files on disk with no row get one at 0."""
+    folder = upload_folder()
+    refs = references()
+    rows = {s.path: s for s in StoredFile.query.with_for_update()}
+
+    on_disk = set()
+    for directory, _, files in os.walk(folder):
+        for entry in files:
+            name = os.path.relpath(os.path.join(directory, entry), folder).replace(os.sep, '/')
+            if CONTENT_NAME.match(name):
+                on_disk.add(name)
+
+    changed = 0
+    for name in set(rows) | on_disk | {n for n in refs if CONTENT_NAME.match(n)}:
+        stored = rows.get(name)
+        if stored is None:
+            path = os.path.join(folder, name)
+            size = os.path.getsize(path) if os.path.exists(path) else None
+            stored = StoredFile(path=name, size=size, refcount=0, updated_at=datetime.utcnow())
+            db.session.add(stored)
+        if stored.refcount != refs.get(name, 0):
+            stored.refcount = refs.get(name, 0)
+            stored.updated_at = datetime.utcnow()
+            changed += 1
+    db.session.commit()
+    return changed
+
+
+def migrate_flat(dry_run=False):
+    """
+    Move flat uploads (static/uploads/<random>.<ext>) to content-addressed
+    names, deleting duplicates, and repoint every row at the new names.
+    Returns (files, duplicates, bytes saved).
+    """
+    folder = upload_folder()
+    entries = [e for e in _listdir(folder) if os.path.isfile(os.path.join(folder, e)) and not e.startswith('.')]
+    # Image variants (<stem>.<size>.webp) go with their original; random stems have no dots
+    variants = {}
+    for entry in entries:
+        stem, ext = os.path.splitext(entry)
+        if ext == '.webp' and '.' in stem:
+            variants.setdefault(stem.split('.', 1)[0], []).append(entry)
+
+    mapping, seen, duplicates, saved = {}, set(), 0, 0
+    for entry in sorted(entries):
+        path = os.path.join(folder, entry)
+        stem, ext = os.path.splitext(entry)
+        if '.' in stem:
+            continue
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in read_blocks(f):
+                digest.update(block)
+        name = content_name(digest.hexdigest(), ext)
+        mapping[entry] = name
+        target = os.path.join(folder, name)
+        if name in seen or os.path.exists(target):
+            duplicates += 1
+            saved += os.path.getsize(path)
+        seen.add(name)
+        if dry_run:
+            continue
+        if os.path.exists(target):
+            os.remove(path)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+        # Variants are re-rendered under the new name on first request
+        for variant in variants.get(stem, ()):
+            os.remove(os.path.join(folder, variant))
+
+    if dry_run or not mapping:
+        return len(mapping), duplicates, saved
+
+    for old, new in mapping.items():
+        for column in (Post.file_name, Message.file_name, Upload.staged_name, Upload.placeholder,
+                       UploadSession.staged_name):
+            column.class_.query.filter(column == old).update({column: new}, synchronize_session=False)
+    # Profile pictures, cover photos and their pending uploads hold absolute local URLs
+    for model, columns in ((User, ('profile_pic', 'cover_photo')), (Upload, ('placeholder',))):
+        for row in model.query.filter(db.or_(*(getattr(model, c).like('%/static/uploads/%') for c in columns))):
+            for c in columns:
+                old = local_name(getattr(row, c))
+                if old in mapping:
+                    setattr(row, c, getattr(row, c).replace(f'/static/uploads/{old}', f'/static/uploads/{mapping[old]}'))
+    db.session.commit()
+    recount()
+    return len(mapping), duplicates, saved
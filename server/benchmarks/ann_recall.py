@@ -0,0 +1,111 @@
+"""
+Recall@k and latency of the LSH suggestion index against exact cosine similarity.
+
+    cd server
+    python -m benchmarks.ann_recall --queries 200 --tables 4 8 16 --bits 10 12 --probes 0 2
+    python -m benchmarks.ann_recall --synthetic 100k     # generated users instead of the database
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.suggestions.model import (
+    SuggestionModel, profile_text, SIMILARITY_THRESHOLD, DEFAULT_K
+)
+from benchmarks.synthetic import generate, parse_scale
+
+
+def exact_top_k(model, row, k, threshold):
+    """Reference result: sklearn cosine_similarity over every user."""
+    scores = cosine_similarity(model.matrix[row], model.matrix).ravel()
+    scores[row] = -1.0
+    ranked = np.argsort(-scores, kind='stable')
+    return {int(model.user_ids[i]) for i in ranked[:k] if scores[i] >= threshold}
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+
+def run(users, queries, k, threshold, grid, seed):
+    ids = [u.id for u in users]
+    texts = [profile_text(u.skills, u.location) for u in users]
+
+    exact = SuggestionModel(ids, texts, version=0)
+    if exact.matrix is None:
+        print("No users with skills/location to index.")
+        return
+
+    rng = np.random.default_rng(seed)
+    query_rows = rng.choice(len(users), size=min(queries, len(users)), replace=False)
+    truth = {row: exact_top_k(exact, row, k, threshold) for row in query_rows}
+    scored = [row for row in query_rows if truth[row]]
+
+    timings = []
+    for row in query_rows:
+        start = time.perf_counter()
+        exact.top_k(users[row], k=k, threshold=threshold)
+        timings.append(time.perf_counter() - start)
+
+    print(f"users={len(users)} queries={len(query_rows)} k={k} threshold={threshold}")
+    print(f"{'index':<28}{'build s':>9}{'recall@k':>10}{'cands':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    print(f"{'exact (sparse dot)':<28}{'-':>9}{1.0:>10.3f}{len(users):>9}"
+          f"{percentile_ms(timings, 50):>9.3f}{percentile_ms(timings, 95):>9.3f}")
+
+    for n_tables, n_bits, n_probes in grid:
+        params = {'n_tables': n_tables, 'n_bits': n_bits, 'n_probes': n_probes, 'seed': seed}
+        start = time.perf_counter()
+        model = SuggestionModel(ids, texts, version=0, lsh_params=params)
+        build = time.perf_counter() - start
+
+        timings, candidates, hits, total = [], [], 0, 0
+        for row in query_rows:
+            start = time.perf_counter()
+            found = model.top_k(users[row], k=k, threshold=threshold)
+            timings.append(time.perf_counter() - start)
+            candidates.append(model.index.candidates(model.matrix[row]).size)
+
+            if row in truth and truth[row]:
+                hits += len(truth[row] & {uid for uid, _ in found})
+                total += len(truth[row])
+
+        recall = hits / total if total else 1.0
+        label = f"lsh t={n_tables} b={n_bits} p={n_probes}"
+        print(f"{label:<28}{build:>9.2f}{recall:>10.3f}{int(np.mean(candidates)):>9}"
+              f"{percentile_ms(timings, 50):>9.3f}{percentile_ms(timings, 95):>9.3f}")
+
+    if len(scored) < len(query_rows):
+        print(f"({len(query_rows) - len(scored)} queries had no exact match above the threshold)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=DEFAULT_K)
+    parser.add_argument('--threshold', type=float, default=SIMILARITY_THRESHOLD)
+    parser.add_argument('--tables', type=int, nargs='+', default=[4, 8, 16])
+    parser.add_argument('--bits', type=int, nargs='+', default=[8, 12])
+    parser.add_argument('--probes', type=int, nargs='+', default=[0, 2])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--synthetic', help='benchmark generated users (1k, 10k, 100k, 1m) instead of the database')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        users = generate(parse_scale(args.synthetic), seed=args.seed).users
+    else:
+        from index import app
+        from app import db
+        from app.models import User
+
+        with app.app_context():
+            users = db.session.query(User.id, User.skills, User.location).order_by(User.id).all()
+
+    grid = list(itertools.product(args.tables, args.bits, args.probes))
+    run(users, args.queries, args.k, args.threshold, grid, args.seed)
+
+
+if __name__ == '__main__':
+    main()
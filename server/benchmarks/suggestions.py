@@ -0,0 +1,208 @@
+"""
+Benchmark suggestion strategies on synthetic data.
+
+For every scale and strategy this reports fit time, per-request latency
+percentiles, peak RSS and result quality (recall@k against the exact
+strategy with the same graph weight, and how often suggestions share the
+user's hidden community). Each strategy runs in a fresh process so peak
+RSS is its own.
+
+    cd server
+    python -m benchmarks.suggestions --scale 1k 10k 100k
+    python -m benchmarks.suggestions --scale 10k --json bench.json
+    python -m benchmarks.suggestions --scale 10k --baseline bench.json   # exit 1 on regression
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+
+import numpy as np
+
+from app.suggestions.model import SuggestionModel, SIMILARITY_THRESHOLD, DEFAULT_K
+from benchmarks.synthetic import generate, parse_scale
+
+STRATEGIES = ['legacy', 'exact', 'lsh', 'exact+graph', 'lsh+graph']
+
+
+def legacy_top_k(user, users, k, threshold):
+    """The original per-request path: refit TF-IDF and build a dense NxN similarity matrix."""
+    import pandas as pd
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    data = pd.DataFrame([{
+        'id': u.id,
+        'skills': u.skills or '',
+        'location': u.location or ''
+    } for u in users])
+    data['combined'] = data['skills'] + ' ' + data['location']
+
+    vectors = TfidfVectorizer(stop_words='english').fit_transform(data['combined'])
+    similarity_matrix = cosine_similarity(vectors)
+
+    current_index = data.index[data['id'] == user.id][0]
+    similarity_scores = sorted(enumerate(similarity_matrix[current_index]), key=lambda x: x[1], reverse=True)
+    return [
+        (int(data.iloc[i]['id']), float(score))
+        for i, score in similarity_scores
+        if data.iloc[i]['id'] != user.id and score >= threshold
+    ][:k]
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_strategy(strategy, n_users, seed, query_rows, k, threshold, lsh_params, graph_weight):
+    """Runs in a child process; returns timings, memory and per-query results."""
+    data = generate(n_users, seed=seed)
+    baseline_rss = peak_rss_mb()
+
+    weight = graph_weight if strategy.endswith('+graph') else 0.0
+    start = time.perf_counter()
+    if strategy == 'legacy':
+        model = None
+    else:
+        model = SuggestionModel(
+            data.user_ids, data.texts, version=0,
+            lsh_params=lsh_params if strategy.startswith('lsh') else None,
+            edges=data.edges if weight else None
+        )
+    fit_s = time.perf_counter() - start
+
+    timings, results = [], {}
+    for row in query_rows:
+        user = data.users[row]
+        start = time.perf_counter()
+        if model is None:
+            found = legacy_top_k(user, data.users, k, threshold)
+        else:
+            found = model.top_k(user, k=k, threshold=threshold, graph_weight=weight)
+        timings.append(time.perf_counter() - start)
+        results[int(row)] = [uid for uid, _ in found]
+
+    suggested = [(row, uid) for row, uids in results.items() for uid in uids]
+    same_community = (
+        np.mean([data.communities[row] == data.communities[uid - 1] for row, uid in suggested])
+        if suggested else 0.0
+    )
+
+    return {
+        'fit_s': fit_s,
+        'p50_ms': float(np.percentile(timings, 50) * 1000),
+        'p95_ms': float(np.percentile(timings, 95) * 1000),
+        'p99_ms': float(np.percentile(timings, 99) * 1000),
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_delta_mb': peak_rss_mb() - baseline_rss,
+        'coverage': sum(1 for uids in results.values() if uids) / len(results),
+        'same_community': float(same_community),
+        'results': results,
+    }
+
+
+def recall_at_k(results, reference):
+    hits = total = 0
+    for row in results:
+        expected = reference.get(row)
+        if expected:
+            hits += len(set(expected) & set(results[row]))
+            total += len(expected)
+    return hits / total if total else 1.0
+
+
+def benchmark_scale(n_users, args, pool):
+    rng = np.random.default_rng(args.seed + 1)
+    query_rows = rng.choice(n_users, size=min(args.queries, n_users), replace=False)
+    lsh_params = {'n_tables': args.lsh_tables, 'n_bits': args.lsh_bits, 'n_probes': args.lsh_probes}
+
+    rows = {}
+    # Exact strategies first: they are the reference for recall
+    for strategy in sorted(args.strategies, key=lambda s: not s.startswith('exact')):
+        if strategy == 'legacy' and n_users > args.legacy_max:
+            continue
+        queries = query_rows[:args.legacy_queries] if strategy == 'legacy' else query_rows
+        rows[strategy] = pool.apply(run_strategy, (
+            strategy, n_users, args.seed, queries, args.k, args.threshold, lsh_params, args.graph_weight
+        ))
+
+    for strategy, row in rows.items():
+        reference = rows.get('exact+graph' if strategy.endswith('+graph') else 'exact')
+        row['recall'] = recall_at_k(row['results'], reference['results']) if reference else None
+    for row in rows.values():
+        del row['results']
+    return rows
+
+
+def print_table(n_users, rows):
+    print(f"\n== {n_users:,} users ==")
+    print(f"{'strategy':<13}{'fit s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'peak MB':>9}{'fit MB':>8}{'recall':>8}{'cover':>7}{'same comm':>11}")
+    for strategy, r in rows.items():
+        recall = f"{r['recall']:.3f}" if r['recall'] is not None else '-'
+        print(f"{strategy:<13}{r['fit_s']:>8.2f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+              f"{r['peak_rss_mb']:>9.0f}{r['rss_delta_mb']:>8.0f}{recall:>8}{r['coverage']:>7.2f}"
+              f"{r['same_community']:>11.2f}")
+
+
+def find_regressions(report, baseline, tolerance):
+    """Compare against a previous --json report; slower/larger beyond tolerance or lower recall is a regression."""
+    problems = []
+    for scale, rows in report.items():
+        for strategy, r in rows.items():
+            base = baseline.get(scale, {}).get(strategy)
+            if not base:
+                continue
+            for metric in ('fit_s', 'p95_ms', 'rss_delta_mb'):
+                if r[metric] > base[metric] * (1 + tolerance) and r[metric] - base[metric] > 1e-3:
+                    problems.append(f"{scale} {strategy}: {metric} {base[metric]:.3f} -> {r[metric]:.3f}")
+            if r['recall'] is not None and base.get('recall') is not None and r['recall'] < base['recall'] - 0.02:
+                problems.append(f"{scale} {strategy}: recall {base['recall']:.3f} -> {r['recall']:.3f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', nargs='+', default=['1k', '10k'], help='1k, 10k, 100k, 1m or a user count')
+    parser.add_argument('--strategies', nargs='+', default=STRATEGIES, choices=STRATEGIES)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--k', type=int, default=DEFAULT_K)
+    parser.add_argument('--threshold', type=float, default=SIMILARITY_THRESHOLD)
+    parser.add_argument('--graph-weight', type=float, default=0.5)
+    parser.add_argument('--lsh-tables', type=int, default=8)
+    parser.add_argument('--lsh-bits', type=int, default=8)
+    parser.add_argument('--lsh-probes', type=int, default=0)
+    parser.add_argument('--legacy-max', type=int, default=5000, help='skip the O(N^2) legacy path above this many users')
+    parser.add_argument('--legacy-queries', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--baseline', help='compare against a previous --json file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown vs --baseline')
+    args = parser.parse_args()
+
+    report = {}
+    ctx = multiprocessing.get_context('spawn')
+    for scale in args.scale:
+        n_users = parse_scale(scale)
+        # One fresh process per strategy so peak RSS is not shared between them
+        with ctx.Pool(1, maxtasksperchild=1) as pool:
+            report[scale] = benchmark_scale(n_users, args, pool)
+        print_table(n_users, report[scale])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = find_regressions(report, json.load(f), args.tolerance)
+        if problems:
+            print("\nRegressions:\n  " + "\n  ".join(problems))
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == '__main__':
+    main()
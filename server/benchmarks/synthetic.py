@@ -0,0 +1,169 @@
+"""
+Reproducible synthetic users and friendships for benchmarking suggestions.
+
+Every user belongs to a hidden community (an academic field). Skills are
+drawn mostly from that field's vocabulary, locations lean towards the
+community's home cities, and friendships mostly stay within the community,
+so a good suggestion strategy should recover it.
+
+    from benchmarks.synthetic import generate
+    data = generate(10_000, seed=0)
+"""
+from collections import namedtuple
+from dataclasses import dataclass
+
+import numpy as np
+
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+SKILL_DOMAINS = {
+    'computer science': [
+        'python', 'java', 'c++', 'javascript', 'react', 'flask', 'django', 'sql',
+        'postgresql', 'docker', 'kubernetes', 'git', 'linux', 'data structures', 'algorithms',
+    ],
+    'data science': [
+        'machine learning', 'deep learning', 'pandas', 'numpy', 'statistics', 'tensorflow',
+        'pytorch', 'scikit-learn', 'data visualization', 'nlp', 'computer vision', 'r', 'tableau',
+    ],
+    'electronics': [
+        'embedded systems', 'arduino', 'raspberry pi', 'vlsi', 'verilog', 'pcb design',
+        'signal processing', 'microcontrollers', 'matlab', 'iot', 'robotics',
+    ],
+    'mechanical': [
+        'autocad', 'solidworks', 'catia', 'ansys', 'thermodynamics', 'cad', 'cnc machining',
+        'fluid mechanics', '3d printing', 'manufacturing', 'hvac',
+    ],
+    'civil': [
+        'structural analysis', 'staad pro', 'revit', 'surveying', 'construction management',
+        'geotechnical engineering', 'etabs', 'estimation', 'gis',
+    ],
+    'design': [
+        'figma', 'ui design', 'ux research', 'photoshop', 'illustrator', 'blender',
+        'prototyping', 'typography', 'motion graphics', 'video editing',
+    ],
+    'business': [
+        'marketing', 'finance', 'excel', 'accounting', 'sales', 'business analysis',
+        'product management', 'digital marketing', 'seo', 'entrepreneurship',
+    ],
+    'biotech': [
+        'molecular biology', 'pcr', 'bioinformatics', 'genetics', 'microbiology',
+        'cell culture', 'biochemistry', 'lab techniques', 'clinical research',
+    ],
+}
+
+GENERIC_SKILLS = [
+    'communication', 'leadership', 'teamwork', 'public speaking', 'problem solving',
+    'research', 'writing', 'english', 'hindi', 'project management',
+]
+
+LOCATIONS = [
+    'pune', 'mumbai', 'bangalore', 'delhi', 'hyderabad', 'chennai', 'kolkata', 'ahmedabad',
+    'nagpur', 'jaipur', 'lucknow', 'indore', 'bhopal', 'nashik', 'aurangabad', 'surat',
+    'kochi', 'coimbatore', 'chandigarh', 'noida', 'gurgaon', 'vadodara', 'mysore', 'goa',
+    'visakhapatnam', 'bhubaneswar', 'patna', 'ranchi', 'dehradun', 'guwahati', 'kolhapur',
+    'solapur', 'amravati', 'nanded', 'jalgaon', 'thane', 'navi mumbai', 'mangalore',
+]
+
+SyntheticUser = namedtuple('SyntheticUser', 'id skills location')
+
+
+@dataclass
+class SyntheticData:
+    users: list            # SyntheticUser rows, ids 1..n
+    communities: np.ndarray  # hidden community index per user (row-aligned with users)
+    edges: np.ndarray      # (E, 2) user id pairs, both directions, like the friendships table
+
+    @property
+    def user_ids(self):
+        return [u.id for u in self.users]
+
+    @property
+    def texts(self):
+        from app.suggestions.model import profile_text
+        return [profile_text(u.skills, u.location) for u in self.users]
+
+
+def zipf_weights(n, s=1.1):
+    weights = 1.0 / np.arange(1, n + 1) ** s
+    return weights / weights.sum()
+
+
+def parse_scale(value):
+    """'10k' / '1m' / '2500' -> user count."""
+    value = value.lower()
+    return SCALES.get(value) or int(value)
+
+
+def generate(n_users, seed=0, avg_degree=10, homophily=0.8,
+             in_domain=0.8, home_city=0.5, blank_skills=0.1, blank_location=0.15):
+    """Generate `n_users` users and an undirected friendship graph, deterministically for a seed."""
+    rng = np.random.default_rng(seed)
+    domains = list(SKILL_DOMAINS)
+
+    communities = rng.choice(len(domains), size=n_users, p=zipf_weights(len(domains), 0.8))
+    n_skills = rng.integers(2, 9, size=n_users)
+    has_skills = rng.random(n_users) >= blank_skills
+    has_location = rng.random(n_users) >= blank_location
+
+    # Each community prefers three home cities
+    home_cities = [rng.choice(len(LOCATIONS), size=3, replace=False) for _ in domains]
+    city_weights = zipf_weights(len(LOCATIONS))
+    at_home = rng.random(n_users) < home_city
+    locations = rng.choice(len(LOCATIONS), size=n_users, p=city_weights)
+    home_pick = rng.integers(0, 3, size=n_users)
+
+    # Draw with replacement in bulk per community, then dedupe per user
+    max_skills = n_skills.max(initial=0)
+    own_draws = np.empty((n_users, max_skills), dtype=np.int64)
+    for c, domain in enumerate(domains):
+        members = np.flatnonzero(communities == c)
+        own_draws[members] = rng.choice(
+            len(SKILL_DOMAINS[domain]), size=(members.size, max_skills),
+            p=zipf_weights(len(SKILL_DOMAINS[domain]))
+        )
+    other_skills = [s for d in domains for s in SKILL_DOMAINS[d]] + GENERIC_SKILLS
+    other_draws = rng.integers(0, len(other_skills), size=(n_users, max_skills))
+    own_counts = rng.binomial(n_skills, in_domain)
+
+    users = []
+    for i in range(n_users):
+        c = communities[i]
+
+        skills = ''
+        if has_skills[i]:
+            vocabulary = SKILL_DOMAINS[domains[c]]
+            picked = [vocabulary[j] for j in own_draws[i, :own_counts[i]]]
+            picked += [other_skills[j] for j in other_draws[i, :n_skills[i] - own_counts[i]]]
+            skills = ', '.join(dict.fromkeys(picked))
+
+        location = None
+        if has_location[i]:
+            city = home_cities[c][home_pick[i]] if at_home[i] else locations[i]
+            location = LOCATIONS[city]
+
+        users.append(SyntheticUser(i + 1, skills, location))
+
+    return SyntheticData(users, communities, friendship_edges(rng, communities, avg_degree, homophily))
+
+
+def friendship_edges(rng, communities, avg_degree, homophily):
+    """Undirected edges, `homophily` of them within the same community, returned in both directions."""
+    n = communities.size
+    n_edges = n * avg_degree // 2
+
+    sources = rng.integers(0, n, size=n_edges)
+    targets = rng.integers(0, n, size=n_edges)
+
+    # Re-draw targets from the source's community for the homophilous share
+    by_community = np.argsort(communities, kind='stable')
+    sizes = np.bincount(communities, minlength=communities.max() + 1)
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    same = rng.random(n_edges) < homophily
+    c = communities[sources[same]]
+    targets[same] = by_community[offsets[c] + (rng.random(same.sum()) * sizes[c]).astype(np.int64)]
+
+    pairs = np.stack([np.minimum(sources, targets), np.maximum(sources, targets)], axis=1)
+    pairs = np.unique(pairs[pairs[:, 0] != pairs[:, 1]], axis=0) + 1  # rows -> user ids
+
+    return np.concatenate([pairs, pairs[:, ::-1]])
@@ -0,0 +1,89 @@
+"""
+Benchmark the typeahead index: build time, memory and per-keystroke latency.
+
+Names are random first + last name pairs; skills come from benchmarks.synthetic.
+Queries replay every prefix of sampled names and skills, as a user typing would.
+
+    cd server
+    python -m benchmarks.typeahead --scale 10k 100k
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.search.typeahead import TypeaheadIndex
+from benchmarks.synthetic import generate, parse_scale
+
+FIRST_NAMES = [
+    'aarav', 'aditi', 'akash', 'ananya', 'arjun', 'divya', 'gaurav', 'ishaan', 'kavya', 'krishna',
+    'manish', 'meera', 'neha', 'nikhil', 'pooja', 'priya', 'rahul', 'riya', 'rohan', 'sakshi',
+    'sanjay', 'shreya', 'siddharth', 'sneha', 'sumit', 'tanvi', 'varun', 'vikram', 'yash', 'zoya',
+]
+LAST_NAMES = [
+    'agarwal', 'bhole', 'chopra', 'deshmukh', 'gupta', 'iyer', 'jain', 'joshi', 'kapoor', 'kulkarni',
+    'kumar', 'mehta', 'nair', 'patel', 'patil', 'rao', 'reddy', 'shah', 'sharma', 'singh', 'verma',
+]
+
+
+def synthetic_rows(n_users, seed):
+    data = generate(n_users, seed=seed, avg_degree=0)
+    rng = np.random.default_rng(seed + 2)
+    first = rng.integers(0, len(FIRST_NAMES), size=n_users)
+    last = rng.integers(0, len(LAST_NAMES), size=n_users)
+    return [
+        (u.id, f"{FIRST_NAMES[f].title()} {LAST_NAMES[l].title()}", None, u.skills)
+        for u, f, l in zip(data.users, first, last)
+    ]
+
+
+def keystrokes(rows, n, rng):
+    """Every prefix of `n` sampled names and skill phrases."""
+    queries = []
+    for row in rng.choice(len(rows), size=n, replace=False):
+        _, name, _, skills = rows[row]
+        for text in (name, (skills or '').split(',')[0].strip()):
+            queries.extend(text[:i] for i in range(1, len(text) + 1))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', nargs='+', default=['10k', '100k'], help='1k, 10k, 100k, 1m or a user count')
+    parser.add_argument('--names', type=int, default=200, help='sampled users whose prefixes are queried')
+    parser.add_argument('--limit', type=int, default=8)
+    parser.add_argument('--updates', type=int, default=1000, help='incremental profile edits to time')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'users':>10}{'build s':>9}{'MB':>8}{'keys':>10}{'p50 us':>9}{'p99 us':>9}{'update us':>11}")
+    for scale in args.scale:
+        n_users = parse_scale(scale)
+        rows = synthetic_rows(n_users, args.seed)
+        rng = np.random.default_rng(args.seed + 1)
+
+        start = time.perf_counter()
+        index = TypeaheadIndex(rows)
+        build_s = time.perf_counter() - start
+
+        timings = []
+        for query in keystrokes(rows, min(args.names, n_users), rng):
+            start = time.perf_counter()
+            index.suggest(query, args.limit)
+            timings.append(time.perf_counter() - start)
+
+        edited = rng.choice(len(rows), size=min(args.updates, n_users), replace=False)
+        start = time.perf_counter()
+        for row in edited:
+            user_id, name, pic, skills = rows[row]
+            index.update_user(user_id, name[::-1].title(), pic, skills)
+        update_us = (time.perf_counter() - start) / len(edited) * 1e6
+
+        stats = index.stats()
+        print(f"{n_users:>10,}{build_s:>9.2f}{stats['memory_bytes'] / 2**20:>8.1f}{stats['name_keys']:>10,}"
+              f"{np.percentile(timings, 50) * 1e6:>9.1f}{np.percentile(timings, 99) * 1e6:>9.1f}"
+              f"{update_us:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -30,4 +30,69 @@ class Config:
     CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
     CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
     CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
-    UPLOAD_PROVIDER = os.getenv("UPLOAD_PROVIDER", "local")  # local or cloudinary
\ No newline at end of file
+    UPLOAD_PROVIDER = os.getenv("UPLOAD_PROVIDER", "local")  # local, cloudinary or fake (tests)
+    # Background uploads to the provider: pool size, tries per file, first retry delay (s, doubles)
+    UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", 4))
+    UPLOAD_MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", 3))
+    UPLOAD_RETRY_BACKOFF = float(os.getenv("UPLOAD_RETRY_BACKOFF", 2.0))
+    # Resumable uploads: chunk size (bytes), largest file, where chunks wait, seconds before abandoned
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+    UPLOAD_MAX_SIZE = int(os.getenv("UPLOAD_MAX_SIZE", 25 * 1024 * 1024))
+    UPLOAD_CHUNK_DIR = os.getenv("UPLOAD_CHUNK_DIR")  # default: <instance>/upload_chunks
+    UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", 86400))
+    # Image variants: name:longest side (px) pairs, WebP quality, render threads
+    IMAGE_SIZES = os.getenv("IMAGE_SIZES", "thumb:96,small:320,medium:640,large:1280")
+    IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", 80))
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+    # Serving local uploads: "" (Python streams them), "x-sendfile" (Apache/lighttpd) or "x-accel" (nginx)
+    UPLOAD_SENDFILE = os.getenv("UPLOAD_SENDFILE", "")
+    UPLOAD_ACCEL_PREFIX = os.getenv("UPLOAD_ACCEL_PREFIX", "/_uploads/")  # nginx internal location
+    # Simulated latency (s) of the fake provider
+    UPLOAD_FAKE_DELAY = float(os.getenv("UPLOAD_FAKE_DELAY", 0.0))
+
+    # Friend suggestions: refit the TF-IDF model at most every N seconds
+    SUGGESTION_MODEL_TTL = int(os.getenv("SUGGESTION_MODEL_TTL", 600))
+    SUGGESTION_MODEL_MIN_REFIT = int(os.getenv("SUGGESTION_MODEL_MIN_REFIT", 30))
+
+    # "exact" scores every user; "lsh" scores only approximate-neighbour candidates
+    SUGGESTION_INDEX = os.getenv("SUGGESTION_INDEX", "exact")
+    SUGGESTION_LSH_TABLES = int(os.getenv("SUGGESTION_LSH_TABLES", 8))
+    SUGGESTION_LSH_BITS = int(os.getenv("SUGGESTION_LSH_BITS", 8))
+    SUGGESTION_LSH_PROBES = int(os.getenv("SUGGESTION_LSH_PROBES", 0))
+
+    # Weight of the mutual-friends boost added to the TF-IDF score (0 disables it)
+    SUGGESTION_GRAPH_WEIGHT = float(os.getenv("SUGGESTION_GRAPH_WEIGHT", 0.0))
+
+    # Home feed: users with more friends than this are pulled at read time instead of fanned out
+    FEED_FANOUT_LIMIT = int(os.getenv("FEED_FANOUT_LIMIT", 1000))
+    # Posts copied into a new friend's timeline when a request is accepted
+    FEED_BACKFILL_LIMIT = int(os.getenv("FEED_BACKFILL_LIMIT", 100))
+
+    # Search-as-you-type: rebuild the in-memory prefix index at least every N seconds
+    SEARCH_TYPEAHEAD_TTL = int(os.getenv("SEARCH_TYPEAHEAD_TTL", 300))
+    # Threads running the per-type sub-queries of /api/search/all concurrently
+    SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", 4))
+
+    # Chat push: "memory" (single process) or "socket" (workers relay through `flask chat-broker`)
+    CHAT_BROKER = os.getenv("CHAT_BROKER", "memory")
+    CHAT_BROKER_ADDRESS = os.getenv("CHAT_BROKER_ADDRESS", "127.0.0.1:6390")
+    CHAT_STREAM_HEARTBEAT = int(os.getenv("CHAT_STREAM_HEARTBEAT", 15))
+    CHAT_STREAM_MAX_AGE = int(os.getenv("CHAT_STREAM_MAX_AGE", 300))
+    CHAT_POLL_TIMEOUT = int(os.getenv("CHAT_POLL_TIMEOUT", 25))
+    # Most messages replayed to a reconnecting stream / returned by one poll or history page
+    CHAT_REPLAY_LIMIT = int(os.getenv("CHAT_REPLAY_LIMIT", 200))
+    # Messages per chat history page when no limit is given
+    CHAT_HISTORY_PAGE_SIZE = int(os.getenv("CHAT_HISTORY_PAGE_SIZE", 50))
+
+    # Notifications: "async" queues them for a background batch writer, "sync" writes inline (serverless)
+    NOTIFICATION_OUTBOX = os.getenv("NOTIFICATION_OUTBOX", "async")
+    NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", 500))
+    NOTIFICATION_FLUSH_INTERVAL = float(os.getenv("NOTIFICATION_FLUSH_INTERVAL", 0.05))
+    NOTIFICATION_QUEUE_SIZE = int(os.getenv("NOTIFICATION_QUEUE_SIZE", 10000))
+    # Longest a request waits for room in a full queue before dropping the notification
+    NOTIFICATION_ENQUEUE_TIMEOUT = float(os.getenv("NOTIFICATION_ENQUEUE_TIMEOUT", 0.05))
+    # Unread notifications of the same kind and link within this many seconds are grouped; 0 disables
+    NOTIFICATION_GROUP_WINDOW = int(os.getenv("NOTIFICATION_GROUP_WINDOW", 3600))
+
+    # Log requests slower than this (ms) with their slowest SQL statements; unset disables
+    SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", 0)) or None
@@ -1,10 +1,104 @@
 # run.py
+import click
 from app import create_app, db
 from flask_migrate import Migrate
+from app.suggestions.batch import materialize_suggestions
+from app.posts.timeline import rebuild_all as rebuild_timelines
+from app.search.backend import get_backend as get_search_backend
+from app.messages.pubsub import parse_address, run_hub
+from app.notifications.unread import reconcile as reconcile_unread
+from app.uploads import pipeline as upload_pipeline
+from app.uploads.resumable import prune_sessions as prune_upload_sessions
+from app.uploads import storage as upload_storage
 
 app = create_app()
 migrate = Migrate(app, db)
 
+
+@app.cli.command('compute-suggestions')
+@click.option('--k', default=5, show_default=True, help='Suggestions kept per user.')
+@click.option('--block-size', default=1000, show_default=True, help='Users scored per worker task.')
+@click.option('--workers', default=None, type=int, help='Worker processes (default: CPU count).')
+@click.option('--graph-weight', default=None, type=float, help='Mutual-friends boost (default: SUGGESTION_GRAPH_WEIGHT).')
+def compute_suggestions(k, block_size, workers, graph_weight):
+    """Materialize top-k friend suggestions for every user."""
+    count = materialize_suggestions(k=k, block_size=block_size, workers=workers, graph_weight=graph_weight)
+    click.echo(f"Wrote {count} suggestions.")
+
+
+
+@app.cli.command('rebuild-timelines')
+def rebuild_timelines_command():
+    """Recreate every home-feed timeline from posts and friendships."""
+    rebuild_timelines()
+    click.echo("Timelines rebuilt.")
+
+
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Re-index every user and post for full-text search."""
+    get_search_backend().rebuild()
+    db.session.commit()
+    click.echo("Search index rebuilt.")
+
+
+
+@app.cli.command('chat-broker')
+@click.option('--address', default=None, help='host:port to listen on (default: CHAT_BROKER_ADDRESS).')
+def chat_broker_command(address):
+    """Run the hub that relays chat messages between workers (CHAT_BROKER=socket)."""
+    address = parse_address(address or app.config['CHAT_BROKER_ADDRESS'])
+    click.echo(f"Chat broker listening on {address[0]}:{address[1]}")
+    run_hub(address, app.config['SECRET_KEY'].encode())
+
+
+
+@app.cli.command('reconcile-unread-counts')
+def reconcile_unread_counts_command():
+    """Recount unread notifications and fix drifted badge counters (run periodically)."""
+    fixed = reconcile_unread()
+    click.echo(f"Fixed {fixed} unread counters.")
+
+
+
+@app.cli.command('resume-uploads')
+@click.option('--older-than', default=300, show_default=True, help='Seconds an upload must have been stuck.')
+def resume_uploads_command(older_than):
+    """Finish background uploads whose worker process died."""
+    count = upload_pipeline.resume(older_than)
+    click.echo(f"Processed {count} uploads.")
+
+
+@app.cli.command('prune-uploads')
+@click.option('--older-than', default=86400, show_default=True, help='Seconds since the upload finished.')
+def prune_uploads_command(older_than):
+    """Delete local staged copies of files already on the upload provider, and abandoned resumable uploads."""
+    count = upload_pipeline.prune(older_than)
+    sessions = prune_upload_sessions()
+    click.echo(f"Removed {count} staged files and {sessions} expired upload sessions.")
+
+
+
+@app.cli.command('gc-uploads')
+@click.option('--grace', default=3600, show_default=True, help='Seconds a file must have been unreferenced.')
+@click.option('--recount', is_flag=True, help='Rebuild reference counts from the tables first.')
+def gc_uploads_command(grace, recount):
+    """Delete stored uploads no post, message or profile refers to any more."""
+    if recount:
+        click.echo(f"Corrected {upload_storage.recount()} reference counts.")
+    files, freed = upload_storage.collect(grace)
+    click.echo(f"Deleted {files} files ({freed} bytes).")
+
+
+@app.cli.command('migrate-uploads')
+@click.option('--dry-run', is_flag=True, help='Only report what would change.')
+def migrate_uploads_command(dry_run):
+    """Move flat, randomly named uploads to content-addressed paths, merging duplicates."""
+    files, duplicates, saved = upload_storage.migrate_flat(dry_run=dry_run)
+    click.echo(f"{'Would move' if dry_run else 'Moved'} {files} files; {duplicates} duplicates ({saved} bytes).")
+
+
 if __name__ == '__main__':
     app.run(debug=True)
     
\ No newline at end of file
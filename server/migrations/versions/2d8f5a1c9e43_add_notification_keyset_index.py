@@ -0,0 +1,26 @@
+"""Add notification keyset index
+
+Revision ID: 2d8f5a1c9e43
+Revises: f7b2d9c4e610
+Create Date: 2026-10-18 16:35:09.620381
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d8f5a1c9e43'
+down_revision = 'f7b2d9c4e610'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.create_index('ix_notification_user_timestamp_id', ['user_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_user_timestamp_id')
@@ -0,0 +1,40 @@
+"""Add suggestion table
+
+Revision ID: 3f1c2a9d7e41
+Revises: b049c8b97ad9
+Create Date: 2026-10-18 10:12:04.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7e41'
+down_revision = 'b049c8b97ad9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('suggestion',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('suggested_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['suggested_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('suggestion', schema=None) as batch_op:
+        batch_op.create_index('ix_suggestion_user_score', ['user_id', 'score'], unique=False)
+        batch_op.create_index(batch_op.f('ix_suggestion_computed_at'), ['computed_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('suggestion', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_suggestion_computed_at'))
+        batch_op.drop_index('ix_suggestion_user_score')
+
+    op.drop_table('suggestion')
@@ -0,0 +1,38 @@
+"""Add conversation key and index to message
+
+Revision ID: 4c8e2b7d1f36
+Revises: 9d6b3e0f7a18
+Create Date: 2026-10-18 14:31:44.562190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c8e2b7d1f36'
+down_revision = '9d6b3e0f7a18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('low_user_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('high_user_id', sa.Integer(), nullable=True))
+
+    op.execute(
+        "UPDATE message SET "
+        "low_user_id = CASE WHEN sender_id < receiver_id THEN sender_id ELSE receiver_id END, "
+        "high_user_id = CASE WHEN sender_id < receiver_id THEN receiver_id ELSE sender_id END"
+    )
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.create_index('ix_message_conversation_id', ['low_user_id', 'high_user_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_conversation_id')
+        batch_op.drop_column('high_user_id')
+        batch_op.drop_column('low_user_id')
@@ -0,0 +1,28 @@
+"""Add counter table
+
+Revision ID: 5b9e13d4c6a2
+Revises: c71e5f3a9b08
+Create Date: 2026-10-18 12:35:50.671402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b9e13d4c6a2'
+down_revision = 'c71e5f3a9b08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('counter',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('counter')
@@ -0,0 +1,30 @@
+"""Add notification grouping columns
+
+Revision ID: 6e1d4a8c3b57
+Revises: a3f5c9e2b874
+Create Date: 2026-10-18 15:40:27.118403
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e1d4a8c3b57'
+down_revision = 'a3f5c9e2b874'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('kind', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('actor_count', sa.Integer(), server_default='1', nullable=False))
+        batch_op.create_index('ix_notification_user_kind_link', ['user_id', 'kind', 'link'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_user_kind_link')
+        batch_op.drop_column('actor_count')
+        batch_op.drop_column('kind')
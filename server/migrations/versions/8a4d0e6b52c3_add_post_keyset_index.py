@@ -0,0 +1,26 @@
+"""Add post (user_id, timestamp, id) index
+
+Revision ID: 8a4d0e6b52c3
+Revises: 3f1c2a9d7e41
+Create Date: 2026-10-18 11:02:37.540918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4d0e6b52c3'
+down_revision = '3f1c2a9d7e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.create_index('ix_post_user_timestamp_id', ['user_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_user_timestamp_id')
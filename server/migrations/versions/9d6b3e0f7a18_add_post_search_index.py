@@ -0,0 +1,45 @@
+"""Add full-text search index on post
+
+Revision ID: 9d6b3e0f7a18
+Revises: e2a7f64c1d95
+Create Date: 2026-10-18 13:52:07.103845
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9d6b3e0f7a18'
+down_revision = 'e2a7f64c1d95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS post_fts "
+            "USING fts5(title, description, prefix='2 3')"
+        )
+        op.execute(
+            "INSERT INTO post_fts (rowid, title, description) "
+            "SELECT id, coalesce(title, ''), coalesce(description, '') FROM post"
+        )
+    elif dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE post ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+            ") STORED"
+        )
+        op.execute('CREATE INDEX ix_post_search_vector ON post USING GIN (search_vector)')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS post_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_post_search_vector")
+        op.execute('ALTER TABLE post DROP COLUMN IF EXISTS search_vector')
@@ -0,0 +1,53 @@
+"""Add conversation table
+
+Revision ID: a3f5c9e2b874
+Revises: 4c8e2b7d1f36
+Create Date: 2026-10-18 15:02:18.734925
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f5c9e2b874'
+down_revision = '4c8e2b7d1f36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('conversation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('low_user_id', sa.Integer(), nullable=False),
+    sa.Column('high_user_id', sa.Integer(), nullable=False),
+    sa.Column('last_message_id', sa.Integer(), nullable=True),
+    sa.Column('last_timestamp', sa.DateTime(), nullable=False),
+    sa.Column('low_unread', sa.Integer(), nullable=False),
+    sa.Column('high_unread', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['high_user_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['last_message_id'], ['message.id'], ),
+    sa.ForeignKeyConstraint(['low_user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('low_user_id', 'high_user_id', name='uq_conversation_users')
+    )
+    with op.batch_alter_table('conversation', schema=None) as batch_op:
+        batch_op.create_index('ix_conversation_low_recent', ['low_user_id', 'last_timestamp', 'id'], unique=False)
+        batch_op.create_index('ix_conversation_high_recent', ['high_user_id', 'last_timestamp', 'id'], unique=False)
+
+    # One summary per existing pair; past messages have no read state, so nothing starts unread
+    op.execute(
+        "INSERT INTO conversation "
+        "(low_user_id, high_user_id, last_message_id, last_timestamp, low_unread, high_unread) "
+        "SELECT m.low_user_id, m.high_user_id, m.id, m.timestamp, 0, 0 FROM message m "
+        "JOIN (SELECT max(id) AS id FROM message GROUP BY low_user_id, high_user_id) latest ON latest.id = m.id "
+        "WHERE m.low_user_id IS NOT NULL AND m.timestamp IS NOT NULL"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('conversation', schema=None) as batch_op:
+        batch_op.drop_index('ix_conversation_high_recent')
+        batch_op.drop_index('ix_conversation_low_recent')
+
+    op.drop_table('conversation')
@@ -0,0 +1,46 @@
+"""Add upload table
+
+Revision ID: b5c3e8f1a027
+Revises: 2d8f5a1c9e43
+Create Date: 2026-10-18 17:02:41.853126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5c3e8f1a027'
+down_revision = '2d8f5a1c9e43'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upload',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('target', sa.String(length=32), nullable=False),
+    sa.Column('target_id', sa.Integer(), nullable=False),
+    sa.Column('staged_name', sa.String(length=300), nullable=True),
+    sa.Column('placeholder', sa.String(length=500), nullable=False),
+    sa.Column('folder', sa.String(length=100), nullable=False),
+    sa.Column('resource_type', sa.String(length=16), nullable=False),
+    sa.Column('url', sa.String(length=500), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('upload', schema=None) as batch_op:
+        batch_op.create_index('ix_upload_status_updated', ['status', 'updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('upload', schema=None) as batch_op:
+        batch_op.drop_index('ix_upload_status_updated')
+
+    op.drop_table('upload')
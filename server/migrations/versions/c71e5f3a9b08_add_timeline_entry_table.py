@@ -0,0 +1,50 @@
+"""Add timeline_entry table and user.fanout_disabled
+
+Revision ID: c71e5f3a9b08
+Revises: 8a4d0e6b52c3
+Create Date: 2026-10-18 11:48:12.203377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c71e5f3a9b08'
+down_revision = '8a4d0e6b52c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('timeline_entry',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['author_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'post_id', name='uq_timeline_entry_user_post')
+    )
+    with op.batch_alter_table('timeline_entry', schema=None) as batch_op:
+        batch_op.create_index('ix_timeline_entry_user_timestamp_post', ['user_id', 'timestamp', 'post_id'], unique=False)
+        batch_op.create_index('ix_timeline_entry_user_author', ['user_id', 'author_id'], unique=False)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fanout_disabled', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+    # Existing posts are pushed into timelines with `flask rebuild-timelines`
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('fanout_disabled')
+
+    with op.batch_alter_table('timeline_entry', schema=None) as batch_op:
+        batch_op.drop_index('ix_timeline_entry_user_author')
+        batch_op.drop_index('ix_timeline_entry_user_timestamp_post')
+
+    op.drop_table('timeline_entry')
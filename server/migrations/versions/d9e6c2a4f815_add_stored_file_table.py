@@ -0,0 +1,35 @@
+"""Add stored file table
+
+Revision ID: d9e6c2a4f815
+Revises: 7a4e1b9d2c58
+Create Date: 2026-10-18 18:05:37.491672
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9e6c2a4f815'
+down_revision = '7a4e1b9d2c58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stored_file',
+    sa.Column('path', sa.String(length=300), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('refcount', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('path')
+    )
+    with op.batch_alter_table('stored_file', schema=None) as batch_op:
+        batch_op.create_index('ix_stored_file_refcount_updated', ['refcount', 'updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stored_file', schema=None) as batch_op:
+        batch_op.drop_index('ix_stored_file_refcount_updated')
+
+    op.drop_table('stored_file')
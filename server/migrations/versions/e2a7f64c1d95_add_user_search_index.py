@@ -0,0 +1,48 @@
+"""Add full-text search index on user
+
+Revision ID: e2a7f64c1d95
+Revises: 5b9e13d4c6a2
+Create Date: 2026-10-18 13:10:22.418307
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7f64c1d95'
+down_revision = '5b9e13d4c6a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS user_fts "
+            "USING fts5(full_name, email, skills, location, prefix='2 3')"
+        )
+        op.execute(
+            "INSERT INTO user_fts (rowid, full_name, email, skills, location) "
+            "SELECT id, coalesce(full_name, ''), coalesce(email, ''), coalesce(skills, ''), coalesce(location, '') "
+            "FROM user"
+        )
+    elif dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE \"user\" ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(full_name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(skills, '')), 'B') || "
+            "setweight(to_tsvector('simple', regexp_replace(coalesce(email, ''), '[^[:alnum:]]+', ' ', 'g')), 'C') || "
+            "setweight(to_tsvector('simple', coalesce(location, '')), 'D')"
+            ") STORED"
+        )
+        op.execute('CREATE INDEX ix_user_search_vector ON "user" USING GIN (search_vector)')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS user_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_user_search_vector")
+        op.execute('ALTER TABLE "user" DROP COLUMN IF EXISTS search_vector')
@@ -0,0 +1,28 @@
+"""Backfill unread notification counters
+
+Revision ID: f7b2d9c4e610
+Revises: 6e1d4a8c3b57
+Create Date: 2026-10-18 16:12:53.407716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b2d9c4e610'
+down_revision = '6e1d4a8c3b57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "INSERT INTO counter (key, value) "
+        "SELECT 'unread_notifications:' || user_id, COUNT(*) FROM notification "
+        "WHERE is_read = false GROUP BY user_id"
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM counter WHERE key LIKE 'unread_notifications:%'")